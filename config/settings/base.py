@@ -71,6 +71,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.humanize",
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -86,6 +87,7 @@ LOCAL_APPS = [
     "ssp.users.apps.UsersConfig",
     "ssp.controls.apps.ControlsConfig",
     "ssp.plans.apps.PlansConfig",
+    "ssp.jobs.apps.JobsConfig",
 ]
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -165,6 +167,22 @@ STATICFILES_FINDERS = [
 MEDIA_ROOT = str(APPS_DIR / "media")
 # https://docs.djangoproject.com/en/dev/ref/settings/#media-url
 MEDIA_URL = "/media/"
+# https://docs.djangoproject.com/en/dev/ref/settings/#file-upload-handlers
+FILE_UPLOAD_HANDLERS = [
+    "ssp.plans.uploads.HashingMemoryFileUploadHandler",
+    "ssp.plans.uploads.HashingTemporaryFileUploadHandler",
+]
+# Partial files of resumable uploads, on the same filesystem as MEDIA_ROOT so
+# finished uploads are moved into place rather than copied.
+CHUNKED_UPLOAD_DIR = str(APPS_DIR / "media" / "partial")
+CHUNKED_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# How artifact downloads are sent: "django" streams them, "x-accel-redirect"
+# (nginx) and "x-sendfile" (Apache, lighttpd) hand them to the front proxy.
+FILE_DOWNLOAD_MODE = env("DJANGO_FILE_DOWNLOAD_MODE", default="django")
+# The internal nginx location that maps to MEDIA_ROOT for x-accel-redirect.
+FILE_DOWNLOAD_INTERNAL_URL = env(
+    "DJANGO_FILE_DOWNLOAD_INTERNAL_URL", default="/protected-media/"
+)
 
 # TEMPLATES
 # ------------------------------------------------------------------------------
@@ -1,6 +1,5 @@
 from django.conf import settings
 from django.urls import include, path
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.views.generic import TemplateView
 from django.views import defaults as default_views
@@ -17,7 +16,7 @@ urlpatterns = [
     path("accounts/", include("allauth.urls")),
     path("controls/", include("ssp.controls.urls", namespace="controls"),),
     path("plans/", include("ssp.plans.urls", namespace="plans"),),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
 
 if settings.DEBUG:
     # This allows the error pages to be debugged during development, just visit
@@ -1,6 +1,9 @@
 import pytest
+from django.core.cache import cache
 from django.test import RequestFactory
 
+from ssp.controls.cache import clear_local_cache
+
 from ssp.users.models import User
 from ssp.users.tests.factories import UserFactory
 
@@ -8,6 +11,13 @@ from ssp.users.tests.factories import UserFactory
 @pytest.fixture(autouse=True)
 def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
+    settings.CHUNKED_UPLOAD_DIR = tmpdir.join("partial").strpath
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    cache.clear()
+    clear_local_cache()
 
 
 @pytest.fixture
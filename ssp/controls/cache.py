@@ -0,0 +1,96 @@
+import threading
+from collections import Counter, OrderedDict
+
+from django.core.cache import cache
+from django.http import Http404
+
+from ssp.utils.cache import get_generation
+
+from .models import CATALOG_GENERATION_KEY, Control
+
+LOCAL_CACHE_SIZE = 2048
+CACHE_TIMEOUT = 60 * 60 * 24
+MISSING = "missing"
+
+CACHED_FIELDS = [
+    f.attname for f in Control._meta.concrete_fields if f.name != "search_vector"
+]
+
+_local = OrderedDict()
+_lock = threading.Lock()
+stats = Counter()
+
+
+def clear_local_cache():
+    with _lock:
+        _local.clear()
+        stats.clear()
+
+
+def cache_stats():
+    with _lock:
+        return {
+            "local_hits": stats["local_hits"],
+            "shared_hits": stats["shared_hits"],
+            "misses": stats["misses"],
+            "local_size": len(_local),
+        }
+
+
+def _load_rows(slug):
+    try:
+        control = Control.objects.only(*CACHED_FIELDS).get(slug=slug)
+    except Control.DoesNotExist:
+        return MISSING
+    ancestors = control.get_ancestors().only(*CACHED_FIELDS)
+    return [
+        tuple(getattr(c, field) for field in CACHED_FIELDS)
+        for c in [*ancestors, control]
+    ]
+
+
+def _get_rows(slug):
+    generation = get_generation(CATALOG_GENERATION_KEY)
+    local_key = (generation, slug)
+    with _lock:
+        rows = _local.get(local_key)
+        if rows is not None:
+            _local.move_to_end(local_key)
+            stats["local_hits"] += 1
+            return rows
+
+    shared_key = f"controls:slug:{generation}:{slug}"
+    rows = cache.get(shared_key)
+    missed = rows is None
+    if missed:
+        rows = _load_rows(slug)
+        cache.set(shared_key, rows, CACHE_TIMEOUT)
+
+    with _lock:
+        stats["misses" if missed else "shared_hits"] += 1
+        _local[local_key] = rows
+        while len(_local) > LOCAL_CACHE_SIZE:
+            _local.popitem(last=False)
+    return rows
+
+
+def _build(row):
+    return Control.from_db(None, CACHED_FIELDS, row)
+
+
+def get_control_or_404(slug, is_placeholder=None):
+    """Control for ``slug`` from the per-worker or shared cache."""
+    rows = _get_rows(slug)
+    if rows == MISSING:
+        raise Http404("No Control matches the given query.")
+    control = _build(rows[-1])
+    if is_placeholder is not None and control.is_placeholder != is_placeholder:
+        raise Http404("No Control matches the given query.")
+    return control
+
+
+def get_control_ancestors(slug):
+    rows = _get_rows(slug)
+    if rows == MISSING:
+        return []
+    return [_build(row) for row in rows[:-1]]
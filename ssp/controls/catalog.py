@@ -0,0 +1,432 @@
+import csv
+import hashlib
+import json
+import re
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+
+from ssp.utils.cache import bump_generation
+from ssp.utils.markdown import refresh_markdown
+
+from .models import CATALOG_GENERATION_KEY, CONTROL_SEARCH_VECTOR, Control
+
+CatalogRow = namedtuple(
+    "CatalogRow", ["slug", "name", "body", "parent", "is_placeholder"]
+)
+
+CatalogDiff = namedtuple("CatalogDiff", ["inserts", "updates", "moves", "retirements"])
+
+CSV_FIELDS = ("slug", "name", "parent", "body", "is_placeholder")
+RE_SLUG_INVALID = re.compile(r"[^a-z0-9_-]+")
+RE_OSCAL_PARAM = re.compile(r"{{\s*insert:\s*param,\s*([\w.-]+)\s*}}")
+TRUE_VALUES = ("1", "true", "t", "yes", "y")
+
+
+class CatalogError(Exception):
+    pass
+
+
+@contextmanager
+def catalog_transaction():
+    """An atomic block that reports unique name and slug clashes as CatalogError."""
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as e:
+        detail = getattr(getattr(e.__cause__, "diag", None), "message_detail", None)
+        raise CatalogError(
+            "Conflicts with an existing control: " + (detail or str(e).strip())
+        ) from e
+
+
+def oscal_slug(oscal_id):
+    return RE_SLUG_INVALID.sub("-", oscal_id.lower()).strip("-")[:50]
+
+
+def _prop(item, name):
+    for prop in item.get("props", []):
+        if prop.get("name") == name:
+            return prop.get("value")
+    return None
+
+
+def _param_text(param):
+    if "label" in param:
+        return "[Assignment: " + param["label"] + "]"
+    if "select" in param:
+        choices = param["select"].get("choice", [])
+        return "[Selection: " + "; ".join(choices) + "]"
+    return "[" + param.get("id", "") + "]"
+
+
+def _prose(text, params):
+    return RE_OSCAL_PARAM.sub(
+        lambda m: params.get(m.group(1), "[" + m.group(1) + "]"), text
+    )
+
+
+def _statement_lines(part, params, depth=0):
+    if part.get("prose"):
+        label = _prop(part, "label")
+        prose = _prose(part["prose"], params)
+        if depth:
+            prose = "    " * (depth - 1) + "- " + (label + " " if label else "") + prose
+        yield prose
+    for child in part.get("parts", []):
+        yield from _statement_lines(child, params, depth + 1)
+
+
+def oscal_control_body(control, params):
+    params = dict(params)
+    for param in control.get("params", []):
+        params[param["id"]] = _param_text(param)
+    lines = []
+    for part in control.get("parts", []):
+        if part.get("name") == "statement":
+            lines.extend(_statement_lines(part, params))
+    return "\n".join(lines), params
+
+
+def _oscal_controls(controls, parent, params):
+    for control in controls:
+        label = _prop(control, "label") or control["id"].upper()
+        body, control_params = oscal_control_body(control, params)
+        slug = oscal_slug(control["id"])
+        yield CatalogRow(
+            slug=slug,
+            name=(label + " " + control["title"])[:255],
+            body=body,
+            parent=parent,
+            is_placeholder=False,
+        )
+        yield from _oscal_controls(control.get("controls", []), slug, control_params)
+
+
+def read_oscal_catalog(fp, root_slug, root_name=None):
+    catalog = json.load(fp)["catalog"]
+    params = {p["id"]: _param_text(p) for p in catalog.get("params", [])}
+    yield CatalogRow(
+        slug=root_slug,
+        name=(root_name or catalog["metadata"]["title"])[:255],
+        body="",
+        parent=None,
+        is_placeholder=True,
+    )
+    for group in catalog.get("groups", []):
+        slug = oscal_slug(group["id"])
+        yield CatalogRow(
+            slug=slug,
+            name=group["title"][:255],
+            body="",
+            parent=root_slug,
+            is_placeholder=True,
+        )
+        yield from _oscal_controls(group.get("controls", []), slug, params)
+    yield from _oscal_controls(catalog.get("controls", []), root_slug, params)
+
+
+def read_csv_catalog(fp):
+    reader = csv.DictReader(fp)
+    missing = set(CSV_FIELDS[:2]) - set(reader.fieldnames or [])
+    if missing:
+        raise CatalogError("CSV is missing columns: " + ", ".join(sorted(missing)))
+    for row in reader:
+        yield CatalogRow(
+            slug=row["slug"].strip(),
+            name=row["name"].strip(),
+            body=row.get("body") or "",
+            parent=(row.get("parent") or "").strip() or None,
+            is_placeholder=(row.get("is_placeholder") or "").strip().lower()
+            in TRUE_VALUES,
+        )
+
+
+def _number_tree(slug, children, nodes, tree_id, left, level):
+    node = nodes[slug]
+    node.tree_id, node.level, node.lft = tree_id, level, left
+    right = left + 1
+    for child in children[slug]:
+        right = _number_tree(child, children, nodes, tree_id, right, level + 1) + 1
+    node.rght = right
+    return right
+
+
+def _renumber_trees(tree_ids, batch_size=500):
+    """Rebuild the MPTT fields of whole trees from their parent links.
+
+    One query reads each tree and only rows whose numbers changed are
+    written back. Siblings keep their order by ``lft``.
+    """
+    for tree_id in tree_ids:
+        nodes = {
+            c.pk: c
+            for c in Control.objects.filter(tree_id=tree_id)
+            .order_by("lft", "pk")
+            .only("pk", "parent_id", "tree_id", "level", "lft", "rght")
+        }
+        before = {pk: (c.level, c.lft, c.rght) for pk, c in nodes.items()}
+        children = defaultdict(list)
+        for control in nodes.values():
+            children[control.parent_id].append(control.pk)
+        for pk in children[None]:
+            _number_tree(pk, children, nodes, tree_id, 1, 0)
+        Control.objects.bulk_update(
+            [c for pk, c in nodes.items() if (c.level, c.lft, c.rght) != before[pk]],
+            ["level", "lft", "rght"],
+            batch_size=batch_size,
+        )
+
+
+def _insert_controls(rows, parents, batch_size):
+    """Create ``rows`` a tree level at a time.
+
+    ``parents`` are the existing parent controls by slug. New trees are
+    numbered in memory, subtrees grafted onto existing controls are
+    numbered after their siblings and those trees renumbered once at the
+    end. Rows that no root or existing control leads to, because their
+    parents form a cycle, raise CatalogError before anything is written.
+    """
+    nodes = {}
+    children = defaultdict(list)
+    for row in rows:
+        nodes[row.slug] = Control(
+            slug=row.slug,
+            name=row.name,
+            body=row.body,
+            is_placeholder=row.is_placeholder,
+        )
+        refresh_markdown(nodes[row.slug], "body")
+        children[row.parent].append(row.slug)
+
+    levels = []
+    level = children[None] + [slug for parent in parents for slug in children[parent]]
+    while level:
+        levels.append(level)
+        level = [child for slug in level for child in children[slug]]
+    placed = {slug for level in levels for slug in level}
+    if len(placed) != len(nodes):
+        raise CatalogError(
+            "Controls in or under a parent cycle: "
+            + ", ".join(sorted(set(nodes) - placed))
+        )
+
+    tree_id = (Control.objects.aggregate(Max("tree_id"))["tree_id__max"] or 0) + 1
+    for slug in children[None]:
+        _number_tree(slug, children, nodes, tree_id, 1, 0)
+        tree_id += 1
+    grafted = {parent.tree_id for slug, parent in parents.items() if children[slug]}
+    ends = dict(
+        Control.objects.filter(tree_id__in=grafted)
+        .order_by()
+        .values("tree_id")
+        .annotate(end=Max("rght"))
+        .values_list("tree_id", "end")
+    )
+    for parent in parents.values():
+        for slug in children[parent.slug]:
+            ends[parent.tree_id] = _number_tree(
+                slug,
+                children,
+                nodes,
+                parent.tree_id,
+                ends[parent.tree_id] + 1,
+                parent.level + 1,
+            )
+
+    parent_slugs = {row.slug: row.parent for row in rows}
+    pks = {slug: control.pk for slug, control in parents.items()}
+    for level in levels:
+        batch = [nodes[slug] for slug in level]
+        for control in batch:
+            control.parent_id = pks.get(parent_slugs[control.slug])
+        Control.objects.bulk_create(batch, batch_size=batch_size)
+        pks.update((control.slug, control.pk) for control in batch)
+
+    _renumber_trees(sorted(grafted), batch_size=batch_size)
+    Control.objects.filter(pk__in=[c.pk for c in nodes.values()]).update(
+        search_vector=CONTROL_SEARCH_VECTOR
+    )
+
+
+def import_catalog(rows, batch_size=500):
+    rows = list(rows)
+    slugs = set()
+    for row in rows:
+        if row.slug in slugs:
+            raise CatalogError("Duplicate slug in catalog: " + row.slug)
+        slugs.add(row.slug)
+
+    with catalog_transaction():
+        existing = list(
+            Control.objects.filter(slug__in=slugs).values_list("slug", flat=True)
+        )
+        if existing:
+            raise CatalogError("Controls already exist: " + ", ".join(sorted(existing)))
+
+        external = {row.parent for row in rows if row.parent} - slugs
+        attach_to = {
+            c.slug: c
+            for c in Control.objects.filter(slug__in=external).only(
+                "pk", "slug", "tree_id", "level"
+            )
+        }
+        if len(attach_to) != len(external):
+            raise CatalogError(
+                "Unknown parent controls: "
+                + ", ".join(sorted(external - set(attach_to)))
+            )
+
+        _insert_controls(rows, attach_to, batch_size)
+        bump_generation(CATALOG_GENERATION_KEY)
+
+    return len(rows)
+
+
+def control_fingerprint(slug, name, body, parent, is_placeholder):
+    m = hashlib.sha256()
+    for value in (slug, name, body, parent or "", "1" if is_placeholder else "0"):
+        m.update(value.encode())
+        m.update(b"\0")
+    return m.hexdigest()
+
+
+def diff_catalog(rows, root_slug):
+    try:
+        root = Control.objects.get(slug=root_slug, parent=None)
+    except Control.DoesNotExist:
+        raise CatalogError("Unknown root control: " + root_slug)
+
+    existing = {
+        c["slug"]: c
+        for c in Control.objects.filter(tree_id=root.tree_id).values(
+            "slug", "name", "body", "parent__slug", "is_placeholder", "is_withdrawn"
+        )
+    }
+    fingerprints = {
+        slug: control_fingerprint(
+            slug, c["name"], c["body"], c["parent__slug"], c["is_placeholder"]
+        )
+        for slug, c in existing.items()
+    }
+
+    diff = CatalogDiff([], [], [], [])
+    seen = set()
+    for row in rows:
+        if row.slug in seen:
+            raise CatalogError("Duplicate slug in catalog: " + row.slug)
+        seen.add(row.slug)
+        current = existing.get(row.slug)
+        if current is None:
+            diff.inserts.append(row)
+            continue
+        if (
+            control_fingerprint(*row) == fingerprints[row.slug]
+            and not current["is_withdrawn"]
+        ):
+            continue
+        if row.parent != current["parent__slug"]:
+            diff.moves.append(row)
+        if (
+            row.name != current["name"]
+            or row.body != current["body"]
+            or row.is_placeholder != current["is_placeholder"]
+            or current["is_withdrawn"]
+        ):
+            diff.updates.append(row)
+
+    diff.retirements.extend(
+        slug
+        for slug, c in existing.items()
+        if slug not in seen and not c["is_withdrawn"]
+    )
+    return diff
+
+
+def apply_catalog_diff(diff, batch_size=500):
+    from ssp.plans.models import ControlDemotionException, Plan, PlanRollup
+
+    with catalog_transaction():
+        if Plan.objects.filter(
+            root_control__slug__in=[row.slug for row in diff.moves if row.parent]
+        ).exists():
+            raise ControlDemotionException
+
+        conflicts = list(
+            Control.objects.filter(
+                slug__in=[row.slug for row in diff.inserts]
+            ).values_list("slug", flat=True)
+        )
+        if conflicts:
+            raise CatalogError(
+                "Controls already exist outside this catalog: "
+                + ", ".join(sorted(conflicts))
+            )
+
+        inserted = {row.slug for row in diff.inserts}
+        parent_slugs = {
+            row.parent for row in diff.inserts + diff.moves if row.parent
+        } - inserted
+        parents = {
+            c.slug: c
+            for c in Control.objects.filter(slug__in=parent_slugs).only(
+                "pk", "slug", "tree_id", "level"
+            )
+        }
+        if len(parents) != len(parent_slugs):
+            raise CatalogError(
+                "Unknown parent controls: "
+                + ", ".join(sorted(parent_slugs - set(parents)))
+            )
+
+        if diff.updates:
+            rows = {row.slug: row for row in diff.updates}
+            controls = list(Control.objects.filter(slug__in=rows.keys()))
+            for control in controls:
+                row = rows[control.slug]
+                control.name = row.name
+                control.body = row.body
+                control.is_placeholder = row.is_placeholder
+                control.is_withdrawn = False
+                refresh_markdown(control, "body")
+            Control.objects.bulk_update(
+                controls,
+                [
+                    "name",
+                    "body",
+                    "is_placeholder",
+                    "is_withdrawn",
+                    "body_html",
+                    "body_html_key",
+                ],
+            )
+            Control.objects.filter(slug__in=rows.keys()).update(
+                search_vector=CONTROL_SEARCH_VECTOR
+            )
+
+        if diff.inserts:
+            _insert_controls(diff.inserts, parents, batch_size)
+
+        # Moves go through the regular MPTT save, which can carry a subtree
+        # to another tree; catalog upgrades move few controls.
+        for row in diff.moves:
+            control = Control.objects.get(slug=row.slug)
+            control.parent = (
+                Control.objects.get(slug=row.parent) if row.parent else None
+            )
+            control.save()
+
+        if diff.retirements:
+            Control.objects.filter(slug__in=diff.retirements).update(is_withdrawn=True)
+
+        if diff.inserts or diff.moves:
+            slugs = [row.slug for row in diff.inserts + diff.moves]
+            tree_ids = Control.objects.filter(slug__in=slugs).values("tree_id")
+            for plan in Plan.objects.filter(
+                root_control__tree_id__in=tree_ids
+            ).select_related("root_control"):
+                PlanRollup.objects.rebuild(plan)
+
+        bump_generation(CATALOG_GENERATION_KEY)
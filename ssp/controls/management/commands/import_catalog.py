@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import slugify
+
+from ssp.controls.catalog import (
+    CatalogError,
+    import_catalog,
+    read_csv_catalog,
+    read_oscal_catalog,
+)
+
+
+class Command(BaseCommand):
+    help = "Bulk import a control catalog from OSCAL JSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Catalog file to import.")
+        parser.add_argument(
+            "--format",
+            choices=("oscal", "csv"),
+            help="Catalog format, guessed from the file extension if omitted.",
+        )
+        parser.add_argument(
+            "--root-slug", help="Slug for the OSCAL catalog root control."
+        )
+        parser.add_argument(
+            "--root-name",
+            help="Name for the OSCAL catalog root control, defaults to the catalog title.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        catalog_format = options["format"] or (
+            "csv" if path.lower().endswith(".csv") else "oscal"
+        )
+        start = time.monotonic()
+        try:
+            with open(path, newline="", encoding="utf-8") as fp:
+                if catalog_format == "csv":
+                    rows = read_csv_catalog(fp)
+                else:
+                    root_name = options["root_name"]
+                    root_slug = options["root_slug"] or slugify(root_name or "")
+                    if not root_slug:
+                        raise CommandError(
+                            "--root-slug or --root-name is required for OSCAL catalogs."
+                        )
+                    rows = read_oscal_catalog(fp, root_slug[:50], root_name)
+                count = import_catalog(rows, batch_size=options["batch_size"])
+        except (CatalogError, OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not import {path}: {e}")
+        elapsed = time.monotonic() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {count} controls in {elapsed:.2f}s "
+                f"({count / elapsed if elapsed else count:.0f} rows/s)."
+            )
+        )
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ssp.controls.catalog import (
+    CatalogError,
+    apply_catalog_diff,
+    diff_catalog,
+    read_csv_catalog,
+    read_oscal_catalog,
+)
+from ssp.controls.models import Control
+from ssp.plans.models import ControlDemotionException
+
+
+class Command(BaseCommand):
+    help = "Upgrade an existing control catalog in place from a new revision."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Catalog revision to apply.")
+        parser.add_argument(
+            "--root-slug", required=True, help="Slug of the catalog root control."
+        )
+        parser.add_argument(
+            "--root-name",
+            help="Name for the OSCAL catalog root control, defaults to the current name.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=("oscal", "csv"),
+            help="Catalog format, guessed from the file extension if omitted.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the changes without applying them.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        catalog_format = options["format"] or (
+            "csv" if path.lower().endswith(".csv") else "oscal"
+        )
+        try:
+            with open(path, newline="", encoding="utf-8") as fp:
+                if catalog_format == "csv":
+                    rows = read_csv_catalog(fp)
+                else:
+                    root_name = (
+                        options["root_name"]
+                        or Control.objects.filter(slug=options["root_slug"])
+                        .values_list("name", flat=True)
+                        .first()
+                    )
+                    rows = read_oscal_catalog(fp, options["root_slug"], root_name)
+                diff = diff_catalog(rows, options["root_slug"])
+            if not options["dry_run"]:
+                apply_catalog_diff(diff)
+        except ControlDemotionException:
+            raise CommandError(
+                "Catalog revision would move a plan root control under another control."
+            )
+        except (CatalogError, OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not upgrade from {path}: {e}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would apply' if options['dry_run'] else 'Applied'} "
+                f"{len(diff.inserts)} inserts, {len(diff.updates)} updates, "
+                f"{len(diff.moves)} moves and {len(diff.retirements)} retirements."
+            )
+        )
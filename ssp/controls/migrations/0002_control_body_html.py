@@ -0,0 +1,38 @@
+# Generated by Django 3.1.2 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+from ssp.utils.markdown import refresh_markdown
+
+
+def render_body_html(apps, schema_editor):
+    Control = apps.get_model("controls", "Control")
+    batch = []
+    for obj in Control.objects.iterator():
+        refresh_markdown(obj, "body")
+        batch.append(obj)
+        if len(batch) >= 500:
+            Control.objects.bulk_update(batch, ["body_html", "body_html_key"])
+            batch = []
+    Control.objects.bulk_update(batch, ["body_html", "body_html_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('controls', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='control',
+            name='body_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='control',
+            name='body_html_key',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(render_body_html, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.1.2 on 2026-10-18 20:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    Control = apps.get_model("controls", "Control")
+    Control.objects.update(
+        search_vector=SearchVector("name", weight="A", config="english")
+        + SearchVector("body", weight="B", config="english")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('controls', '0002_control_body_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='control',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='control',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='controls_co_search__844aaf_gin'),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.2 on 2026-10-18 20:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('controls', '0003_control_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='control',
+            name='is_withdrawn',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,7 +1,27 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models import Value
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.urls import reverse
 from mptt.models import MPTTModel, TreeForeignKey
 
+from ssp.utils.cache import bump_generation
+from ssp.utils.markdown import refresh_markdown, rendered_markdown
+
+CATALOG_GENERATION_KEY = "controls:generation"
+
+
+def control_search_vector(name="name", body="body"):
+    return SearchVector(name, weight="A", config="english") + SearchVector(
+        body, weight="B", config="english"
+    )
+
+
+# For bulk updates, computed from the columns.
+CONTROL_SEARCH_VECTOR = control_search_vector()
+
 
 class Control(MPTTModel):
     name = models.CharField(max_length=255, unique=True)
@@ -11,10 +31,36 @@ class Control(MPTTModel):
     )
 
     body = models.TextField()
+    body_html = models.TextField(blank=True, editable=False)
+    body_html_key = models.CharField(max_length=64, blank=True, editable=False)
     is_placeholder = models.BooleanField(default=False)
+    is_withdrawn = models.BooleanField(default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [GinIndex(fields=["search_vector"])]
 
     def __str__(self):
         return self.slug + " " + self.name
 
     def get_absolute_url(self):
         return reverse("controls:detail", args=[self.slug])
+
+    def rendered_body(self):
+        return rendered_markdown(self, "body")
+
+    def save(self, *args, **kwargs):
+        refresh_markdown(self, "body")
+        # Inserts cannot refer to columns, so the vector is built from the
+        # values being saved and written with the row.
+        self.search_vector = control_search_vector(
+            Value(self.name, output_field=models.TextField()),
+            Value(self.body, output_field=models.TextField()),
+        )
+        super().save(*args, **kwargs)
+
+
+@receiver(post_save, sender=Control)
+@receiver(post_delete, sender=Control)
+def bump_catalog_generation(sender, **kwargs):
+    bump_generation(CATALOG_GENERATION_KEY)
@@ -0,0 +1,45 @@
+import pytest
+from django.http import Http404
+
+from ssp.controls.cache import cache_stats, get_control_ancestors, get_control_or_404
+from ssp.controls.tests.factories import ControlFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestControlCache:
+    def test_get_control_or_404(self, django_assert_num_queries):
+        root = ControlFactory()
+        c = ControlFactory(parent=root, body="body")
+
+        control = get_control_or_404(c.slug)
+        assert control.pk == c.pk
+        assert control.rendered_body() == "<p>body</p>"
+        assert [a.pk for a in get_control_ancestors(c.slug)] == [root.pk]
+
+        with django_assert_num_queries(0):
+            assert get_control_or_404(c.slug).pk == c.pk
+        assert cache_stats()["misses"] == 1
+        assert cache_stats()["local_hits"] == 2
+
+    def test_get_control_or_404_missing(self):
+        with pytest.raises(Http404):
+            get_control_or_404("missing")
+
+        c = ControlFactory(slug="missing", is_placeholder=True)
+        assert get_control_or_404("missing").pk == c.pk
+
+        with pytest.raises(Http404):
+            get_control_or_404("missing", is_placeholder=False)
+
+    def test_invalidated_on_save(self):
+        c = ControlFactory(body="old")
+        get_control_or_404(c.slug)
+
+        c.body = "new"
+        c.save()
+        assert get_control_or_404(c.slug).body == "new"
+
+        c.delete()
+        with pytest.raises(Http404):
+            get_control_or_404(c.slug)
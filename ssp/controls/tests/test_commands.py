@@ -0,0 +1,274 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from ssp.controls.models import Control
+from ssp.controls.tests.factories import ControlFactory
+from ssp.plans.tests.factories import PlanFactory
+
+pytestmark = pytest.mark.django_db
+
+OSCAL_CATALOG = {
+    "catalog": {
+        "metadata": {"title": "Test Catalog"},
+        "groups": [
+            {
+                "id": "ac",
+                "title": "Access Control",
+                "controls": [
+                    {
+                        "id": "ac-1",
+                        "title": "Policy and Procedures",
+                        "props": [{"name": "label", "value": "AC-1"}],
+                        "params": [{"id": "ac-1_prm_1", "label": "personnel"}],
+                        "parts": [
+                            {
+                                "name": "statement",
+                                "parts": [
+                                    {
+                                        "name": "item",
+                                        "props": [{"name": "label", "value": "a."}],
+                                        "prose": "Disseminate to {{ insert: param, ac-1_prm_1 }}",
+                                    }
+                                ],
+                            }
+                        ],
+                    },
+                    {
+                        "id": "ac-2",
+                        "title": "Account Management",
+                        "props": [{"name": "label", "value": "AC-2"}],
+                        "controls": [
+                            {
+                                "id": "ac-2.1",
+                                "title": "Automated System Account Management",
+                                "props": [{"name": "label", "value": "AC-2(1)"}],
+                            }
+                        ],
+                    },
+                ],
+            }
+        ],
+    }
+}
+
+
+class TestImportCatalogCommand:
+    def test_import_oscal(self, tmpdir):
+        path = tmpdir.join("catalog.json")
+        path.write(json.dumps(OSCAL_CATALOG))
+
+        call_command("import_catalog", str(path), root_slug="test-catalog")
+
+        root = Control.objects.get(slug="test-catalog")
+        assert root.is_placeholder is True
+        assert root.get_descendant_count() == 4
+
+        family = Control.objects.get(slug="ac")
+        assert family.parent == root
+        assert [c.slug for c in family.get_descendants()] == ["ac-1", "ac-2", "ac-2-1"]
+
+        enhancement = Control.objects.get(slug="ac-2-1")
+        assert enhancement.name == "AC-2(1) Automated System Account Management"
+        assert enhancement.parent.slug == "ac-2"
+        assert enhancement.level == 3
+
+        assert "- a. Disseminate to [Assignment: personnel]" in Control.objects.get(
+            slug="ac-1"
+        ).body
+
+    def test_import_csv_under_existing_control(self, tmpdir):
+        existing = ControlFactory()
+        ControlFactory()
+        path = tmpdir.join("catalog.csv")
+        path.write(
+            "slug,name,parent,body,is_placeholder\n"
+            f"fam,Family,{existing.slug},,true\n"
+            "fam-1,Family One,fam,body one,\n"
+        )
+
+        call_command("import_catalog", str(path))
+
+        existing.refresh_from_db()
+        assert [c.slug for c in existing.get_descendants()] == ["fam", "fam-1"]
+        assert Control.objects.get(slug="fam").is_placeholder is True
+
+    def test_import_existing_slug(self, tmpdir):
+        ControlFactory(slug="fam")
+        path = tmpdir.join("catalog.csv")
+        path.write("slug,name,parent\nfam,Family,\n")
+
+        with pytest.raises(CommandError):
+            call_command("import_catalog", str(path))
+
+    def test_import_parent_cycle(self, tmpdir):
+        path = tmpdir.join("catalog.csv")
+        path.write(
+            "slug,name,parent\n"
+            "cat,Catalog,\n"
+            "a,A,b\n"
+            "b,B,a\n"
+            "a-1,A One,a\n"
+            "self,Self,self\n"
+        )
+
+        with pytest.raises(CommandError, match="cycle: a, a-1, b, self$"):
+            call_command("import_catalog", str(path))
+        assert not Control.objects.exists()
+
+
+class TestUpgradeCatalogCommand:
+    def import_csv(self, tmpdir, name, content):
+        path = tmpdir.join(name)
+        path.write(content)
+        return str(path)
+
+    def test_upgrade(self, tmpdir):
+        call_command(
+            "import_catalog",
+            self.import_csv(
+                tmpdir,
+                "r1.csv",
+                "slug,name,parent,body,is_placeholder\n"
+                "cat,Catalog,,,true\n"
+                "fam-a,Family A,cat,,true\n"
+                "fam-b,Family B,cat,,true\n"
+                "a-1,A One,fam-a,old body,\n"
+                "a-2,A Two,fam-a,,\n"
+                "a-3,A Three,fam-a,,\n",
+            ),
+        )
+        unchanged = Control.objects.get(slug="a-2")
+
+        call_command(
+            "upgrade_catalog",
+            self.import_csv(
+                tmpdir,
+                "r2.csv",
+                "slug,name,parent,body,is_placeholder\n"
+                "cat,Catalog,,,true\n"
+                "fam-a,Family A,cat,,true\n"
+                "fam-b,Family B,cat,,true\n"
+                "a-1,A One,fam-a,new body,\n"
+                "a-2,A Two,fam-a,,\n"
+                "b-1,B One,fam-b,,\n"
+                "a-3,A Three,fam-b,,\n",
+            ),
+            root_slug="cat",
+        )
+
+        assert Control.objects.get(slug="a-1").body == "new body"
+        assert Control.objects.get(slug="a-1").is_withdrawn is False
+        assert Control.objects.get(slug="a-3").parent.slug == "fam-b"
+        assert Control.objects.get(slug="b-1").parent.slug == "fam-b"
+        assert [c.slug for c in Control.objects.get(slug="fam-b").get_children()] == [
+            "b-1",
+            "a-3",
+        ]
+        assert Control.objects.get(slug="a-2").body_html_key == unchanged.body_html_key
+
+        call_command(
+            "upgrade_catalog",
+            self.import_csv(
+                tmpdir,
+                "r3.csv",
+                "slug,name,parent,body,is_placeholder\n"
+                "cat,Catalog,,,true\n"
+                "fam-a,Family A,cat,,true\n",
+            ),
+            root_slug="cat",
+        )
+        assert set(
+            Control.objects.filter(is_withdrawn=True).values_list("slug", flat=True)
+        ) == {"fam-b", "a-1", "a-2", "a-3", "b-1"}
+
+    def test_upgrade_protects_plan_root(self, tmpdir):
+        other = ControlFactory()
+        root = ControlFactory(slug="cat")
+        PlanFactory(root_control=root)
+
+        with pytest.raises(CommandError):
+            call_command(
+                "upgrade_catalog",
+                self.import_csv(
+                    tmpdir,
+                    "r2.csv",
+                    f"slug,name,parent\ncat,{root.name},{other.slug}\n",
+                ),
+                root_slug="cat",
+            )
+
+        root.refresh_from_db()
+        assert root.parent is None
+
+    def test_upgrade_inserts_in_batches(self, tmpdir, django_assert_max_num_queries):
+        call_command(
+            "import_catalog",
+            self.import_csv(
+                tmpdir,
+                "r1.csv",
+                "slug,name,parent\ncat,Catalog,\nfam-a,Family A,cat\na-1,A One,fam-a\n",
+            ),
+        )
+        other = ControlFactory()
+        revision = self.import_csv(
+            tmpdir,
+            "r2.csv",
+            "slug,name,parent\ncat,Catalog,\nfam-a,Family A,cat\na-1,A One,fam-a\n"
+            + "".join(f"a-1-{i},A One {i},a-1\n" for i in range(20))
+            + "fam-b,Family B,cat\nb-1,B One,fam-b\n",
+        )
+        with django_assert_max_num_queries(20):
+            call_command("upgrade_catalog", revision, root_slug="cat")
+
+        root = Control.objects.get(slug="cat")
+        assert [c.slug for c in root.get_children()] == ["fam-a", "fam-b"]
+        assert [c.slug for c in Control.objects.get(slug="a-1").get_children()] == [
+            f"a-1-{i}" for i in range(20)
+        ]
+        assert root.get_descendant_count() == 24
+        assert Control.objects.get(slug="b-1").level == 2
+        assert Control.objects.filter(slug="b-1", search_vector__isnull=False).exists()
+        other.refresh_from_db()
+        assert (other.lft, other.rght) == (1, 2)
+
+    def test_upgrade_unknown_parent(self, tmpdir):
+        ControlFactory(slug="cat")
+        for content in (
+            "slug,name,parent\ncat,Catalog,\nx-1,X One,missing\n",
+            "slug,name,parent\ncat,Catalog,\nx-1,X One,x-2\nx-2,X Two,x-1\n",
+        ):
+            with pytest.raises(CommandError, match="missing|cycle"):
+                call_command(
+                    "upgrade_catalog",
+                    self.import_csv(tmpdir, "r2.csv", content),
+                    root_slug="cat",
+                )
+        assert not Control.objects.filter(slug__startswith="x-").exists()
+
+    def test_upgrade_oscal_keeps_root_name(self, tmpdir):
+        path = tmpdir.join("catalog.json")
+        path.write(json.dumps(OSCAL_CATALOG))
+        call_command("import_catalog", str(path), root_name="NIST 800-53")
+
+        call_command("upgrade_catalog", str(path), root_slug="nist-800-53")
+        assert Control.objects.get(slug="nist-800-53").name == "NIST 800-53"
+
+        call_command(
+            "upgrade_catalog", str(path), root_slug="nist-800-53", root_name="Renamed"
+        )
+        assert Control.objects.get(slug="nist-800-53").name == "Renamed"
+
+    def test_upgrade_name_conflict(self, tmpdir):
+        ControlFactory(slug="cat")
+        ControlFactory(name="Taken")
+        with pytest.raises(CommandError, match="Conflicts with an existing control"):
+            call_command(
+                "upgrade_catalog",
+                self.import_csv(
+                    tmpdir, "r2.csv", "slug,name,parent\ncat,Catalog,\nx-1,Taken,cat\n"
+                ),
+                root_slug="cat",
+            )
+        assert not Control.objects.filter(slug="x-1").exists()
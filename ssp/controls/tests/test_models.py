@@ -0,0 +1,43 @@
+import pytest
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ssp.controls.models import Control
+from ssp.controls.tests.factories import ControlFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestControlModel:
+    def test_rendered_body(self, settings):
+        c = ControlFactory(body="**bold**")
+        assert c.body_html == "<p><strong>bold</strong></p>"
+        key = c.body_html_key
+
+        c.save()
+        assert c.body_html_key == key
+
+        c.body = "*em*"
+        c.save()
+        assert c.body_html == "<p><em>em</em></p>"
+        assert c.body_html_key != key
+
+        settings.MARKDOWNIFY_WHITELIST_TAGS = ["p"]
+        assert c.rendered_body() == "<p>em</p>"
+
+    def test_search_vector_written_with_row(self):
+        with CaptureQueriesContext(connection) as context:
+            c = ControlFactory(name="Account Management", body="Disable accounts")
+        assert [
+            q for q in context.captured_queries if q["sql"].startswith("UPDATE")
+        ] == []
+
+        query = SearchQuery("accounts", config="english")
+        assert Control.objects.filter(pk=c.pk, search_vector=query).exists()
+
+        c.body = "Audit events"
+        c.save()
+        assert Control.objects.filter(
+            pk=c.pk, search_vector=SearchQuery("audit", config="english")
+        ).exists()
@@ -7,6 +7,7 @@ from .views import (
     ControlDetailView,
     ControlListView,
     ControlUpdateView,
+    control_cache_stats,
 )
 
 app_name = "Controls"
@@ -30,6 +31,11 @@ urlpatterns = [
         ),
         name="delete",
     ),
+    path(
+        "cache-stats/",
+        view=permission_required("controls.change_control")(control_cache_stats),
+        name="cache-stats",
+    ),
     path(
         "<str:slug>/", view=login_required(ControlDetailView.as_view()), name="detail"
     ),
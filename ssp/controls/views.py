@@ -1,4 +1,5 @@
 from django.contrib.messages.views import SuccessMessageMixin
+from django.http import JsonResponse
 from django.urls import reverse_lazy
 from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
@@ -6,6 +7,7 @@ from django.views.generic.list import ListView
 
 from ssp.utils.views import ActiveTabView
 
+from .cache import cache_stats
 from .models import Control
 
 
@@ -40,3 +42,7 @@ class ControlDeleteView(ActiveTabView, DeleteView):
     model = Control
     success_url = reverse_lazy("controls:list")
     active_tab = "controls"
+
+
+def control_cache_stats(request):
+    return JsonResponse(cache_stats())
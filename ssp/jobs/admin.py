@@ -0,0 +1,28 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+from .queue import queue_stats
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("task", "status", "attempts", "created_on", "wait", "duration")
+    list_filter = ("status", "task")
+    readonly_fields = ("created_on", "started_on", "finished_on", "error")
+    actions = ["retry"]
+
+    def changelist_view(self, request, extra_context=None):
+        stats = queue_stats()
+        if stats["oldest_due"] is not None:
+            stats["oldest_due_age"] = timezone.now() - stats["oldest_due"]
+        extra_context = {**(extra_context or {}), "queue_stats": stats}
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_after=timezone.now()
+        )
+        self.message_user(request, f"Queued {count} jobs again.")
+
+    retry.short_description = "Retry selected jobs"
@@ -0,0 +1,58 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ssp.jobs.queue import claim, requeue_stale, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs. Start several workers to process jobs "
+        "in parallel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--burst", action="store_true", help="Exit once the queue is empty."
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls of an empty queue.",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=60,
+            help=(
+                "Seconds after which a running job that no worker holds is "
+                "assumed lost and queued again."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        stale_after = timedelta(seconds=options["stale_after"])
+        count = 0
+        while not self.stopping:
+            close_old_connections()
+            requeue_stale(stale_after)
+            job = claim()
+            if job is None:
+                if options["burst"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+            status = run(job)
+            count += 1
+            self.stdout.write(f"{job.task} #{job.pk}: {status}")
+        self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs."))
+
+    def stop(self, signum, frame):
+        # Finish the current job before exiting.
+        self.stopping = True
@@ -0,0 +1,67 @@
+# Generated by Django 3.1.2 on 2026-10-18 22:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task", models.CharField(max_length=255)),
+                ("kwargs", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("max_attempts", models.PositiveSmallIntegerField(default=3)),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now)),
+                ("created_on", models.DateTimeField(auto_now_add=True)),
+                ("started_on", models.DateTimeField(blank=True, null=True)),
+                ("finished_on", models.DateTimeField(blank=True, null=True)),
+                ("error", models.TextField(blank=True)),
+            ],
+            options={
+                "ordering": ["-created_on"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(status="queued"),
+                fields=["run_after", "id"],
+                name="jobs_job_queued",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["status", "finished_on"], name="jobs_job_status"
+            ),
+        ),
+    ]
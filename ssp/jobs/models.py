@@ -0,0 +1,52 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+    task = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_on = models.DateTimeField(auto_now_add=True)
+    started_on = models.DateTimeField(blank=True, null=True)
+    finished_on = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
+
+    @property
+    def wait(self):
+        if self.started_on is not None:
+            return self.started_on - self.created_on
+        return None
+
+    @property
+    def duration(self):
+        if self.started_on is not None and self.finished_on is not None:
+            return self.finished_on - self.started_on
+        return None
+
+    class Meta:
+        ordering = ["-created_on"]
+        indexes = [
+            # Workers only ever look for due jobs in the queued slice.
+            models.Index(
+                fields=["run_after", "id"],
+                name="jobs_job_queued",
+                condition=models.Q(status="queued"),
+            ),
+            models.Index(fields=["status", "finished_on"], name="jobs_job_status"),
+        ]
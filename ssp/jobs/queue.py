@@ -0,0 +1,148 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Min, Q
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = timedelta(seconds=30)
+STATS_WINDOW = timedelta(hours=1)
+
+# Sent with the job once it has used all its attempts, so whatever it was
+# working on can be left in a usable state.
+job_failed = Signal()
+
+
+def task_name(task):
+    if isinstance(task, str):
+        return task
+    return f"{task.__module__}.{task.__qualname__}"
+
+
+def enqueue(task, max_attempts=3, run_after=None, **kwargs):
+    """Queue ``task``, a function or its dotted path, to run with ``kwargs``.
+
+    The job is inserted in the caller's transaction, so it only becomes
+    visible to workers once the work that queued it has committed.
+    """
+    return Job.objects.create(
+        task=task_name(task),
+        kwargs=kwargs,
+        max_attempts=max_attempts,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def claim():
+    """Mark the next due job as running and return it, or None.
+
+    ``SKIP LOCKED`` lets any number of workers poll the queue without
+    blocking on, or double-claiming, each other's jobs.
+    """
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_after__lte=timezone.now())
+            .order_by("run_after", "pk")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.started_on = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=["status", "started_on", "attempts"])
+    return job
+
+
+def run(job):
+    """Run a claimed job, retrying it later with a backoff when it fails.
+
+    The job's row stays locked while the task runs, which is the worker's
+    lease on it: the lock goes away with the worker's connection.
+    """
+    try:
+        with transaction.atomic():
+            Job.objects.select_for_update().get(pk=job.pk)
+            import_string(job.task)(**job.kwargs)
+    except Exception:
+        logger.exception("Job %s failed: %s", job.pk, job.task)
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+        else:
+            job.status = Job.FAILED
+    else:
+        job.status = Job.DONE
+        job.error = ""
+    job.finished_on = timezone.now()
+    job.save(update_fields=["status", "error", "run_after", "finished_on"])
+    if job.status == Job.FAILED:
+        job_failed.send(sender=Job, job=job)
+    return job.status
+
+
+def work(limit=None):
+    """Run due jobs until the queue is empty or ``limit`` jobs have run."""
+    count = 0
+    while limit is None or count < limit:
+        job = claim()
+        if job is None:
+            break
+        run(job)
+        count += 1
+    return count
+
+
+def requeue_stale(timeout):
+    """Queue jobs again whose worker died while running them.
+
+    Jobs still locked by a live worker are skipped however long they run,
+    ``timeout`` only covers the moment between claiming a job and running
+    it. Jobs that have used all their attempts are marked failed instead,
+    so a job that kills its worker is not retried forever.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        stale = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.RUNNING, started_on__lt=now - timeout)
+            .values_list("pk", "attempts", "max_attempts")
+        )
+        exhausted = [
+            pk for pk, attempts, max_attempts in stale if attempts >= max_attempts
+        ]
+        Job.objects.filter(pk__in=exhausted).update(
+            status=Job.FAILED,
+            finished_on=now,
+            error="The worker stopped while running the job.",
+        )
+        for job in Job.objects.filter(pk__in=exhausted):
+            job_failed.send(sender=Job, job=job)
+        return Job.objects.filter(
+            pk__in=[pk for pk, *_ in stale if pk not in exhausted]
+        ).update(status=Job.QUEUED, run_after=now)
+
+
+def queue_stats():
+    """Queue depth and the wait and run times of recently finished jobs."""
+    now = timezone.now()
+    recent = Q(finished_on__gte=now - STATS_WINDOW)
+    return Job.objects.aggregate(
+        queued=Count("pk", filter=Q(status=Job.QUEUED)),
+        due=Count("pk", filter=Q(status=Job.QUEUED, run_after__lte=now)),
+        running=Count("pk", filter=Q(status=Job.RUNNING)),
+        failed=Count("pk", filter=Q(status=Job.FAILED)),
+        oldest_due=Min("run_after", filter=Q(status=Job.QUEUED, run_after__lte=now)),
+        finished=Count("pk", filter=recent & Q(status=Job.DONE)),
+        wait=Avg(F("started_on") - F("created_on"), filter=recent),
+        duration=Avg(F("finished_on") - F("started_on"), filter=recent),
+    )
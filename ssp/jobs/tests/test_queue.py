@@ -0,0 +1,181 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from ssp.jobs.models import Job
+from ssp.jobs.queue import (
+    claim,
+    enqueue,
+    job_failed,
+    queue_stats,
+    requeue_stale,
+    run,
+    work,
+)
+from ssp.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+calls = []
+
+
+def record(value):
+    calls.append(value)
+
+
+def fail():
+    raise ValueError("broken")
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.fixture
+def failed_jobs():
+    failed = []
+
+    def receiver(sender, job, **kwargs):
+        failed.append(job.pk)
+
+    job_failed.connect(receiver)
+    yield failed
+    job_failed.disconnect(receiver)
+
+
+def test_enqueue_and_work():
+    job = enqueue(record, value=1)
+    enqueue("ssp.jobs.tests.test_queue.record", value=2)
+    enqueue(record, value=3, run_after=timezone.now() + timedelta(hours=1))
+
+    assert job.task == "ssp.jobs.tests.test_queue.record"
+    assert work() == 2
+    assert calls == [1, 2]
+    job.refresh_from_db()
+    assert job.status == Job.DONE
+    assert job.attempts == 1
+    assert job.wait is not None and job.duration is not None
+
+
+def test_claim_skips_claimed_jobs():
+    first, second = enqueue(record, value=1), enqueue(record, value=2)
+
+    assert claim().pk == first.pk
+    assert claim().pk == second.pk
+    assert claim() is None
+    assert Job.objects.filter(status=Job.RUNNING).count() == 2
+
+
+def test_retry_then_fail(failed_jobs):
+    job = enqueue(fail, max_attempts=2)
+
+    assert run(claim()) == Job.QUEUED
+    assert failed_jobs == []
+    job.refresh_from_db()
+    assert "ValueError: broken" in job.error
+    assert job.run_after > timezone.now()
+    assert claim() is None
+
+    Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+    assert run(claim()) == Job.FAILED
+    assert Job.objects.get(pk=job.pk).attempts == 2
+    assert failed_jobs == [job.pk]
+
+
+def test_requeue_stale():
+    job = enqueue(record, value=1)
+    claim()
+    assert requeue_stale(timedelta(minutes=10)) == 0
+
+    Job.objects.filter(pk=job.pk).update(
+        started_on=timezone.now() - timedelta(minutes=11)
+    )
+    assert requeue_stale(timedelta(minutes=10)) == 1
+    assert work() == 1
+    assert calls == [1]
+
+
+def test_requeue_stale_exhausted(failed_jobs):
+    job = enqueue(record, value=1, max_attempts=1)
+    claim()
+    Job.objects.filter(pk=job.pk).update(
+        started_on=timezone.now() - timedelta(minutes=11)
+    )
+
+    assert requeue_stale(timedelta(minutes=10)) == 0
+    job.refresh_from_db()
+    assert job.status == Job.FAILED
+    assert "worker stopped" in job.error
+    assert failed_jobs == [job.pk]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_requeue_stale_skips_running_jobs():
+    job = enqueue(record, value=1)
+    claim()
+    Job.objects.filter(pk=job.pk).update(
+        started_on=timezone.now() - timedelta(minutes=11)
+    )
+    locked, release = threading.Event(), threading.Event()
+
+    def worker():
+        # Holds the job's row lock like run() does while the task runs.
+        with transaction.atomic():
+            Job.objects.select_for_update().get(pk=job.pk)
+            locked.set()
+            release.wait(5)
+        connection.close()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    try:
+        locked.wait(5)
+        assert requeue_stale(timedelta(minutes=10)) == 0
+    finally:
+        release.set()
+        thread.join()
+    assert requeue_stale(timedelta(minutes=10)) == 1
+
+
+def test_queue_stats():
+    enqueue(record, value=1)
+    enqueue(record, value=2)
+    enqueue(fail, max_attempts=1)
+    work(limit=1)
+    enqueue(record, value=3, run_after=timezone.now() + timedelta(hours=1))
+
+    stats = queue_stats()
+    assert stats["queued"] == 3
+    assert stats["due"] == 2
+    assert stats["finished"] == 1
+    assert stats["wait"] is not None
+    assert stats["oldest_due"] is not None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_jobs_command():
+    enqueue(record, value=1)
+    enqueue(fail, max_attempts=1)
+
+    call_command("run_jobs", "--burst")
+
+    assert calls == [1]
+    assert Job.objects.filter(status=Job.FAILED).count() == 1
+
+
+def test_admin_changelist(client):
+    u = UserFactory(is_staff=True, is_superuser=True)
+    client.force_login(u)
+    enqueue(record, value=1)
+
+    response = client.get(reverse("admin:jobs_job_changelist"))
+
+    assert response.status_code == 200
+    assert response.context["queue_stats"]["queued"] == 1
+    assert "Average wait" in response.content.decode()
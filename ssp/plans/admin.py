@@ -1,5 +1,7 @@
-from django.contrib import admin
-from .models import Plan, Entry, Detail, Approval
+from django.contrib import admin, messages
+from django.http import HttpResponseRedirect
+
+from .models import Plan, Entry, Detail, Approval, OpenDetailConflict
 
 
 @admin.register(Plan)
@@ -14,7 +16,12 @@ class EntryAdmin(admin.ModelAdmin):
 
 @admin.register(Detail)
 class DetailAdmin(admin.ModelAdmin):
-    pass
+    def changeform_view(self, request, *args, **kwargs):
+        try:
+            return super().changeform_view(request, *args, **kwargs)
+        except OpenDetailConflict as e:
+            self.message_user(request, str(e), messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
 
 
 @admin.register(Approval)
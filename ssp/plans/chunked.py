@@ -0,0 +1,117 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.utils import timezone
+
+from .models import FileArtifact, UploadSession
+from .uploads import FileDigest
+
+BLOCK_SIZE = 64 * 1024
+
+
+class ChunkOutOfOrder(ValueError):
+    pass
+
+
+def _file_digest(path):
+    """Hash the assembled file in one sequential pass.
+
+    Each chunk is checked against its own hash as it is appended and the
+    whole file is hashed once when the upload completes, so no hash state
+    has to be kept between requests.
+    """
+    digest = FileDigest()
+    with open(path, "rb") as f:
+        while block := f.read(BLOCK_SIZE):
+            digest.update(block)
+    return digest
+
+
+def chunk_length(session, index):
+    """The number of bytes chunk ``index`` must have, only the last is short."""
+    return min(session.chunk_size, session.size - index * session.chunk_size)
+
+
+def append_chunk(session, index, stream, length, chunk_hash):
+    """Append chunk ``index`` read from ``stream`` to the partial file.
+
+    ``session`` must be locked by the caller. Returns False for a chunk
+    that was already received, raises ChunkOutOfOrder when earlier chunks
+    are missing and ValueError when the chunk is the wrong length or does
+    not match ``chunk_hash``, its hex SHA-256.
+    """
+    if index < session.next_chunk:
+        return False
+    if index > session.next_chunk or index >= session.chunk_count:
+        raise ChunkOutOfOrder(f"Expected chunk {session.next_chunk}.")
+    if length != chunk_length(session, index):
+        raise ValueError(f"Chunk {index} must be {chunk_length(session, index)} bytes.")
+
+    os.makedirs(os.path.dirname(session.partial_path), exist_ok=True)
+    with open(session.partial_path, "a+b") as f:
+        # Drop the tail of an append whose request failed after writing.
+        f.truncate(session.received)
+        chunk_sha256 = hashlib.sha256()
+        remaining = length
+        while remaining > 0:
+            block = stream.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            f.write(block)
+            chunk_sha256.update(block)
+            remaining -= len(block)
+        if remaining or chunk_sha256.hexdigest() != chunk_hash.lower():
+            f.truncate(session.received)
+            raise ValueError(f"Chunk {index} does not match its hash.")
+
+    session.received += length
+    session.save(update_fields=["received", "modified_on"])
+    return True
+
+
+class PartialUpload(File):
+    """The assembled partial file, moved into storage rather than copied."""
+
+    def __init__(self, path, name, digest):
+        super().__init__(open(path, "rb"), name)
+        self.path = path
+        self.digest = digest
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def finish_upload(session, file_hash=None):
+    """Turn a fully received session into a FileArtifact and delete it.
+
+    The file is hashed once, the same pass reads the head used to sniff
+    its type. ``file_hash`` is the client's SHA-256 of the whole file.
+    """
+    if session.received != session.size:
+        raise ChunkOutOfOrder(f"Expected chunk {session.next_chunk}.")
+
+    digest = _file_digest(session.partial_path)
+    if file_hash and digest.hexdigest() != file_hash.lower():
+        raise ValueError("The upload does not match its hash.")
+
+    upload = PartialUpload(session.partial_path, session.file_name, digest)
+    try:
+        artifact = FileArtifact.objects.create(
+            name=session.name,
+            plan=session.plan,
+            creator=session.creator,
+            upload=upload,
+        )
+    finally:
+        upload.close()
+    session.delete()
+    return artifact
+
+
+def expire_upload_sessions(max_age):
+    """Delete sessions, and their partial files, idle for ``max_age``."""
+    count, _ = UploadSession.objects.filter(
+        modified_on__lt=timezone.now() - max_age
+    ).delete()
+    return count
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+
+from ssp.controls.models import CATALOG_GENERATION_KEY, Control
+from ssp.utils.cache import get_generation
+
+from .inbox import inbox_details
+from .models import Detail, FileArtifact, dashboard_generation_key
+
+CACHE_TIMEOUT = 60 * 15
+
+
+def load_plan_dashboard(plan, user):
+    details = inbox_details(user).filter(plan=plan)
+
+    dashboard = {
+        "pending_approval": [],
+        "collaborating": [],
+        "observing": [],
+        "approved": [],
+    }
+    for detail in details:
+        if detail.status == Detail.PENDING_APPROVAL:
+            if detail.is_approver:
+                dashboard["pending_approval"].append(detail)
+                if detail.is_approved:
+                    dashboard["approved"].append(detail.pk)
+        else:
+            if detail.is_collaborator:
+                dashboard["collaborating"].append(detail)
+            if detail.is_observer:
+                dashboard["observing"].append(detail)
+    dashboard["pending_approval_count"] = len(dashboard["pending_approval"])
+
+    dashboard["control_list"] = list(
+        Control.objects.filter(
+            parent_id=plan.root_control_id, is_withdrawn=False
+        ).only("pk", "slug", "name", "tree_id", "lft", "rght", "level")
+    )
+    dashboard["artifact_list"] = list(
+        FileArtifact.objects.filter(plan=plan).only("pk", "name")
+    )
+    return dashboard
+
+
+def get_plan_dashboard(plan, user):
+    """Role-filtered plan overview for ``user``, cached per plan and user."""
+    cache_key = "plans:dashboard:{}:{}:{}:{}".format(
+        plan.pk,
+        get_generation(dashboard_generation_key(plan.pk)),
+        get_generation(CATALOG_GENERATION_KEY),
+        user.pk,
+    )
+    dashboard = cache.get(cache_key)
+    if dashboard is None:
+        dashboard = load_plan_dashboard(plan, user)
+        cache.set(cache_key, dashboard, CACHE_TIMEOUT)
+    return dashboard
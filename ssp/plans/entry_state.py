@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Case, CharField, IntegerField, Prefetch, Value, When
+from django.shortcuts import get_object_or_404
+
+from .models import Approval, Detail, Entry, FileArtifact, Plan
+
+ROLES = ("approvers", "collaborators", "observers")
+
+
+def prioritized_details(entry):
+    """Details of ``entry`` with the draft first, then pending approval."""
+    return (
+        Detail.objects.filter(entry=entry)
+        .annotate(
+            priority=Case(
+                When(status=Detail.DRAFT, then=Value(0)),
+                When(status=Detail.PENDING_APPROVAL, then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by("priority", "-modified_on")
+    )
+
+
+def current_detail(entry):
+    """Draft, else pending approval, else the latest published detail."""
+    return (
+        prioritized_details(entry)
+        .prefetch_related(
+            Prefetch(
+                "file_artifacts",
+                queryset=FileArtifact.objects.only("pk", "name"),
+                to_attr="artifact_list",
+            )
+        )
+        .first()
+    )
+
+
+def entry_people(entry):
+    """Users per role for ``entry`` from a single UNION query."""
+    User = get_user_model()
+    querysets = [
+        User.objects.filter(**{role_field: entry})
+        .annotate(role=Value(role, output_field=CharField()))
+        .order_by()
+        for role, role_field in (
+            ("approvers", "entry_approvals"),
+            ("collaborators", "entry_collaborations"),
+            ("observers", "entry_observations"),
+        )
+    ]
+    people = {role: [] for role in ROLES}
+    for user in querysets[0].union(*querysets[1:], all=True):
+        people[user.role].append(user)
+    for users in people.values():
+        users.sort(key=lambda u: (u.name, u.username))
+    return people
+
+
+def load_entry_state(plan_pk, control, user):
+    """Everything the entry page renders in a fixed number of queries.
+
+    One query each for the entry (with its plan), the current detail, its
+    artifacts, its approvals and the people on the entry.
+    """
+    entry = (
+        Entry.objects.select_related("plan")
+        .filter(plan_id=plan_pk, control=control)
+        .first()
+    )
+    if entry is None:
+        plan = get_object_or_404(Plan, pk=plan_pk)
+        entry = Entry.objects.create(plan=plan, control=control)
+    entry.control = control
+
+    detail = current_detail(entry)
+    people = entry_people(entry)
+    approval_list = list(
+        Approval.objects.select_related("user")
+        .filter(detail=detail)
+        .order_by("user__name")
+    )
+    approval_pk_list = [approval.user_id for approval in approval_list]
+    approver_pks = {approver.pk for approver in people["approvers"]}
+
+    if detail.status != Detail.PUBLISHED:
+        can_approve = user.pk in approver_pks
+        can_collaborate = any(u.pk == user.pk for u in people["collaborators"])
+        approval = next((a for a in approval_list if a.user_id == user.pk), None)
+    else:
+        can_approve = False
+        can_collaborate = False
+        approval = None
+
+    return {
+        "plan": entry.plan,
+        "control": control,
+        "entry": entry,
+        "detail": detail,
+        "can_approve": can_approve,
+        "can_collaborate": can_collaborate,
+        "approval": approval,
+        "approval_list": approval_list,
+        "approval_pk_list": approval_pk_list,
+        "approver_list": people["approvers"],
+        "collaborator_list": people["collaborators"],
+        "observer_list": people["observers"],
+        "artifact_list": detail.artifact_list,
+        "has_artifacts": bool(detail.artifact_list),
+    }
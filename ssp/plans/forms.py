@@ -1,10 +1,21 @@
+import os
+
 from django import forms
 
+from django.contrib.auth import get_user_model
+
 from ssp.controls.models import Control
-from .models import Plan
+from .models import Plan, UploadSession
+from .services import ADD, REMOVE, REPLACE
 
 
 class NewPlanForm(forms.ModelForm):
+    materialize_entries = forms.BooleanField(
+        initial=True,
+        required=False,
+        help_text="Create an entry for every control in the plan now.",
+    )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if "initial" in kwargs:
@@ -15,3 +26,59 @@ class NewPlanForm(forms.ModelForm):
     class Meta:
         model = Plan
         fields = ["title", "description", "root_control"]
+
+
+class BulkAssignForm(forms.Form):
+    OPERATION_CHOICES = [
+        (ADD, "Add to the existing people"),
+        (REMOVE, "Remove from the entries"),
+        (REPLACE, "Replace the existing people"),
+    ]
+
+    control = forms.ModelChoiceField(
+        queryset=Control.objects.none(),
+        to_field_name="slug",
+        help_text="Every entry in this control's subtree is updated.",
+    )
+    operation = forms.ChoiceField(choices=OPERATION_CHOICES, initial=ADD)
+    approvers = forms.ModelMultipleChoiceField(
+        queryset=get_user_model().objects.all(), required=False
+    )
+    collaborators = forms.ModelMultipleChoiceField(
+        queryset=get_user_model().objects.all(), required=False
+    )
+    observers = forms.ModelMultipleChoiceField(
+        queryset=get_user_model().objects.all(), required=False
+    )
+
+    def __init__(self, *args, plan, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["control"].queryset = Control.objects.filter(
+            tree_id=plan.root_control.tree_id, is_withdrawn=False
+        )
+
+    def people(self):
+        """Roles with users selected, the others are left untouched."""
+        return {
+            role: self.cleaned_data[role]
+            for role in ("approvers", "collaborators", "observers")
+            if self.cleaned_data[role]
+        }
+
+
+class UploadSessionForm(forms.ModelForm):
+    class Meta:
+        model = UploadSession
+        fields = ["name", "file_name", "size"]
+
+    def clean_file_name(self):
+        file_name = os.path.basename(self.cleaned_data["file_name"])
+        if not file_name:
+            raise forms.ValidationError("Enter a file name.")
+        return file_name
+
+    def clean_size(self):
+        size = self.cleaned_data["size"]
+        if size == 0:
+            raise forms.ValidationError("Cannot upload an empty file.")
+        return size
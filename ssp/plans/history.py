@@ -0,0 +1,66 @@
+import difflib
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Detail
+
+CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def previous_detail(detail):
+    return (
+        Detail.objects.filter(entry_id=detail.entry_id)
+        .filter(
+            Q(created_on__lt=detail.created_on)
+            | Q(created_on=detail.created_on, pk__lt=detail.pk)
+        )
+        .order_by("-created_on", "-pk")
+        .only("pk", "text", "modified_on")
+        .first()
+    )
+
+
+def diff_cache_key(previous, detail):
+    # Drafts are edited in place, so the timestamps keep stale diffs out.
+    return "plans:diff:{}:{}:{}:{}".format(
+        previous.pk if previous else "",
+        detail.pk,
+        previous.modified_on.timestamp() if previous else "",
+        detail.modified_on.timestamp(),
+    )
+
+
+def render_diff(old_text, new_text):
+    lines = []
+    for line in difflib.unified_diff(
+        (old_text or "").splitlines(),
+        (new_text or "").splitlines(),
+        lineterm="",
+        n=2,
+    ):
+        if line.startswith(("---", "+++")):
+            continue
+        if line.startswith("@@"):
+            css = "text-muted"
+        elif line.startswith("+"):
+            css = "text-success"
+        elif line.startswith("-"):
+            css = "text-danger"
+        else:
+            css = ""
+        lines.append(f'<span class="{css}">{escape(line)}</span>')
+    return "\n".join(lines)
+
+
+def detail_diff(detail):
+    """Diff of ``detail`` against the version before it, computed once."""
+    previous = previous_detail(detail)
+    key = diff_cache_key(previous, detail)
+    diff = cache.get(key)
+    if diff is None:
+        diff = render_diff(previous.text if previous else "", detail.text)
+        cache.set(key, diff, CACHE_TIMEOUT)
+    return previous, mark_safe(diff)
@@ -0,0 +1,79 @@
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .models import Approval, Detail, Entry
+
+APPROVER = "approver"
+COLLABORATOR = "collaborator"
+OBSERVER = "observer"
+ROLES = (APPROVER, COLLABORATOR, OBSERVER)
+STATUSES = (Detail.DRAFT, Detail.PENDING_APPROVAL)
+
+
+ROLE_THROUGH = {
+    APPROVER: Entry.approvers.through,
+    COLLABORATOR: Entry.collaborators.through,
+    OBSERVER: Entry.observers.through,
+}
+
+
+def inbox_details(user, role=None, status=None):
+    """Open details on entries where ``user`` has a role, across all plans.
+
+    The user's rows in the role tables pick the entries, and only their
+    draft and pending approval details are read, so the query never
+    scans the open details of other users.
+    """
+    roles = [role] if role in ROLES else ROLES
+    entries = [
+        ROLE_THROUGH[r].objects.filter(user_id=user.pk).values("entry_id")
+        for r in roles
+    ]
+    details = Detail.objects.filter(
+        entry_id__in=entries[0].union(*entries[1:]),
+        status__in=[status] if status in STATUSES else STATUSES,
+    ).annotate(
+        **{
+            f"is_{r}": Exists(
+                through.objects.filter(entry_id=OuterRef("entry_id"), user_id=user.pk)
+            )
+            for r, through in ROLE_THROUGH.items()
+        },
+        is_approved=Exists(
+            Approval.objects.filter(detail_id=OuterRef("pk"), user_id=user.pk)
+        ),
+    )
+    return details.select_related("plan", "entry__control").only(
+        "pk",
+        "status",
+        "modified_on",
+        "is_ready",
+        "plan__title",
+        "entry",
+        "entry__control__slug",
+        "entry__control__name",
+    )
+
+
+def inbox_counts(user):
+    """Counts per role and status with a single aggregate query."""
+    details = inbox_details(user)
+    counts = {}
+    for role in ROLES:
+        for status in STATUSES:
+            counts[f"{role}_{status}"] = Count(
+                "pk", filter=Q(status=status, **{f"is_{role}": True})
+            )
+    counts["awaiting_approval"] = Count(
+        "pk",
+        filter=Q(status=Detail.PENDING_APPROVAL, is_approver=True, is_approved=False),
+    )
+    counts["total"] = Count("pk")
+    totals = details.order_by().aggregate(**counts)
+    return {
+        "total": totals.pop("total"),
+        "awaiting_approval": totals.pop("awaiting_approval"),
+        "roles": {
+            role: {status: totals[f"{role}_{status}"] for status in STATUSES}
+            for role in ROLES
+        },
+    }
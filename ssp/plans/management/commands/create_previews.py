@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from ssp.jobs.queue import enqueue
+from ssp.plans.models import ArtifactBlob
+from ssp.plans.previews import PREVIEW_TYPES
+from ssp.plans.tasks import create_previews
+
+
+class Command(BaseCommand):
+    help = "Queue preview rendering for stored images that have none yet."
+
+    def handle(self, *args, **options):
+        blob_pks = (
+            ArtifactBlob.objects.filter(
+                has_previews=False, fileartifact__mime_type__in=PREVIEW_TYPES
+            )
+            .values_list("pk", flat=True)
+            .distinct()
+        )
+        count = 0
+        for blob_pk in blob_pks.iterator():
+            enqueue(create_previews, blob_pk=blob_pk)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued previews for {count} files."))
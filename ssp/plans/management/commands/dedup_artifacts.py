@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from ssp.plans.services import dedup_artifacts
+
+
+class Command(BaseCommand):
+    help = "Move artifact uploads into the content-addressed blob store."
+
+    def handle(self, *args, **options):
+        summary = dedup_artifacts()
+        if summary["missing"]:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"Skipped {summary['missing']} artifacts with missing files."
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Moved {summary['artifacts']} artifacts, "
+                f"removed {summary['removed']} duplicate files."
+            )
+        )
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from ssp.plans.chunked import expire_upload_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete resumable uploads that have been idle, and their partial files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours", type=int, default=24, help="Idle time before expiring."
+        )
+
+    def handle(self, *args, **options):
+        count = expire_upload_sessions(timedelta(hours=options["hours"]))
+        self.stdout.write(self.style.SUCCESS(f"Expired {count} upload sessions."))
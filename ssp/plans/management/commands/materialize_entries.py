@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ssp.plans.models import Plan
+from ssp.plans.services import materialize_entries
+
+
+class Command(BaseCommand):
+    help = "Create the entries and initial details for every control in plans."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "plans", nargs="*", type=int, help="Plan ids, defaults to all plans."
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        plans = Plan.objects.order_by("pk")
+        if options["plans"]:
+            plans = plans.filter(pk__in=options["plans"])
+            missing = set(options["plans"]) - set(plans.values_list("pk", flat=True))
+            if missing:
+                raise CommandError(
+                    "Unknown plans: " + ", ".join(str(pk) for pk in sorted(missing))
+                )
+        start = time.monotonic()
+        count = 0
+        for plan in plans:
+            count += materialize_entries(plan, batch_size=options["batch_size"])
+        elapsed = time.monotonic() - start
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {count} entries in {elapsed:.2f}s.")
+        )
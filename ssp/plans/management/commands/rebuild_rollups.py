@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from ssp.plans.models import Plan, PlanRollup
+
+
+class Command(BaseCommand):
+    help = "Recompute the compliance rollup counters for plans."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "plans", nargs="*", type=int, help="Plan ids, defaults to all plans."
+        )
+
+    def handle(self, *args, **options):
+        plans = Plan.objects.select_related("root_control")
+        if options["plans"]:
+            plans = plans.filter(pk__in=options["plans"])
+        count = 0
+        for plan in plans:
+            PlanRollup.objects.rebuild(plan)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups for {count} plans."))
@@ -0,0 +1,38 @@
+# Generated by Django 3.1.2 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+from ssp.utils.markdown import refresh_markdown
+
+
+def render_text_html(apps, schema_editor):
+    Detail = apps.get_model("plans", "Detail")
+    batch = []
+    for obj in Detail.objects.iterator():
+        refresh_markdown(obj, "text")
+        batch.append(obj)
+        if len(batch) >= 500:
+            Detail.objects.bulk_update(batch, ["text_html", "text_html_key"])
+            batch = []
+    Detail.objects.bulk_update(batch, ["text_html", "text_html_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0009_auto_20201021_2232'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detail',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='detail',
+            name='text_html_key',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(render_text_html, migrations.RunPython.noop),
+    ]
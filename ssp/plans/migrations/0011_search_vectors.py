@@ -0,0 +1,42 @@
+# Generated by Django 3.1.2 on 2026-10-18 20:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vectors(apps, schema_editor):
+    Detail = apps.get_model("plans", "Detail")
+    FileArtifact = apps.get_model("plans", "FileArtifact")
+    Detail.objects.update(search_vector=SearchVector("text", config="english"))
+    FileArtifact.objects.update(search_vector=SearchVector("name", config="english"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0010_detail_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detail',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='fileartifact',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='plans_detai_search__ca974f_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='fileartifact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='plans_filea_search__775de1_gin'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
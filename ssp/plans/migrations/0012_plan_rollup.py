@@ -0,0 +1,37 @@
+# Generated by Django 3.1.2 on 2026-10-18 20:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('controls', '0004_control_is_withdrawn'),
+        ('plans', '0011_search_vectors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='rollup_state',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.CreateModel(
+            name='PlanRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('control_count', models.PositiveIntegerField(default=0)),
+                ('draft', models.IntegerField(default=0)),
+                ('pending_approval', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('published', models.IntegerField(default=0)),
+                ('family', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='controls.control')),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='plans.plan')),
+            ],
+            options={
+                'ordering': ['family__tree_id', 'family__lft'],
+                'unique_together': {('plan', 'family')},
+            },
+        ),
+    ]
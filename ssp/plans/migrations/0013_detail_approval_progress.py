@@ -0,0 +1,77 @@
+# Generated by Django 3.1.2 on 2026-10-18 20:27
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+
+def populate_approval_progress(apps, schema_editor):
+    Approval = apps.get_model("plans", "Approval")
+    Detail = apps.get_model("plans", "Detail")
+    Entry = apps.get_model("plans", "Entry")
+    approvers = Entry.approvers.through.objects.filter(entry_id=OuterRef("entry_id"))
+    details = Detail.objects.exclude(status="P")
+    details.update(
+        required_approvals=Coalesce(
+            Subquery(
+                approvers.order_by()
+                .values("entry_id")
+                .annotate(n=Count("pk"))
+                .values("n"),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        ),
+        received_approvals=Coalesce(
+            Subquery(
+                Approval.objects.filter(
+                    detail_id=OuterRef("pk"),
+                    user_id__in=Entry.approvers.through.objects.filter(
+                        entry_id=OuterRef(OuterRef("entry_id"))
+                    ).values("user_id"),
+                )
+                .order_by()
+                .values("detail_id")
+                .annotate(n=Count("pk"))
+                .values("n"),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        ),
+    )
+    details.update(
+        is_ready=Case(
+            When(
+                status="PA",
+                required_approvals=F("received_approvals"),
+                then=Value(True),
+            ),
+            default=Value(False),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plans", "0012_plan_rollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="detail",
+            name="is_ready",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name="detail",
+            name="received_approvals",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="detail",
+            name="required_approvals",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_approval_progress, migrations.RunPython.noop),
+    ]
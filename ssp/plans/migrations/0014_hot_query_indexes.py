@@ -0,0 +1,44 @@
+# Generated by Django 3.1.2 on 2026-10-18 20:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking writes to the detail history.
+    atomic = False
+
+    dependencies = [
+        ("plans", "0013_detail_approval_progress"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="approval",
+            index=models.Index(
+                fields=["plan", "user"], name="plans_approval_plan_user"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="detail",
+            index=models.Index(
+                fields=["entry", "status", "-modified_on"],
+                name="plans_detail_entry_status",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="detail",
+            index=models.Index(
+                fields=["plan", "status", "-modified_on"],
+                name="plans_detail_plan_status",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="detail",
+            index=models.Index(
+                condition=models.Q(status__in=["D", "PA"]),
+                fields=["-modified_on"],
+                name="plans_detail_open",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 3.1.2 on 2026-10-18 21:30
+
+from django.db import migrations, models
+from django.db.models import Count
+
+OPEN_STATUSES = ("D", "PA")
+
+
+def collapse_open_details(apps, schema_editor):
+    """Remove duplicate open details left by concurrent requests.
+
+    Extra details with the same text as the entry's latest one are exact
+    duplicates and are deleted. Diverging ones need a person to decide, so
+    the migration stops and names their entries.
+    """
+    Detail = apps.get_model("plans", "Detail")
+    conflicts = []
+    for status in OPEN_STATUSES:
+        entry_pks = (
+            Detail.objects.filter(status=status)
+            .order_by()
+            .values("entry")
+            .annotate(count=Count("pk"))
+            .filter(count__gt=1)
+            .values_list("entry", flat=True)
+        )
+        for entry_pk in entry_pks:
+            kept, *extra = Detail.objects.filter(
+                entry=entry_pk, status=status
+            ).order_by("-modified_on", "-pk")
+            if any(detail.text != kept.text for detail in extra):
+                conflicts.append(entry_pk)
+                continue
+            Detail.objects.filter(pk__in=[detail.pk for detail in extra]).delete()
+    if conflicts:
+        raise RuntimeError(
+            "Entries {} have more than one draft or pending detail with "
+            "different text. Publish or delete the extra details and run "
+            "the migration again.".format(", ".join(map(str, sorted(conflicts))))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plans", "0014_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_open_details, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="detail",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(status="D"),
+                fields=("entry",),
+                name="plans_detail_single_draft",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="detail",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(status="PA"),
+                fields=("entry",),
+                name="plans_detail_single_pending",
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.1.2 on 2026-10-18 22:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plans", "0015_detail_single_open"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArtifactBlob",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file_hash", models.CharField(max_length=64, unique=True)),
+                ("size", models.PositiveBigIntegerField(default=0)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_on", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="fileartifact",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="plans.artifactblob",
+            ),
+        ),
+    ]
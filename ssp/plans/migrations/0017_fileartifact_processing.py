@@ -0,0 +1,43 @@
+# Generated by Django 3.1.2 on 2026-10-18 22:40
+
+import os
+import re
+
+from django.db import migrations, models
+
+RE_TIMESTAMP_PREFIX = re.compile(r"^\d{14}-")
+
+
+def backfill_file_name(apps, schema_editor):
+    FileArtifact = apps.get_model("plans", "FileArtifact")
+    artifacts = list(FileArtifact.objects.filter(file_name="").only("pk", "upload"))
+    for artifact in artifacts:
+        name = os.path.basename(artifact.upload.name)
+        artifact.file_name = RE_TIMESTAMP_PREFIX.sub("", name)
+    FileArtifact.objects.bulk_update(artifacts, ["file_name"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plans", "0016_artifact_blob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fileartifact",
+            name="file_name",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="fileartifact",
+            name="status",
+            field=models.CharField(
+                choices=[("processing", "Processing"), ("ready", "Ready")],
+                default="ready",
+                editable=False,
+                max_length=10,
+            ),
+        ),
+        migrations.RunPython(backfill_file_name, migrations.RunPython.noop),
+    ]
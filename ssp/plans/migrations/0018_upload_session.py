@@ -0,0 +1,56 @@
+# Generated by Django 3.1.2 on 2026-10-18 14:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("plans", "0017_fileartifact_processing"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="fileartifact",
+            name="size",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("file_name", models.CharField(max_length=255)),
+                ("size", models.PositiveBigIntegerField()),
+                ("chunk_size", models.PositiveIntegerField()),
+                ("received", models.PositiveBigIntegerField(default=0)),
+                ("created_on", models.DateTimeField(auto_now_add=True)),
+                ("modified_on", models.DateTimeField(auto_now=True)),
+                (
+                    "creator",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "plan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="plans.plan"
+                    ),
+                ),
+            ],
+        ),
+    ]
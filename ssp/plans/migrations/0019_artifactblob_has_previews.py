@@ -0,0 +1,18 @@
+# Generated by Django 3.1.2 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plans", "0018_upload_session"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artifactblob",
+            name="has_previews",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.2 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plans", "0019_artifactblob_has_previews"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="hash_state",
+            field=models.BinaryField(default=b""),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 3.1.2 on 2026-10-18 21:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import ssp.utils.models
+
+# Foreign keys whose single column index leads a composite index.
+FOREIGN_KEYS = [
+    ("approval", "plan"),
+    ("approval", "user"),
+    ("detail", "entry"),
+    ("detail", "plan"),
+]
+
+
+def drop_foreign_key_indexes(apps, schema_editor):
+    # AlterField would also drop the partial unique indexes on detail.entry,
+    # so only plain indexes on exactly the foreign key column are dropped.
+    introspection = schema_editor.connection.introspection
+    for model_name, field_name in FOREIGN_KEYS:
+        model = apps.get_model("plans", model_name)
+        column = model._meta.get_field(field_name).column
+        with schema_editor.connection.cursor() as cursor:
+            constraints = introspection.get_constraints(cursor, model._meta.db_table)
+        for name, constraint in constraints.items():
+            if (
+                constraint["index"]
+                and not constraint["unique"]
+                and constraint["columns"] == [column]
+            ):
+                schema_editor.execute(
+                    schema_editor.sql_delete_index_concurrently
+                    % {"name": schema_editor.quote_name(name)}
+                )
+
+
+def create_foreign_key_indexes(apps, schema_editor):
+    for model_name, field_name in FOREIGN_KEYS:
+        model = apps.get_model("plans", model_name)
+        schema_editor.execute(
+            schema_editor._create_index_sql(
+                model, [model._meta.get_field(field_name)], concurrently=True
+            )
+        )
+
+
+class Migration(migrations.Migration):
+    # Drop the indexes without blocking writes to the detail history.
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("plans", "0020_uploadsession_hash_state"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(
+                    drop_foreign_key_indexes, create_foreign_key_indexes
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="approval",
+                    name="plan",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="plans.plan",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="approval",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=models.SET(ssp.utils.models.get_sentinel_user),
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="detail",
+                    name="entry",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="plans.entry",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="detail",
+                    name="plan",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="plans.plan",
+                    ),
+                ),
+            ],
+        ),
+    ]
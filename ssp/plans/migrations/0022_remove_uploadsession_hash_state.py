@@ -0,0 +1,17 @@
+# Generated by Django 3.1.2 on 2026-10-18 22:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plans", "0021_drop_redundant_fk_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="uploadsession",
+            name="hash_state",
+        ),
+    ]
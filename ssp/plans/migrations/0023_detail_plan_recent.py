@@ -0,0 +1,22 @@
+# Generated by Django 3.1.2 on 2026-10-18 22:12
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without blocking writes to the detail history.
+    atomic = False
+
+    dependencies = [
+        ("plans", "0022_remove_uploadsession_hash_state"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="detail",
+            index=models.Index(
+                fields=["plan", "-modified_on"], name="plans_detail_plan_recent"
+            ),
+        ),
+    ]
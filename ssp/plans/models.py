@@ -1,18 +1,43 @@
-import hashlib
-import mimetypes
 import os
+import uuid
 from datetime import datetime, timezone
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models.signals import post_save, pre_save
+from django.db import IntegrityError, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.urls import reverse_lazy
 
 from ssp.controls.models import Control
+from ssp.jobs.queue import enqueue, job_failed
+from ssp.utils.cache import bump_generation
+from ssp.utils.markdown import refresh_markdown, rendered_markdown
 from ssp.utils.models import get_sentinel_user
 
+from .previews import RENDITIONS
+from .uploads import uploaded_file_digest
+
+
+def dashboard_generation_key(plan_pk):
+    return f"plans:dashboard:{plan_pk}:generation"
+
+
+DETAIL_SEARCH_VECTOR = SearchVector("text", config="english")
+
 
 class Plan(models.Model):
     title = models.CharField(max_length=100, unique=True)
@@ -48,16 +73,56 @@ class ControlDemotionException(Exception):
     pass
 
 
+def blob_file_name(file_hash):
+    return f"artifacts/sha256/{file_hash[:2]}/{file_hash[2:4]}/{file_hash}"
+
+
+def rendition_file_name(file_hash, rendition):
+    return f"{blob_file_name(file_hash)}.{rendition}.jpg"
+
+
 def artifact_file_name(instance, filename):
+    if instance is not None and instance.file_hash:
+        return blob_file_name(instance.file_hash)
     date = datetime.now(timezone.utc)
     return "artifacts/" + date.strftime("%Y%m%d%H%M%S") + "-" + filename
 
 
+class ArtifactBlob(models.Model):
+    """A stored file shared by every artifact with the same content."""
+
+    file_hash = models.CharField(max_length=64, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    has_previews = models.BooleanField(default=False)
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.file_hash
+
+    @property
+    def file_name(self):
+        return blob_file_name(self.file_hash)
+
+    def rendition_name(self, rendition):
+        return rendition_file_name(self.file_hash, rendition)
+
+
 class FileArtifact(models.Model):
+    PROCESSING = "processing"
+    READY = "ready"
+    STATUS_CHOICES = [
+        (PROCESSING, "Processing"),
+        (READY, "Ready"),
+    ]
     name = models.CharField(max_length=255)
+    file_name = models.CharField(max_length=255, blank=True, editable=False)
     plan = models.ForeignKey(Plan, on_delete=models.CASCADE)
     upload = models.FileField(upload_to=artifact_file_name)
-    size = models.PositiveIntegerField(blank=True, null=True)
+    blob = models.ForeignKey(
+        ArtifactBlob, on_delete=models.PROTECT, blank=True, null=True, editable=False
+    )
+    size = models.PositiveBigIntegerField(blank=True, null=True)
     file_hash = models.SlugField(max_length=64, blank=True, null=True)
     mime_type = models.CharField(max_length=100, default="unkown")
     file_extension = models.CharField(max_length=25, default="unknown")
@@ -65,36 +130,157 @@ class FileArtifact(models.Model):
     creator = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.SET(get_sentinel_user),
     )
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=READY, editable=False
+    )
     created_on = models.DateTimeField(auto_now_add=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Written with the row, like Control and Detail.
+        self.search_vector = SearchVector(
+            Value(self.name, output_field=models.TextField()), config="english"
+        )
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ("name",)
+        indexes = [GinIndex(fields=["search_vector"])]
+
+
+@receiver(pre_save, sender=FileArtifact)
+def populate_file_meta_data(sender, instance, **kwargs):
+    # Uncommitted uploads are still the incoming file. Size and hash come
+    # from the digest taken while it streamed in, the rest is filled in by
+    # a background job once the file is stored.
+    if instance.upload and not instance.upload._committed:
+        digest = uploaded_file_digest(instance.upload.file)
+        instance.size = digest.size
+        instance.file_hash = digest.hexdigest()
+        instance.file_name = os.path.basename(instance.upload.name)
+        instance.status = FileArtifact.PROCESSING
+        # Handed to the processing job so it never reopens the file.
+        instance._upload_head = digest.head
 
 
 @receiver(post_save, sender=FileArtifact)
-def populate_file_meta_data(sender, instance, created, **kwargs):
-    if created:
-        instance.size = instance.upload.size
+def queue_file_artifact_processing(sender, instance, created, **kwargs):
+    if created and instance.status == FileArtifact.PROCESSING:
+        enqueue(
+            "ssp.plans.tasks.process_artifact",
+            artifact_pk=instance.pk,
+            head=getattr(instance, "_upload_head", b"").hex(),
+        )
+
+
+@receiver(job_failed)
+def release_failed_file_artifact(sender, job, **kwargs):
+    # The upload itself is stored, only its type is unknown, so it is
+    # offered as a plain download rather than left processing for good.
+    if job.task == "ssp.plans.tasks.process_artifact":
+        FileArtifact.objects.filter(
+            pk=job.kwargs["artifact_pk"], status=FileArtifact.PROCESSING
+        ).update(status=FileArtifact.READY)
+
+
+def retain_blob(file_hash, size, content=None):
+    """Take a reference on the blob for ``file_hash``, creating it if needed.
+
+    ``content`` is stored as the blob's file unless it already is. That
+    happens under the blob's row lock, so concurrent first uploads of the
+    same content write it once instead of leaving a suffixed copy.
+    """
+    with transaction.atomic():
+        blob, created = ArtifactBlob.objects.select_for_update().get_or_create(
+            file_hash=file_hash, defaults={"size": size}
+        )
+        ArtifactBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+        storage = FileArtifact.upload.field.storage
+        if content is not None and not storage.exists(blob.file_name):
+            storage.save(blob.file_name, content)
+    return blob
+
+
+def release_blob(blob_pk):
+    """Drop a reference, removing the blob and its file with the last one."""
+    with transaction.atomic():
+        blob = ArtifactBlob.objects.select_for_update().filter(pk=blob_pk).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            ArtifactBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") - 1)
+            return
+        blob.delete()
+
+    def delete_file():
+        # A new upload of the same content may have recreated the blob.
+        if not ArtifactBlob.objects.filter(file_hash=blob.file_hash).exists():
+            storage = FileArtifact.upload.field.storage
+            storage.delete(blob.file_name)
+            for rendition in RENDITIONS:
+                storage.delete(blob.rendition_name(rendition))
+
+    transaction.on_commit(delete_file)
+
+
+@receiver(pre_save, sender=FileArtifact)
+def store_artifact_blob(sender, instance, **kwargs):
+    # Runs after populate_file_meta_data. Content that is already stored
+    # is referenced instead of written again, the field never saves it.
+    if not instance.file_hash or instance.upload._committed:
+        return
+    previous_blob_pk = instance.blob_id
+    blob = retain_blob(instance.file_hash, instance.size or 0, instance.upload.file)
+    instance.upload.name = blob.file_name
+    instance.upload._committed = True
+    instance.blob = blob
+    if previous_blob_pk is not None:
+        release_blob(previous_blob_pk)
+
+
+@receiver(post_delete, sender=FileArtifact)
+def release_artifact_blob(sender, instance, **kwargs):
+    if instance.blob_id is not None:
+        release_blob(instance.blob_id)
+
+
+class UploadSession(models.Model):
+    """A resumable upload, assembled chunk by chunk into a FileArtifact."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    plan = models.ForeignKey(Plan, on_delete=models.CASCADE)
+    creator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    name = models.CharField(max_length=255)
+    file_name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    created_on = models.DateTimeField(auto_now_add=True)
+    modified_on = models.DateTimeField(auto_now=True)
 
-        m = hashlib.sha256()
-        with instance.upload.open("rb"):
-            for chunk in instance.upload.chunks():
-                m.update(chunk)
-        instance.file_hash = m.hexdigest()
+    @property
+    def next_chunk(self):
+        return self.received // self.chunk_size
 
-        file_path = os.path.join(settings.MEDIA_ROOT, instance.upload.name)
-        mime_type, file_encoding = mimetypes.guess_type(file_path)
-        if mime_type is not None:
-            instance.mime_type = mime_type
-        if file_encoding is not None:
-            instance.file_encoding = file_encoding
-        if (file_extension := mimetypes.guess_extension(mime_type)) is not None:
-            instance.file_extension = file_extension[1:]
+    @property
+    def chunk_count(self):
+        return -(-self.size // self.chunk_size)
 
-        instance.save()
+    @property
+    def partial_path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{self.pk}.part")
+
+
+@receiver(post_delete, sender=UploadSession)
+def remove_partial_upload(sender, instance, **kwargs):
+    # A finished upload's file has normally been moved into storage already.
+    try:
+        os.remove(instance.partial_path)
+    except FileNotFoundError:
+        pass
 
 
 class Entry(models.Model):
@@ -109,6 +295,7 @@ class Entry(models.Model):
     observers = models.ManyToManyField(
         settings.AUTH_USER_MODEL, related_name="entry_observations"
     )
+    rollup_state = models.CharField(max_length=20, blank=True, editable=False)
 
     class Meta:
         verbose_name_plural = "entries"
@@ -120,6 +307,8 @@ class Entry(models.Model):
     def clean(self):
         if self.control.is_placeholder:
             raise ValidationError("Cannot create entry for placeholder controls.")
+        if self.control.is_withdrawn:
+            raise ValidationError("Cannot create entry for withdrawn controls.")
 
     def user_can_approve(self, user):
         return self.approvers.filter(pk=user.pk).exists()
@@ -128,6 +317,16 @@ class Entry(models.Model):
         return self.collaborators.filter(pk=user.pk).exists()
 
 
+class OpenDetailConflict(IntegrityError):
+    """A second draft or pending detail for an entry."""
+
+
+OPEN_DETAIL_ERRORS = {
+    "D": ("plans_detail_single_draft", "Cannot have multiple drafts."),
+    "PA": ("plans_detail_single_pending", "Cannot have multiple pending approval."),
+}
+
+
 class Detail(models.Model):
     DRAFT = "D"
     PENDING_APPROVAL = "PA"
@@ -141,11 +340,14 @@ class Detail(models.Model):
         (DRAFT, "Draft"),
         (PENDING_APPROVAL, "Pending Approval"),
     ]
-    entry = models.ForeignKey(Entry, on_delete=models.CASCADE)
+    # Both foreign keys lead the composite indexes in Meta.
+    entry = models.ForeignKey(Entry, on_delete=models.CASCADE, db_index=False)
     file_artifacts = models.ManyToManyField(FileArtifact, blank=True)
-    plan = models.ForeignKey(Plan, on_delete=models.CASCADE)
+    plan = models.ForeignKey(Plan, on_delete=models.CASCADE, db_index=False)
     status = models.CharField(max_length=3, choices=STATUS_CHOICES, default=DRAFT)
     text = models.TextField()
+    text_html = models.TextField(blank=True, editable=False)
+    text_html_key = models.CharField(max_length=64, blank=True, editable=False)
     approvals = models.ManyToManyField(settings.AUTH_USER_MODEL, through="Approval")
     created_on = models.DateTimeField(auto_now_add=True)
     modified_on = models.DateTimeField(auto_now=True)
@@ -153,13 +355,17 @@ class Detail(models.Model):
     last_status = models.CharField(max_length=3, choices=STATUS_CHOICES, default=DRAFT)
     last_text = models.TextField(null=True, blank=True)
     last_modified_on = models.DateTimeField(blank=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    required_approvals = models.PositiveIntegerField(default=0, editable=False)
+    received_approvals = models.PositiveIntegerField(default=0, editable=False)
+    is_ready = models.BooleanField(default=False, editable=False)
 
     def has_all_approvals(self):
-        needed_approval = set(self.entry.approvers.values_list("pk", flat=True))
-        existing_approvals = set(
-            self.approvals.values_list("approval__user__pk", flat=True)
-        )
-        return needed_approval == existing_approvals
+        return self.required_approvals == self.received_approvals
+
+    def rendered_text(self):
+        return rendered_markdown(self, "text")
 
     def clean(self):
         if self.pk:
@@ -173,19 +379,6 @@ class Detail(models.Model):
                                 "status": "Cannot be published without all required approvals."
                             }
                         )
-        else:
-            if (
-                self.status == self.DRAFT
-                and Detail.objects.filter(entry=self.entry, status=self.DRAFT).exists()
-            ):
-                raise ValidationError("Cannot have multiple drafts.")
-            if (
-                self.status == self.PENDING_APPROVAL
-                and Detail.objects.filter(
-                    entry=self.entry, status=self.PENDING_APPROVAL
-                ).exists()
-            ):
-                raise ValidationError("Cannot have multiple pending approval.")
         if self.file_artifacts:
             file_artifacts_pks = list(self.file_artifacts.values_list("pk", flat=True))
             if FileArtifact.objects.filter(
@@ -196,6 +389,8 @@ class Detail(models.Model):
                 )
 
     def save(self, *args, **kwargs):
+        created = self._state.adding
+        previous = (self.last_status, self.is_ready)
         modified = False
         if self.status != self.last_status or self.text != self.last_text:
             self.last_status = self.status
@@ -208,21 +403,108 @@ class Detail(models.Model):
         if modified:
             self.last_modified_on = datetime.now(timezone.utc)
 
-        super().save(*args, **kwargs)
+        refresh_markdown(self, "text")
+        if self.status != self.PUBLISHED:
+            # Published details keep the counts they were published with.
+            self.required_approvals, self.received_approvals = self.count_approvals()
+            self.is_ready = (
+                self.status == self.PENDING_APPROVAL
+                and self.required_approvals == self.received_approvals
+            )
+        self.search_vector = SearchVector(
+            Value(self.text, output_field=models.TextField()), config="english"
+        )
+        self.save_row(*args, **kwargs)
+
+        # Everything that follows a write, in order, instead of receivers.
+        if created or (self.status, self.is_ready) != previous:
+            PlanRollup.objects.record_entry(self.entry_id)
+        bump_generation(dashboard_generation_key(self.plan_id))
+
+    def save_row(self, *args, **kwargs):
+        if self.status not in OPEN_DETAIL_ERRORS:
+            super().save(*args, **kwargs)
+            return
+        # One draft and one pending detail per entry are enforced by partial
+        # unique constraints, the savepoint keeps the transaction usable.
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            name, message = OPEN_DETAIL_ERRORS[self.status]
+            if (
+                getattr(getattr(e.__cause__, "diag", None), "constraint_name", None)
+                == name
+            ):
+                raise OpenDetailConflict(message) from e
+            raise
+
+    def count_approvals(self):
+        """The entry's approvers and how many of them approved, in one query."""
+        counts = Entry.approvers.through.objects.filter(
+            entry_id=self.entry_id
+        ).aggregate(
+            required=Count("pk"),
+            received=Count(
+                "pk",
+                filter=Q(
+                    user_id__in=Approval.objects.filter(detail_id=self.pk).values(
+                        "user_id"
+                    )
+                ),
+            ),
+        )
+        return counts["required"], counts["received"]
 
     class Meta:
         ordering = [
             "-modified_on",
         ]
         get_latest_by = "modified_on"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["entry"],
+                condition=models.Q(status="D"),
+                name="plans_detail_single_draft",
+            ),
+            models.UniqueConstraint(
+                fields=["entry"],
+                condition=models.Q(status="PA"),
+                name="plans_detail_single_pending",
+            ),
+        ]
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            models.Index(
+                fields=["entry", "status", "-modified_on"],
+                name="plans_detail_entry_status",
+            ),
+            models.Index(
+                fields=["plan", "status", "-modified_on"],
+                name="plans_detail_plan_status",
+            ),
+            # The latest activity of each plan on the plan list.
+            models.Index(
+                fields=["plan", "-modified_on"], name="plans_detail_plan_recent",
+            ),
+            # Drafts and pending details are a small slice of the history.
+            models.Index(
+                fields=["-modified_on"],
+                name="plans_detail_open",
+                condition=models.Q(status__in=["D", "PA"]),
+            ),
+        ]
 
 
 class Approval(models.Model):
+    # The unique (user, detail) and (plan, user) indexes lead with these.
     user = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.SET(get_sentinel_user),
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET(get_sentinel_user),
+        db_index=False,
     )
     detail = models.ForeignKey(Detail, on_delete=models.CASCADE)
-    plan = models.ForeignKey(Plan, on_delete=models.CASCADE)
+    plan = models.ForeignKey(Plan, on_delete=models.CASCADE, db_index=False)
     created_on = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -230,6 +512,271 @@ class Approval(models.Model):
         ordering = [
             "created_on",
         ]
+        indexes = [
+            models.Index(fields=["plan", "user"], name="plans_approval_plan_user"),
+        ]
+
+
+def update_approval_progress(**filters):
+    """Recount approvals for the unpublished details matching ``filters``.
+
+    Only approvals from users who are currently approvers of the entry are
+    counted. Published details keep the counts they were published with.
+    """
+    approvers = Entry.approvers.through.objects.filter(entry_id=OuterRef("entry_id"))
+    details = Detail.objects.filter(**filters).exclude(status=Detail.PUBLISHED)
+    details.update(
+        required_approvals=Coalesce(
+            Subquery(
+                approvers.order_by()
+                .values("entry_id")
+                .annotate(n=Count("pk"))
+                .values("n"),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        ),
+        received_approvals=Coalesce(
+            Subquery(
+                Approval.objects.filter(
+                    detail_id=OuterRef("pk"),
+                    user_id__in=Entry.approvers.through.objects.filter(
+                        entry_id=OuterRef(OuterRef("entry_id"))
+                    ).values("user_id"),
+                )
+                .order_by()
+                .values("detail_id")
+                .annotate(n=Count("pk"))
+                .values("n"),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        ),
+    )
+    details.update(
+        is_ready=Case(
+            When(
+                status=Detail.PENDING_APPROVAL,
+                required_approvals=F("received_approvals"),
+                then=Value(True),
+            ),
+            default=Value(False),
+        )
+    )
+
+
+@receiver([post_save, post_delete], sender=Approval)
+def update_approval_approval_progress(sender, instance, **kwargs):
+    update_approval_progress(pk=instance.detail_id)
+
+
+@receiver(m2m_changed, sender=Entry.approvers.through)
+def update_approvers_approval_progress(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            update_approval_progress(entry_id=instance.pk)
+    elif action == "pre_clear":
+        instance._progress_cleared_entries = list(
+            sender.objects.filter(user_id=instance.pk).values_list(
+                "entry_id", flat=True
+            )
+        )
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if action == "post_clear":
+            pk_set = getattr(instance, "_progress_cleared_entries", ())
+        update_approval_progress(entry_id__in=pk_set)
+
+
+def rollup_family(control):
+    if control.level <= 1:
+        return control
+    return Control.objects.get(
+        tree_id=control.tree_id,
+        level=1,
+        lft__lte=control.lft,
+        rght__gte=control.rght,
+    )
+
+
+def entry_rollup_state(entry_pk):
+    states = set(
+        Detail.objects.filter(entry_id=entry_pk)
+        .values_list("status", "is_ready")
+        .distinct()
+    )
+    statuses = {status for status, is_ready in states}
+    if Detail.DRAFT in statuses:
+        return PlanRollup.DRAFT
+    if (Detail.PENDING_APPROVAL, True) in states:
+        return PlanRollup.APPROVED
+    if Detail.PENDING_APPROVAL in statuses:
+        return PlanRollup.PENDING_APPROVAL
+    if Detail.PUBLISHED in statuses:
+        return PlanRollup.PUBLISHED
+    return ""
+
+
+class PlanRollupManager(models.Manager):
+    def record_entry(self, entry_pk):
+        """Move the entry between state counters if its state changed."""
+        with transaction.atomic():
+            try:
+                entry = (
+                    Entry.objects.select_for_update(of=("self",))
+                    .select_related("control")
+                    .get(pk=entry_pk)
+                )
+            except Entry.DoesNotExist:
+                return
+            state = entry_rollup_state(entry_pk)
+            if state == entry.rollup_state:
+                return
+
+            family = rollup_family(entry.control)
+            rollups = self.filter(plan_id=entry.plan_id, family=family)
+            if state and not rollups.exists():
+                self.create(
+                    plan_id=entry.plan_id,
+                    family=family,
+                    control_count=family.get_descendants(include_self=True)
+                    .filter(is_placeholder=False, is_withdrawn=False)
+                    .count(),
+                )
+            changes = {}
+            if entry.rollup_state:
+                changes[entry.rollup_state] = F(entry.rollup_state) - 1
+            if state:
+                changes[state] = F(state) + 1
+            rollups.update(**changes)
+            Entry.objects.filter(pk=entry_pk).update(rollup_state=state)
+
+    def rebuild(self, plan):
+        with transaction.atomic():
+            self.filter(plan=plan).delete()
+            root = plan.root_control
+            families = {
+                c.pk: c
+                for c in Control.objects.filter(
+                    tree_id=root.tree_id, level=root.level + 1
+                )
+            }
+            rollups = {}
+            for family in families.values():
+                rollups[family.pk] = PlanRollup(
+                    plan=plan,
+                    family=family,
+                    control_count=Control.objects.filter(
+                        tree_id=family.tree_id,
+                        lft__gte=family.lft,
+                        rght__lte=family.rght,
+                        is_placeholder=False,
+                        is_withdrawn=False,
+                    ).count(),
+                )
+
+            entries = Entry.objects.filter(plan=plan).select_related("control")
+            states = {}
+            for entry in entries:
+                state = entry_rollup_state(entry.pk)
+                states.setdefault(state, []).append(entry.pk)
+                if not state:
+                    continue
+                control = entry.control
+                family = next(
+                    (
+                        f
+                        for f in families.values()
+                        if f.tree_id == control.tree_id
+                        and f.lft <= control.lft
+                        and f.rght >= control.rght
+                    ),
+                    None,
+                ) or rollup_family(control)
+                if family.pk not in rollups:
+                    rollups[family.pk] = PlanRollup(
+                        plan=plan,
+                        family=family,
+                        control_count=family.get_descendants(include_self=True)
+                        .filter(is_placeholder=False, is_withdrawn=False)
+                        .count(),
+                    )
+                rollup = rollups[family.pk]
+                setattr(rollup, state, getattr(rollup, state) + 1)
+
+            self.bulk_create(rollups.values())
+            for state, entry_pks in states.items():
+                Entry.objects.filter(pk__in=entry_pks).update(rollup_state=state)
+
+
+class PlanRollup(models.Model):
+    DRAFT = "draft"
+    PENDING_APPROVAL = "pending_approval"
+    APPROVED = "approved"
+    PUBLISHED = "published"
+
+    plan = models.ForeignKey(Plan, on_delete=models.CASCADE)
+    family = models.ForeignKey(Control, on_delete=models.CASCADE)
+    control_count = models.PositiveIntegerField(default=0)
+    draft = models.IntegerField(default=0)
+    pending_approval = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    published = models.IntegerField(default=0)
+
+    objects = PlanRollupManager()
+
+    class Meta:
+        unique_together = ["plan", "family"]
+        ordering = ["family__tree_id", "family__lft"]
+
+    @property
+    def entry_count(self):
+        return self.draft + self.pending_approval + self.approved + self.published
+
+    @property
+    def no_entry(self):
+        return max(self.control_count - self.entry_count, 0)
+
+
+@receiver(post_save, sender=Plan)
+def create_plan_rollups(sender, instance, created, **kwargs):
+    if created:
+        PlanRollup.objects.rebuild(instance)
+
+
+@receiver(post_delete, sender=Detail)
+def record_detail_rollup(sender, instance, **kwargs):
+    PlanRollup.objects.record_entry(instance.entry_id)
+
+
+@receiver([post_save, post_delete], sender=Approval)
+def record_approval_rollup(sender, instance, **kwargs):
+    entry_pk = (
+        Detail.objects.filter(pk=instance.detail_id)
+        .values_list("entry_id", flat=True)
+        .first()
+    )
+    if entry_pk is not None:
+        PlanRollup.objects.record_entry(entry_pk)
+
+
+@receiver(m2m_changed, sender=Entry.approvers.through)
+def record_approvers_rollup(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            PlanRollup.objects.record_entry(instance.pk)
+    elif action == "pre_clear":
+        instance._rollup_cleared_entries = list(
+            sender.objects.filter(user_id=instance.pk).values_list(
+                "entry_id", flat=True
+            )
+        )
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if action == "post_clear":
+            pk_set = getattr(instance, "_rollup_cleared_entries", ())
+        for entry_pk in pk_set:
+            PlanRollup.objects.record_entry(entry_pk)
 
 
 @receiver(post_save, sender=Entry)
@@ -241,3 +788,31 @@ def create_initial_detail_for_entry(sender, instance, created, **kwargs):
             status=Detail.PUBLISHED,
             text="entry created",
         )
+
+
+@receiver([post_save, post_delete], sender=Entry)
+@receiver(post_delete, sender=Detail)
+@receiver([post_save, post_delete], sender=Approval)
+@receiver([post_save, post_delete], sender=FileArtifact)
+def bump_dashboard_generation(sender, instance, **kwargs):
+    bump_generation(dashboard_generation_key(instance.plan_id))
+
+
+@receiver(m2m_changed, sender=Entry.approvers.through)
+@receiver(m2m_changed, sender=Entry.collaborators.through)
+@receiver(m2m_changed, sender=Entry.observers.through)
+def bump_dashboard_generation_for_people(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not reverse:
+        plan_pks = [instance.plan_id] if action.startswith("post_") else []
+    elif action == "pre_clear":
+        plan_pks = sender.objects.filter(user_id=instance.pk).values_list(
+            "entry__plan_id", flat=True
+        )
+    elif action in ("post_add", "post_remove"):
+        plan_pks = Entry.objects.filter(pk__in=pk_set).values_list("plan_id", flat=True)
+    else:
+        plan_pks = []
+    for plan_pk in set(plan_pks):
+        bump_generation(dashboard_generation_key(plan_pk))
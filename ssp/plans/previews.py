@@ -0,0 +1,49 @@
+import io
+
+from PIL import Image, ImageOps
+
+# Rendition name -> the box it is scaled down to fit.
+RENDITIONS = {
+    "thumbnail": (256, 256),
+    "preview": (1280, 1280),
+}
+PREVIEW_TYPES = (
+    "image/bmp",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/tiff",
+    "image/webp",
+)
+PREVIEW_QUALITY = 85
+
+
+def render_previews(f):
+    """JPEG bytes of every rendition of the image in ``f``, by name.
+
+    Returns an empty dict for files Pillow cannot read, including images
+    too large to decode safely.
+    """
+    try:
+        image = Image.open(f)
+        # JPEGs can be decoded at a fraction of their size directly.
+        image.draft("RGB", max(RENDITIONS.values()))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return {}
+
+    renditions = {}
+    # Largest first, each smaller rendition is scaled from the previous one.
+    for name, size in sorted(RENDITIONS.items(), key=lambda item: -item[1][0]):
+        image.thumbnail(size, Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=PREVIEW_QUALITY, optimize=True)
+        renditions[name] = buffer.getvalue()
+    return renditions
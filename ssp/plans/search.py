@@ -0,0 +1,71 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import BooleanField, CharField, Exists, F, OuterRef, Q, Value
+
+from ssp.controls.models import Control
+
+from .models import Detail, FileArtifact
+
+SEARCH_CONFIG = "english"
+
+
+def _results(queryset, kind, title, control_slug, is_placeholder, query):
+    # union() matches columns by position, so every branch annotates the
+    # same names in the same order.
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(
+            kind=Value(kind, output_field=CharField()),
+            object_pk=F("pk"),
+            title=title,
+            control_slug=control_slug,
+            placeholder=is_placeholder,
+            rank=SearchRank(F("search_vector"), query),
+        )
+        .values(
+            "kind", "object_pk", "title", "control_slug", "placeholder", "rank"
+        )
+        .order_by()
+    )
+
+
+def search_plan(plan, text):
+    """Ranked search over a plan's controls, current entry text and artifacts."""
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+
+    controls = _results(
+        Control.objects.filter(
+            tree_id=plan.root_control.tree_id, is_withdrawn=False
+        ),
+        "control",
+        F("name"),
+        F("slug"),
+        F("is_placeholder"),
+        query,
+    )
+
+    superseded = Detail.objects.filter(
+        entry=OuterRef("entry"),
+        status=Detail.PUBLISHED,
+        modified_on__gt=OuterRef("modified_on"),
+    )
+    details = _results(
+        Detail.objects.filter(plan=plan)
+        .annotate(superseded=Exists(superseded))
+        .filter(~Q(status=Detail.PUBLISHED) | Q(superseded=False)),
+        "detail",
+        F("entry__control__name"),
+        F("entry__control__slug"),
+        Value(False, output_field=BooleanField()),
+        query,
+    )
+
+    artifacts = _results(
+        FileArtifact.objects.filter(plan=plan),
+        "artifact",
+        F("name"),
+        Value(None, output_field=CharField()),
+        Value(False, output_field=BooleanField()),
+        query,
+    )
+
+    return controls.union(details, artifacts, all=True).order_by("-rank", "title")
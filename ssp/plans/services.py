@@ -0,0 +1,319 @@
+from collections import Counter
+from datetime import datetime, timezone
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+
+from ssp.controls.models import Control
+from ssp.utils.cache import bump_generation
+from ssp.utils.markdown import refresh_markdown
+
+from .models import (
+    DETAIL_SEARCH_VECTOR,
+    Approval,
+    Detail,
+    Entry,
+    FileArtifact,
+    Plan,
+    PlanRollup,
+    dashboard_generation_key,
+    retain_blob,
+    update_approval_progress,
+)
+from .uploads import FileDigest
+
+INITIAL_DETAIL_TEXT = "entry created"
+
+ROLES = ("approvers", "collaborators", "observers")
+ADD = "add"
+REMOVE = "remove"
+REPLACE = "replace"
+
+APPROVED = "approved"
+UNAPPROVED = "unapproved"
+UNCHANGED = "unchanged"
+FORBIDDEN = "forbidden"
+NOT_FOUND = "not_found"
+NOT_PENDING = "not_pending"
+
+
+def _family_pk(control, families):
+    for family in families:
+        if family.lft <= control.lft and family.rght >= control.rght:
+            return family.pk
+    return control.pk
+
+
+def materialize_entries(plan, batch_size=500, subtree=None):
+    """Create the missing entries and initial details for a plan's controls.
+
+    Mirrors ``create_initial_detail_for_entry`` for every non-placeholder
+    control under the plan root, or only under ``subtree`` when given,
+    with a few bulk statements, keeping the search vectors, rollups and
+    dashboard cache in step since bulk_create skips the model signals.
+    Returns the number of entries created.
+    """
+    with transaction.atomic():
+        # Serialize concurrent runs for the same plan.
+        plan = (
+            Plan.objects.select_for_update()
+            .select_related("root_control")
+            .get(pk=plan.pk)
+        )
+        root = plan.root_control
+        top = subtree or root
+        controls = list(
+            Control.objects.filter(
+                tree_id=top.tree_id,
+                lft__gte=top.lft,
+                rght__lte=top.rght,
+                is_placeholder=False,
+                is_withdrawn=False,
+            )
+            .annotate(
+                has_entry=Exists(
+                    Entry.objects.filter(plan=plan, control=OuterRef("pk"))
+                )
+            )
+            .filter(has_entry=False)
+            .only("pk", "tree_id", "lft", "rght", "level")
+        )
+        if not controls:
+            return 0
+
+        entries = Entry.objects.bulk_create(
+            [
+                Entry(plan=plan, control=control, rollup_state=PlanRollup.PUBLISHED)
+                for control in controls
+            ],
+            batch_size=batch_size,
+        )
+
+        now = datetime.now(timezone.utc)
+        template = Detail(text=INITIAL_DETAIL_TEXT)
+        refresh_markdown(template, "text")
+        details = Detail.objects.bulk_create(
+            [
+                Detail(
+                    entry=entry,
+                    plan=plan,
+                    status=Detail.PUBLISHED,
+                    text=INITIAL_DETAIL_TEXT,
+                    text_html=template.text_html,
+                    text_html_key=template.text_html_key,
+                    last_status=Detail.PUBLISHED,
+                    last_text=INITIAL_DETAIL_TEXT,
+                    last_modified_on=now,
+                )
+                for entry in entries
+            ],
+            batch_size=batch_size,
+        )
+        Detail.objects.filter(pk__in=[d.pk for d in details]).update(
+            search_vector=DETAIL_SEARCH_VECTOR
+        )
+
+        families = list(
+            Control.objects.filter(tree_id=root.tree_id, level=root.level + 1).only(
+                "pk", "lft", "rght"
+            )
+        )
+        counts = Counter(_family_pk(control, families) for control in controls)
+        existing = set(
+            PlanRollup.objects.filter(plan=plan, family__in=counts).values_list(
+                "family_id", flat=True
+            )
+        )
+        for family_pk in counts.keys() - existing:
+            family = Control.objects.get(pk=family_pk)
+            PlanRollup.objects.create(
+                plan=plan,
+                family=family,
+                control_count=family.get_descendants(include_self=True)
+                .filter(is_placeholder=False, is_withdrawn=False)
+                .count(),
+            )
+        for family_pk, count in counts.items():
+            PlanRollup.objects.filter(plan=plan, family_id=family_pk).update(
+                published=F("published") + count
+            )
+
+        bump_generation(dashboard_generation_key(plan.pk))
+
+    return len(entries)
+
+
+def assign_people(plan, control, people, operation=ADD):
+    """Add, remove or replace the people of every entry under ``control``.
+
+    ``people`` maps a role in ``ROLES`` to the users for that role; roles
+    left out are not touched. Each role is changed with one DELETE and one
+    bulk INSERT on its through table. Returns a summary of the changes.
+    """
+    with transaction.atomic():
+        materialize_entries(plan, subtree=control)
+        entry_pks = list(
+            Entry.objects.filter(
+                plan=plan,
+                control__tree_id=control.tree_id,
+                control__lft__gte=control.lft,
+                control__rght__lte=control.rght,
+            ).values_list("pk", flat=True)
+        )
+        summary = {"entries": len(entry_pks), "roles": {}}
+        changed_approver_entries = set()
+
+        for role, users in people.items():
+            if role not in ROLES:
+                raise ValueError(f"Unknown role: {role}")
+            through = getattr(Entry, role).through
+            user_pks = {user.pk for user in users}
+            links = through.objects.filter(entry_id__in=entry_pks)
+
+            if operation == REMOVE:
+                stale = links.filter(user_id__in=user_pks)
+            elif operation == REPLACE:
+                stale = links.exclude(user_id__in=user_pks)
+            else:
+                stale = through.objects.none()
+            removed_entries = set(stale.values_list("entry_id", flat=True))
+            removed = stale.delete()[0] if removed_entries else 0
+
+            added = []
+            if operation in (ADD, REPLACE) and user_pks:
+                existing = set(
+                    links.filter(user_id__in=user_pks).values_list(
+                        "entry_id", "user_id"
+                    )
+                )
+                added = [
+                    through(entry_id=entry_pk, user_id=user_pk)
+                    for entry_pk in entry_pks
+                    for user_pk in user_pks
+                    if (entry_pk, user_pk) not in existing
+                ]
+                through.objects.bulk_create(added, ignore_conflicts=True)
+
+            summary["roles"][role] = {"added": len(added), "removed": removed}
+            if role == "approvers":
+                changed_approver_entries |= removed_entries
+                changed_approver_entries.update(link.entry_id for link in added)
+
+        # Approver changes can move pending entries between rollup states.
+        update_approval_progress(entry_id__in=changed_approver_entries)
+        for entry_pk in Detail.objects.filter(
+            entry_id__in=changed_approver_entries, status=Detail.PENDING_APPROVAL
+        ).values_list("entry_id", flat=True):
+            PlanRollup.objects.record_entry(entry_pk)
+
+        if any(c["added"] or c["removed"] for c in summary["roles"].values()):
+            bump_generation(dashboard_generation_key(plan.pk))
+
+    return summary
+
+
+def batch_approve(user, detail_pks, approve=True):
+    """Approve or unapprove many details for ``user`` at once.
+
+    Rights and current approvals for every detail are read with one query,
+    then the Approval rows are inserted or deleted in bulk. Returns a
+    result per requested detail id, in request order.
+    """
+    detail_pks = list(dict.fromkeys(detail_pks))
+    can_approve_all = user.has_perm("plans.change_plan")
+    with transaction.atomic():
+        details = {
+            detail["pk"]: detail
+            for detail in Detail.objects.filter(pk__in=detail_pks)
+            .select_for_update(of=("self",))
+            .annotate(
+                is_approver=Exists(
+                    Entry.approvers.through.objects.filter(
+                        entry_id=OuterRef("entry_id"), user_id=user.pk
+                    )
+                ),
+                is_approved=Exists(
+                    Approval.objects.filter(detail_id=OuterRef("pk"), user_id=user.pk)
+                ),
+            )
+            .values("pk", "status", "entry_id", "plan_id", "is_approver", "is_approved")
+        }
+
+        results = {}
+        changed = []
+        for pk in detail_pks:
+            detail = details.get(pk)
+            if detail is None:
+                results[pk] = NOT_FOUND
+            elif not (can_approve_all or detail["is_approver"]):
+                results[pk] = FORBIDDEN
+            elif detail["status"] != Detail.PENDING_APPROVAL:
+                results[pk] = NOT_PENDING
+            elif detail["is_approved"] == approve:
+                results[pk] = UNCHANGED
+            else:
+                results[pk] = APPROVED if approve else UNAPPROVED
+                changed.append(detail)
+
+        if changed:
+            changed_pks = [detail["pk"] for detail in changed]
+            if approve:
+                Approval.objects.bulk_create(
+                    [
+                        Approval(user=user, detail_id=d["pk"], plan_id=d["plan_id"])
+                        for d in changed
+                    ],
+                    ignore_conflicts=True,
+                )
+            else:
+                Approval.objects.filter(detail_id__in=changed_pks, user=user).delete()
+
+            update_approval_progress(pk__in=changed_pks)
+            for entry_pk in {detail["entry_id"] for detail in changed}:
+                PlanRollup.objects.record_entry(entry_pk)
+            for plan_pk in {detail["plan_id"] for detail in changed}:
+                bump_generation(dashboard_generation_key(plan_pk))
+
+    return [{"detail": pk, "result": results[pk]} for pk in detail_pks]
+
+
+def dedup_artifacts():
+    """Move artifacts stored one file per upload into the shared blob store.
+
+    Each artifact is hashed if needed, pointed at the blob for its content
+    and its old file removed once nothing else uses it. Returns counts of
+    the artifacts moved, the files removed and the artifacts whose file is
+    missing.
+    """
+    storage = FileArtifact.upload.field.storage
+    summary = {"artifacts": 0, "removed": 0, "missing": 0}
+    artifacts = FileArtifact.objects.filter(blob=None).exclude(upload="")
+    for artifact in artifacts.order_by("pk").iterator():
+        old_name = artifact.upload.name
+        if not storage.exists(old_name):
+            summary["missing"] += 1
+            continue
+        with transaction.atomic():
+            file_hash, size = artifact.file_hash, artifact.size
+            if not file_hash or size is None:
+                digest = FileDigest()
+                with storage.open(old_name, "rb") as f:
+                    for chunk in f.chunks():
+                        digest.update(chunk)
+                file_hash, size = digest.hexdigest(), digest.size
+
+            with storage.open(old_name, "rb") as f:
+                blob = retain_blob(file_hash, size, f)
+            FileArtifact.objects.filter(pk=artifact.pk).update(
+                upload=blob.file_name, blob=blob, file_hash=file_hash, size=size
+            )
+            summary["artifacts"] += 1
+
+            if (
+                old_name != blob.file_name
+                and not FileArtifact.objects.filter(upload=old_name).exists()
+            ):
+                transaction.on_commit(partial(storage.delete, old_name))
+                summary["removed"] += 1
+    return summary
@@ -0,0 +1,49 @@
+from django.core.files.base import ContentFile
+
+from ssp.jobs.queue import enqueue
+
+from .models import ArtifactBlob, FileArtifact
+from .previews import PREVIEW_TYPES, render_previews
+from .uploads import type_meta_data
+
+
+def process_artifact(artifact_pk, head=""):
+    """Fill in the type of a stored upload and mark the artifact ready.
+
+    ``head`` holds the hex of the leading bytes captured while the upload
+    streamed in, so the stored file is not opened again.
+    """
+    artifact = (
+        FileArtifact.objects.select_related("blob").filter(pk=artifact_pk).first()
+    )
+    if artifact is None:
+        return
+    meta_data = type_meta_data(artifact.file_name, bytes.fromhex(head))
+    FileArtifact.objects.filter(pk=artifact.pk).update(
+        status=FileArtifact.READY, **meta_data
+    )
+    blob = artifact.blob
+    if (
+        blob is not None
+        and not blob.has_previews
+        and meta_data.get("mime_type") in PREVIEW_TYPES
+    ):
+        enqueue(create_previews, blob_pk=blob.pk)
+
+
+def create_previews(blob_pk):
+    """Render the previews of a blob, once for all artifacts sharing it."""
+    # The lock keeps a second job for the same content from racing this one.
+    blob = ArtifactBlob.objects.select_for_update().filter(pk=blob_pk).first()
+    if blob is None or blob.has_previews:
+        return
+    storage = FileArtifact.upload.field.storage
+    with storage.open(blob.file_name, "rb") as f:
+        renditions = render_previews(f)
+    if not renditions:
+        return
+    for rendition, data in renditions.items():
+        name = blob.rendition_name(rendition)
+        if not storage.exists(name):
+            storage.save(name, ContentFile(data))
+    ArtifactBlob.objects.filter(pk=blob.pk).update(has_previews=True)
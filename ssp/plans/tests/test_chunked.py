@@ -0,0 +1,199 @@
+import hashlib
+import os
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from ssp.jobs.queue import work
+from ssp.plans.chunked import (
+    ChunkOutOfOrder,
+    append_chunk,
+    expire_upload_sessions,
+    finish_upload,
+)
+from ssp.plans.models import FileArtifact, UploadSession
+from ssp.plans.tests.factories import PlanFactory
+from ssp.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+PDF = b"%PDF-1.4\n" + bytes(range(256)) * 40
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def session():
+    user = UserFactory()
+    return UploadSession.objects.create(
+        plan=PlanFactory(creator=user),
+        creator=user,
+        name="Logs",
+        file_name="logs.pdf",
+        size=len(PDF),
+        chunk_size=4096,
+    )
+
+
+def chunks(data, size=4096):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class Stream:
+    def __init__(self, data):
+        self.data, self.offset = data, 0
+
+    def read(self, size):
+        block = self.data[self.offset : self.offset + size]
+        self.offset += len(block)
+        return block
+
+
+def put(session, index, data, chunk_hash=None):
+    return append_chunk(
+        session, index, Stream(data), len(data), chunk_hash or sha256(data)
+    )
+
+
+class TestAppendChunk:
+    def test_assemble(self, session):
+        for index, data in enumerate(chunks(PDF)):
+            assert put(session, index, data)
+        assert put(session, 0, PDF[:4096]) is False
+
+        session.refresh_from_db()
+        assert session.received == len(PDF)
+        with open(session.partial_path, "rb") as f:
+            assert f.read() == PDF
+
+    def test_out_of_order(self, session):
+        with pytest.raises(ChunkOutOfOrder):
+            put(session, 1, PDF[4096:8192])
+        with pytest.raises(ValueError, match="must be 4096 bytes"):
+            put(session, 0, PDF[:100])
+
+    def test_bad_hash_is_dropped(self, session):
+        put(session, 0, PDF[:4096])
+        with pytest.raises(ValueError, match="does not match"):
+            put(session, 1, PDF[4096:8192], chunk_hash=sha256(b"other"))
+
+        assert os.path.getsize(session.partial_path) == 4096
+        put(session, 1, PDF[4096:8192])
+        assert session.received == 8192
+
+    def test_hash_from_another_worker(self, session):
+        put(session, 0, PDF[:4096])
+        # Another worker only has the session row and the partial file.
+        session = UploadSession.objects.get(pk=session.pk)
+        for index, data in enumerate(chunks(PDF)[1:], start=1):
+            put(session, index, data)
+
+        artifact = finish_upload(UploadSession.objects.get(pk=session.pk))
+        assert artifact.file_hash == sha256(PDF)
+
+
+class TestFinishUpload:
+    def test_finish(self, session):
+        for index, data in enumerate(chunks(PDF)):
+            put(session, index, data)
+
+        artifact = finish_upload(session, sha256(PDF))
+
+        assert artifact.size == len(PDF)
+        assert artifact.file_name == "logs.pdf"
+        assert artifact.plan == session.plan
+        assert artifact.blob.file_hash == sha256(PDF)
+        assert not os.path.exists(session.partial_path)
+        assert not UploadSession.objects.exists()
+        work()
+        artifact.refresh_from_db()
+        assert artifact.mime_type == "application/pdf"
+        assert artifact.status == FileArtifact.READY
+        with artifact.upload.open("rb") as f:
+            assert f.read() == PDF
+
+    def test_incomplete_or_wrong_hash(self, session):
+        put(session, 0, PDF[:4096])
+        with pytest.raises(ChunkOutOfOrder):
+            finish_upload(session)
+        for index, data in enumerate(chunks(PDF)[1:], start=1):
+            put(session, index, data)
+        with pytest.raises(ValueError):
+            finish_upload(session, sha256(b"other"))
+        assert UploadSession.objects.exists()
+
+    def test_expire(self, session):
+        put(session, 0, PDF[:4096])
+        assert expire_upload_sessions(timedelta(hours=1)) == 0
+
+        UploadSession.objects.update(modified_on=timezone.now() - timedelta(hours=2))
+        assert expire_upload_sessions(timedelta(hours=1)) == 1
+        assert not os.path.exists(session.partial_path)
+
+
+class TestUploadViews:
+    def test_upload(self, client, settings):
+        settings.CHUNKED_UPLOAD_CHUNK_SIZE = 4096
+        user = UserFactory(is_superuser=True)
+        plan = PlanFactory(creator=user)
+        client.force_login(user)
+
+        response = client.post(
+            reverse("plans:create-upload-session", args=[plan.pk]),
+            {"name": "Logs", "file_name": "../logs.pdf", "size": len(PDF)},
+            content_type="application/json",
+        )
+        assert response.status_code == 201
+        state = response.json()
+        assert state["chunk_count"] == 3
+        assert UploadSession.objects.get().file_name == "logs.pdf"
+
+        chunk_url = state["url"] + "{}/"
+        response = client.put(
+            chunk_url.format(1), PDF[4096:8192], content_type="application/octet-stream"
+        )
+        assert response.status_code == 400
+
+        for index, data in enumerate(chunks(PDF)):
+            response = client.put(
+                chunk_url.format(index),
+                data,
+                content_type="application/octet-stream",
+                HTTP_X_CHUNK_SHA256=sha256(data),
+            )
+            assert response.status_code == 200
+        response = client.put(
+            chunk_url.format(5),
+            b"x",
+            content_type="application/octet-stream",
+            HTTP_X_CHUNK_SHA256=sha256(b"x"),
+        )
+        assert response.status_code == 409
+        assert client.get(state["url"]).json()["received"] == len(PDF)
+
+        response = client.post(
+            state["url"] + "complete/",
+            {"sha256": sha256(PDF)},
+            content_type="application/json",
+        )
+        assert response.status_code == 201
+        artifact = FileArtifact.objects.get(pk=response.json()["id"])
+        assert artifact.name == "Logs"
+        assert artifact.creator == user
+
+    def test_permissions(self, client, session):
+        url = reverse("plans:create-upload-session", args=[session.plan_id])
+        client.force_login(UserFactory())
+        assert client.post(url, {}, content_type="application/json").status_code == 403
+
+        session_url = reverse(
+            "plans:upload-session", args=[session.plan_id, session.pk]
+        )
+        assert client.get(session_url).status_code == 404
+        client.force_login(session.creator)
+        assert client.delete(session_url).status_code == 204
+        assert not UploadSession.objects.exists()
@@ -0,0 +1,298 @@
+import re
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ssp.controls.models import Control
+from ssp.controls.tests.factories import ControlFactory
+from ssp.plans.inbox import inbox_details
+from ssp.plans.models import Approval, Detail, Entry, FileArtifact
+from ssp.plans.tests.factories import DetailFactory, EntryFactory, PlanFactory
+from ssp.users.tests.factories import UserFactory
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="EXPLAIN checks need Postgres"
+    ),
+]
+
+CHECKED_TABLES = {
+    "plans_approval",
+    "plans_detail",
+    "plans_detail_file_artifacts",
+    "plans_entry",
+    "plans_entry_approvers",
+    "plans_entry_collaborators",
+    "plans_entry_observers",
+}
+MAX_FILTERED_ROWS = 100
+
+
+def table_indexes():
+    """Map index names to their leading column and whether they are partial."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT i.indexrelid::regclass::text, a.attname, i.indpred IS NOT NULL
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indrelid::regclass::text = ANY(%s)
+            """,
+            [list(CHECKED_TABLES)],
+        )
+        return {name: (column, partial) for name, column, partial in cursor.fetchall()}
+
+
+def unindexed_scans(plan, indexes):
+    """Scans of checked tables that do not seek on a suitable index.
+
+    A scan that throws away more than ``MAX_FILTERED_ROWS`` rows after
+    reading them is a regression, whether it is a sequential scan or an
+    index scan on a column that is too broad. So is an index scan whose
+    condition skips the index's leading column.
+    """
+    scans = []
+    relation = plan.get("Relation Name")
+    removed = plan.get("Rows Removed by Filter", 0) * plan.get("Actual Loops", 1)
+    if relation in CHECKED_TABLES and removed > MAX_FILTERED_ROWS:
+        scans.append(f"{plan['Node Type']} on {relation}")
+    if plan.get("Index Name") in indexes:
+        column, partial = indexes[plan["Index Name"]]
+        condition = plan.get("Index Cond", "")
+        if not partial and not re.search(rf"\(+{column}\b", condition):
+            scans.append(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        scans.extend(unindexed_scans(child, indexes))
+    return scans
+
+
+def sorted_scans(plan, sorting=False):
+    """Checked tables whose rows are sorted after reading them.
+
+    An index in the query's order lets a ``LIMIT`` stop after the first
+    rows instead of reading and sorting all of them.
+    """
+    scans = []
+    sorting = sorting or plan["Node Type"] == "Sort"
+    if sorting and plan.get("Relation Name") in CHECKED_TABLES:
+        scans.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        # A subquery is planned on its own.
+        subplan = child.get("Subplan Name") or child.get("Parent Relationship") in (
+            "InitPlan",
+            "SubPlan",
+        )
+        scans.extend(sorted_scans(child, sorting and not subplan))
+    return scans
+
+
+def explain(sql, params=None):
+    with connection.cursor() as cursor:
+        # The seeded tables are small enough that a sequential scan is often
+        # cheapest, the question is whether an index can serve the query.
+        cursor.execute("SET enable_seqscan = off")
+        try:
+            cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql, params)
+            return cursor.fetchone()[0][0]["Plan"]
+        finally:
+            cursor.execute("RESET enable_seqscan")
+
+
+def explain_unindexed_scans(sql, params=None):
+    return unindexed_scans(explain(sql, params), table_indexes())
+
+
+def assert_indexed(queryset):
+    sql, params = queryset.query.sql_with_params()
+    assert explain_unindexed_scans(sql, params) == [], sql
+
+
+def assert_view_indexed(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    failures = []
+    for query in context.captured_queries:
+        sql = query["sql"]
+        if sql.lstrip("(").startswith("SELECT"):
+            scans = explain_unindexed_scans(sql)
+            if scans:
+                failures.append((scans, sql))
+    assert failures == []
+
+
+def seed_history(plan, users, entries=500, versions=8):
+    """Bulk insert a plan with a long, mostly published detail history.
+
+    The latest detail of every entry is pending approval.
+    """
+    controls = Control.objects.bulk_create(
+        Control(
+            name=f"seed {i}",
+            slug=f"seed-{i}",
+            body="",
+            lft=1,
+            rght=2,
+            tree_id=100000 + i,
+            level=0,
+        )
+        for i in range(entries)
+    )
+    entry_list = Entry.objects.bulk_create(
+        Entry(plan=plan, control=control) for control in controls
+    )
+    Detail.objects.bulk_create(
+        Detail(
+            entry=entry,
+            plan=plan,
+            status=Detail.PUBLISHED if i < versions - 1 else Detail.PENDING_APPROVAL,
+            text="seed",
+        )
+        for entry in entry_list
+        for i in range(versions)
+    )
+    for role in ("approvers", "collaborators", "observers"):
+        getattr(Entry, role).through.objects.bulk_create(
+            getattr(Entry, role).through(entry=entry, user=users[i % len(users)])
+            for i, entry in enumerate(entry_list)
+        )
+    details = list(Detail.objects.filter(plan=plan).only("pk"))
+    Approval.objects.bulk_create(
+        Approval(detail=detail, plan=plan, user=users[i % len(users)])
+        for i, detail in enumerate(details)
+    )
+    artifact = FileArtifact.objects.create(
+        plan=plan,
+        creator=users[0],
+        name="seed",
+        upload=SimpleUploadedFile("seed.txt", b"seed"),
+    )
+    Detail.file_artifacts.through.objects.bulk_create(
+        Detail.file_artifacts.through(detail=detail, fileartifact=artifact)
+        for detail in details
+    )
+
+
+@pytest.fixture
+def seeded(client):
+    """A long plan history, plus open work for ``user`` on another plan."""
+    user = UserFactory()
+    user.set_password("test")
+    user.save()
+    users = [user] + UserFactory.create_batch(19)
+    plan = PlanFactory()
+    seed_history(plan, users)
+
+    other = PlanFactory()
+    for i in range(20):
+        entry = EntryFactory(plan=other, control=ControlFactory())
+        entry.approvers.add(user)
+        entry.collaborators.add(user)
+        detail = DetailFactory(entry=entry, plan=other, status=Detail.PENDING_APPROVAL)
+        Approval.objects.create(user=user, detail=detail, plan=other)
+    history = Detail.objects.bulk_create(
+        Detail(entry=entry, plan=other, status=Detail.PUBLISHED, text="seed")
+        for i in range(200)
+    )
+    Approval.objects.bulk_create(
+        [Approval(detail=d, plan=other, user=user) for d in history]
+        + [Approval(detail=detail, plan=other, user=u) for u in users[1:]]
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    client.login(username=user.username, password="test")
+    return plan, entry, user
+
+
+class TestHotQueryIndexes:
+    def test_no_redundant_foreign_key_indexes(self):
+        with connection.cursor() as cursor:
+            for table, columns in (
+                ("plans_detail", ["entry_id", "plan_id"]),
+                ("plans_approval", ["plan_id", "user_id"]),
+            ):
+                constraints = connection.introspection.get_constraints(cursor, table)
+                single = {
+                    c["columns"][0]
+                    for c in constraints.values()
+                    if c["index"] and not c["unique"] and len(c["columns"]) == 1
+                }
+                assert single.isdisjoint(columns), table
+            constraints = connection.introspection.get_constraints(
+                cursor, "plans_detail"
+            )
+        assert {"plans_detail_single_draft", "plans_detail_single_pending"} <= set(
+            constraints
+        )
+
+    def test_entry_details(self, seeded):
+        plan, entry, user = seeded
+        assert_indexed(
+            Detail.objects.filter(entry=entry, status=Detail.DRAFT).values("pk")
+        )
+        assert_indexed(
+            Detail.objects.filter(entry=entry, status=Detail.PUBLISHED)
+            .order_by("-modified_on")
+            .values("pk")
+        )
+        assert_indexed(Entry.objects.filter(plan=plan, control_id=entry.control_id))
+
+    def test_plan_details_by_status(self, seeded):
+        plan, entry, user = seeded
+        assert_indexed(
+            Detail.objects.filter(plan=plan, status=Detail.PENDING_APPROVAL)
+            .order_by("-modified_on")
+            .values("pk")
+        )
+
+    def test_approvals(self, seeded):
+        plan, entry, user = seeded
+        detail = Detail.objects.get(entry=entry, status=Detail.PENDING_APPROVAL)
+        assert_indexed(Approval.objects.filter(detail=detail, user=user))
+        assert_indexed(Approval.objects.filter(plan=entry.plan_id, user=user))
+
+    def test_inbox(self, seeded):
+        plan, entry, user = seeded
+        assert_indexed(inbox_details(user).order_by("-modified_on", "-pk"))
+        assert_indexed(
+            Detail.objects.filter(status__in=[Detail.DRAFT, Detail.PENDING_APPROVAL])
+            .order_by("-modified_on")
+            .values("pk")[:50]
+        )
+
+    def test_entry_page(self, client, seeded):
+        plan, entry, user = seeded
+        assert_view_indexed(
+            client,
+            reverse(
+                "plans:plan-control-entry", args=[entry.plan_id, entry.control.slug]
+            ),
+        )
+
+    def test_plan_dashboard(self, client, seeded):
+        plan, entry, user = seeded
+        assert_view_indexed(client, reverse("plans:detail", args=[plan.pk]))
+
+    def test_plan_list(self, client, seeded):
+        assert_view_indexed(client, reverse("plans:list"))
+
+        with CaptureQueriesContext(connection) as context:
+            client.get(reverse("plans:list"))
+        queries = [
+            q["sql"] for q in context.captured_queries if "last_activity" in q["sql"]
+        ]
+        assert queries
+        for sql in queries:
+            assert sorted_scans(explain(sql)) == [], sql
+
+    def test_inbox_page(self, client, seeded):
+        assert_view_indexed(client, reverse("plans:inbox"))
+
+    def test_entry_history(self, client, seeded):
+        plan, entry, user = seeded
+        assert_view_indexed(client, reverse("plans:entry-history", args=[entry.pk]))
@@ -1,12 +1,30 @@
 import re
+import threading
+from importlib import import_module
 
 import pytest
+from django.apps import apps as django_apps
+from django.contrib.postgres.search import SearchQuery
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 
-from ssp.artifacts.models import FileArtifact, artifact_file_name
 from ssp.controls.tests.factories import ControlFactory
-from ssp.plans.models import Approval, ControlDemotionException, Detail, Entry
+from ssp.jobs.models import Job
+from ssp.jobs.queue import work
+from ssp.plans.models import (
+    Approval,
+    ArtifactBlob,
+    ControlDemotionException,
+    Detail,
+    Entry,
+    FileArtifact,
+    OpenDetailConflict,
+    PlanRollup,
+    artifact_file_name,
+    blob_file_name,
+)
 from ssp.plans.tests.factories import DetailFactory, EntryFactory, PlanFactory
 from ssp.users.tests.factories import UserFactory
 
@@ -103,26 +121,99 @@ class TestDetailModel:
         assert d.has_all_approvals() is True
 
         e.approvers.add(u)
+        d.refresh_from_db()
         assert d.has_all_approvals() is False
 
         Approval.objects.create(user=u, detail=d, plan=e.plan)
+        d.refresh_from_db()
         assert d.has_all_approvals() is True
 
-    def test_clean_new_multiple_drafts(self):
+    def test_approval_progress(self):
+        e = EntryFactory()
+        u1, u2 = UserFactory.create_batch(2)
+        d = DetailFactory(entry=e, plan=e.plan, status=Detail.PENDING_APPROVAL)
+
+        def progress():
+            return Detail.objects.values_list(
+                "required_approvals", "received_approvals", "is_ready"
+            ).get(pk=d.pk)
+
+        assert progress() == (0, 0, True)
+
+        e.approvers.add(u1, u2)
+        assert progress() == (2, 0, False)
+
+        Approval.objects.create(user=u1, detail=d, plan=e.plan)
+        Approval.objects.create(user=u2, detail=d, plan=e.plan)
+        assert progress() == (2, 2, True)
+        assert Detail.objects.filter(entry=e, is_ready=True).get() == d
+
+        u2.entry_approvals.clear()
+        assert progress() == (1, 1, True)
+
+        e.approvers.add(u2)
+        Approval.objects.filter(user=u1).delete()
+        assert progress() == (2, 1, False)
+
+        d.text = "changed"
+        d.save()
+        assert progress() == (2, 0, False)
+
+    def test_save_skips_unchanged_rollup(self, monkeypatch):
+        d = DetailFactory(status=Detail.DRAFT)
+        monkeypatch.setattr(
+            PlanRollup.objects,
+            "record_entry",
+            lambda entry_pk: pytest.fail("rollup recorded"),
+        )
+
+        d.text = "changed"
+        d.save()
+        assert Detail.objects.filter(
+            pk=d.pk, search_vector=SearchQuery("changed", config="english")
+        ).exists()
+
+    def test_rendered_text(self):
+        d = DetailFactory(text="# Heading\n\n<script>x</script>")
+        assert d.text_html_key
+        assert "<script>" not in d.rendered_text()
+
+        d.text = "*em*"
+        d.save()
+        assert d.text_html == "<p><em>em</em></p>"
+
+    def test_save_new_multiple_drafts(self):
         e = EntryFactory()
         DetailFactory(entry=e, status=Detail.DRAFT)
 
-        with pytest.raises(ValidationError):
-            d = Detail(entry=e, status=Detail.DRAFT)
-            d.clean()
+        with pytest.raises(OpenDetailConflict, match="multiple drafts"):
+            Detail.objects.create(entry=e, plan=e.plan, status=Detail.DRAFT)
+        assert Detail.objects.filter(entry=e, status=Detail.DRAFT).count() == 1
 
-    def test_clean_new_multiple_pending_approval(self):
+    def test_save_new_multiple_pending_approval(self):
         e = EntryFactory()
         DetailFactory(entry=e, status=Detail.PENDING_APPROVAL)
-
-        with pytest.raises(ValidationError):
-            d = Detail(entry=e, status=Detail.PENDING_APPROVAL)
-            d.clean()
+        d = DetailFactory(entry=e, status=Detail.DRAFT)
+
+        with pytest.raises(OpenDetailConflict, match="multiple pending approval"):
+            d.status = Detail.PENDING_APPROVAL
+            d.save()
+        assert Detail.objects.get(pk=d.pk).status == Detail.DRAFT
+
+    def test_collapse_open_details(self):
+        migration = import_module("ssp.plans.migrations.0015_detail_single_open")
+        e1, e2 = EntryFactory(), EntryFactory()
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX plans_detail_single_draft")
+        DetailFactory(entry=e1, status=Detail.DRAFT, text="same")
+        kept = DetailFactory(entry=e1, status=Detail.DRAFT, text="same")
+        migration.collapse_open_details(django_apps, None)
+        assert list(Detail.objects.filter(entry=e1, status=Detail.DRAFT)) == [kept]
+
+        DetailFactory(entry=e2, status=Detail.DRAFT, text="one")
+        DetailFactory(entry=e2, status=Detail.DRAFT, text="two")
+        with pytest.raises(RuntimeError, match=f"Entries {e2.pk} "):
+            migration.collapse_open_details(django_apps, None)
 
     def test_clean_existing_modified_published(self):
         d = DetailFactory(status=Detail.PUBLISHED)
@@ -136,12 +227,14 @@ class TestDetailModel:
         d = DetailFactory(entry=e, status=Detail.PENDING_APPROVAL)
         u = UserFactory()
         e.approvers.add(u)
+        d.refresh_from_db()
 
         with pytest.raises(ValidationError):
             d.status = Detail.PUBLISHED
             d.clean()
 
         Approval.objects.create(user=u, detail=d, plan=e.plan)
+        d.refresh_from_db()
 
         try:
             d.status = Detail.PUBLISHED
@@ -160,15 +253,188 @@ class TestFileArtifactModel:
     def test_populate_file_meta_data(self):
         a = FileArtifact.objects.create(
             name="test",
+            plan=PlanFactory(),
             upload=SimpleUploadedFile("test.txt", DATA_TEXT),
             creator=UserFactory(),
         )
         a.save()
         assert a.size == 571
-        assert a.mime_type == "text/plain"
-        assert a.file_extension == "txt"
-        assert a.file_encoding == "unknown"
+        assert a.file_name == "test.txt"
         assert (
             a.file_hash
             == "6d214576be99e98ebe5646a1302ba1ad921fb031e3e1c69d96244009dae3a873"
         )
+        assert a.status == FileArtifact.PROCESSING
+        assert Job.objects.filter(kwargs__artifact_pk=a.pk).count() == 1
+
+        assert work() == 1
+        a.refresh_from_db()
+        assert a.status == FileArtifact.READY
+        assert a.mime_type == "text/plain"
+        assert a.file_extension == "txt"
+        assert a.file_encoding == "unknown"
+
+    def test_shared_blob(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        p1, p2, u = PlanFactory(), PlanFactory(), UserFactory()
+        a1, a2 = [
+            FileArtifact.objects.create(
+                name=f"policy {p.pk}",
+                plan=p,
+                upload=SimpleUploadedFile(f"policy-{p.pk}.txt", DATA_TEXT),
+                creator=u,
+            )
+            for p in (p1, p2)
+        ]
+
+        assert a1.blob_id == a2.blob_id
+        assert a1.upload.name == a2.upload.name == blob_file_name(a1.file_hash)
+        assert ArtifactBlob.objects.get(pk=a1.blob_id).ref_count == 2
+        assert [f.name for f in tmp_path.glob("artifacts/**/*") if f.is_file()] == [
+            a1.file_hash
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_release_blob(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        p, u = PlanFactory(), UserFactory()
+        a1, a2 = [
+            FileArtifact.objects.create(
+                name=name,
+                plan=p,
+                upload=SimpleUploadedFile(name, DATA_TEXT),
+                creator=u,
+            )
+            for name in ("a.txt", "b.txt")
+        ]
+        path = tmp_path / a1.upload.name
+
+        a1.delete()
+        assert ArtifactBlob.objects.get(pk=a2.blob_id).ref_count == 1
+        assert path.exists()
+
+        a2.delete()
+        assert not ArtifactBlob.objects.exists()
+        assert not path.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_concurrent_first_uploads(self, settings, tmp_path, monkeypatch):
+        settings.MEDIA_ROOT = tmp_path
+        p, u = PlanFactory(), UserFactory()
+        storage = FileArtifact.upload.field.storage
+        exists = storage.exists
+        # Both uploads check for the file together unless the blob lock
+        # keeps the second one out until the first has written it.
+        barrier = threading.Barrier(2, timeout=1)
+
+        def racing_exists(name):
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+            return exists(name)
+
+        monkeypatch.setattr(storage, "exists", racing_exists)
+
+        def upload(name):
+            try:
+                FileArtifact.objects.create(
+                    name=name,
+                    plan=p,
+                    upload=SimpleUploadedFile(name, DATA_TEXT),
+                    creator=u,
+                )
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=upload, args=(name,)) for name in ("a.txt", "b.txt")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        blob = ArtifactBlob.objects.get()
+        assert blob.ref_count == 2
+        assert set(FileArtifact.objects.values_list("upload", flat=True)) == {
+            blob.file_name
+        }
+        assert [f.name for f in tmp_path.glob("artifacts/**/*") if f.is_file()] == [
+            blob.file_hash
+        ]
+
+
+class TestPlanRollup:
+    def rollup_counts(self, plan, family):
+        return PlanRollup.objects.filter(plan=plan, family=family).values(
+            "control_count", "draft", "pending_approval", "approved", "published"
+        )[0]
+
+    def test_record_entry(self):
+        root = ControlFactory(is_placeholder=True)
+        family = ControlFactory(parent=root, is_placeholder=True)
+        control = ControlFactory(parent=family)
+        ControlFactory(parent=control)
+        p = PlanFactory(root_control=root)
+        assert self.rollup_counts(p, family) == {
+            "control_count": 2,
+            "draft": 0,
+            "pending_approval": 0,
+            "approved": 0,
+            "published": 0,
+        }
+
+        e = EntryFactory(plan=p, control=control)
+        assert self.rollup_counts(p, family)["published"] == 1
+
+        d = DetailFactory(entry=e, plan=p, status=Detail.DRAFT)
+        counts = self.rollup_counts(p, family)
+        assert (counts["draft"], counts["published"]) == (1, 0)
+
+        d.status = Detail.PENDING_APPROVAL
+        d.save()
+        counts = self.rollup_counts(p, family)
+        assert (counts["draft"], counts["approved"]) == (0, 1)
+
+        u = UserFactory()
+        e.approvers.add(u)
+        counts = self.rollup_counts(p, family)
+        assert (counts["pending_approval"], counts["approved"]) == (1, 0)
+
+        Approval.objects.create(user=u, detail=d, plan=p)
+        counts = self.rollup_counts(p, family)
+        assert (counts["pending_approval"], counts["approved"]) == (0, 1)
+
+        d.status = Detail.PUBLISHED
+        d.save()
+        counts = self.rollup_counts(p, family)
+        assert (counts["approved"], counts["published"]) == (0, 1)
+
+        e.delete()
+        assert self.rollup_counts(p, family)["published"] == 0
+
+    def test_rebuild(self):
+        root = ControlFactory(is_placeholder=True)
+        family = ControlFactory(parent=root, is_placeholder=True)
+        c1 = ControlFactory(parent=family)
+        c2 = ControlFactory(parent=family)
+        p = PlanFactory(root_control=root)
+        e1 = EntryFactory(plan=p, control=c1)
+        e2 = EntryFactory(plan=p, control=c2)
+        DetailFactory(entry=e2, plan=p, status=Detail.DRAFT)
+        expected = {
+            "control_count": 2,
+            "draft": 1,
+            "pending_approval": 0,
+            "approved": 0,
+            "published": 1,
+        }
+
+        PlanRollup.objects.filter(plan=p).update(draft=0, published=7)
+        Entry.objects.filter(plan=p).update(rollup_state="")
+        call_command("rebuild_rollups", str(p.pk))
+
+        assert self.rollup_counts(p, family) == expected
+        e1.refresh_from_db()
+        assert e1.rollup_state == PlanRollup.PUBLISHED
@@ -0,0 +1,143 @@
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from PIL import Image
+
+from ssp.jobs.models import Job
+from ssp.jobs.queue import work
+from ssp.plans import tasks
+from ssp.plans.models import ArtifactBlob, FileArtifact
+from ssp.plans.previews import RENDITIONS, render_previews
+from ssp.plans.tests.factories import PlanFactory
+from ssp.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def png(size=(2000, 1000), mode="RGBA"):
+    buffer = io.BytesIO()
+    Image.new(mode, size, "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def upload(data, user=None, name="screenshot.png"):
+    user = user or UserFactory()
+    return FileArtifact.objects.create(
+        name="Screenshot",
+        plan=PlanFactory(creator=user),
+        upload=SimpleUploadedFile(name, data),
+        creator=user,
+    )
+
+
+def test_render_previews():
+    renditions = render_previews(io.BytesIO(png()))
+
+    assert set(renditions) == set(RENDITIONS)
+    assert Image.open(io.BytesIO(renditions["thumbnail"])).size == (256, 128)
+    preview = Image.open(io.BytesIO(renditions["preview"]))
+    assert preview.format == "JPEG"
+    assert preview.size == (1280, 640)
+
+    assert render_previews(io.BytesIO(b"%PDF-1.4 not an image")) == {}
+
+
+def test_previews_shared_by_content(monkeypatch):
+    renders = []
+
+    def counting_render_previews(f):
+        renders.append(f.name)
+        return render_previews(f)
+
+    monkeypatch.setattr(tasks, "render_previews", counting_render_previews)
+    data = png()
+    first, second = upload(data), upload(data, name="copy.png")
+
+    work()
+
+    blob = ArtifactBlob.objects.get()
+    assert blob.has_previews
+    assert len(renders) == 1
+    storage = first.upload.storage
+    for rendition in RENDITIONS:
+        assert storage.exists(blob.rendition_name(rendition))
+
+    third = upload(data)
+    work()
+    assert len(renders) == 1
+    assert {first.plan_id, second.plan_id, third.plan_id} == set(
+        FileArtifact.objects.filter(blob=blob).values_list("plan", flat=True)
+    )
+
+
+def test_no_previews_for_other_files():
+    artifact = upload(b"%PDF-1.4\n" + b"x" * 100, name="report.pdf")
+    work()
+
+    assert not ArtifactBlob.objects.get(pk=artifact.blob_id).has_previews
+    assert not Job.objects.filter(task="ssp.plans.tasks.create_previews").exists()
+
+
+def test_create_previews_command():
+    upload(png())
+    Job.objects.filter(task="ssp.plans.tasks.process_artifact").delete()
+    FileArtifact.objects.update(mime_type="image/png")
+
+    call_command("create_previews")
+    work()
+
+    assert ArtifactBlob.objects.get().has_previews
+
+
+def test_preview_view(client):
+    user = UserFactory()
+    artifact = upload(png(), user=user)
+    args = [artifact.plan_id, artifact.pk, "thumbnail", artifact.file_hash]
+    url = reverse("plans:fileartifact-preview", args=args)
+    client.force_login(user)
+
+    assert client.get(url).status_code == 404
+    work()
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "image/jpeg"
+    assert (
+        response["Content-Disposition"] == 'inline; filename="screenshot-thumbnail.jpg"'
+    )
+    assert "max-age=31536000" in response["Cache-Control"]
+    assert "immutable" in response["Cache-Control"]
+    assert Image.open(io.BytesIO(b"".join(response.streaming_content))).size == (
+        256,
+        128,
+    )
+    assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+    args[2] = "poster"
+    assert (
+        client.get(reverse("plans:fileartifact-preview", args=args)).status_code == 404
+    )
+    args[2:] = ["thumbnail", "0" * 64]
+    assert (
+        client.get(reverse("plans:fileartifact-preview", args=args)).status_code == 404
+    )
+
+    response = client.get(
+        reverse("plans:fileartifact-detail", args=[artifact.plan_id, artifact.pk])
+    )
+    assert url in response.content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_previews_removed_with_blob():
+    artifact = upload(png())
+    work()
+    blob = ArtifactBlob.objects.get()
+
+    artifact.delete()
+
+    for rendition in RENDITIONS:
+        assert not artifact.upload.storage.exists(blob.rendition_name(rendition))
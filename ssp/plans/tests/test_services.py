@@ -0,0 +1,212 @@
+import hashlib
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Sum
+
+from ssp.controls.tests.factories import ControlFactory
+from ssp.plans.models import (
+    Approval,
+    ArtifactBlob,
+    Detail,
+    Entry,
+    FileArtifact,
+    PlanRollup,
+)
+from ssp.plans.services import (
+    ADD,
+    APPROVED,
+    FORBIDDEN,
+    NOT_FOUND,
+    NOT_PENDING,
+    REMOVE,
+    REPLACE,
+    UNAPPROVED,
+    UNCHANGED,
+    assign_people,
+    batch_approve,
+    dedup_artifacts,
+    materialize_entries,
+)
+from ssp.plans.tests.factories import DetailFactory, EntryFactory, PlanFactory
+from ssp.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestMaterializeEntries:
+    def test_materialize_entries(self, django_assert_max_num_queries):
+        root = ControlFactory(is_placeholder=True)
+        family = ControlFactory(parent=root, is_placeholder=True)
+        controls = [ControlFactory(parent=family) for i in range(5)]
+        ControlFactory(parent=controls[0], is_withdrawn=True)
+        p = PlanFactory(root_control=root)
+        existing = EntryFactory(plan=p, control=controls[0])
+
+        with django_assert_max_num_queries(12):
+            assert materialize_entries(p) == 4
+
+        assert set(Entry.objects.filter(plan=p).values_list("control", flat=True)) == {
+            c.pk for c in controls
+        }
+        details = Detail.objects.filter(plan=p).exclude(entry=existing)
+        assert details.count() == 4
+        detail = details.first()
+        assert detail.status == Detail.PUBLISHED
+        assert detail.text_html == "<p>entry created</p>"
+        assert detail.search_vector is not None
+
+        rollup = PlanRollup.objects.get(plan=p, family=family)
+        assert rollup.published == 5
+        Detail.objects.filter(pk=detail.pk).delete()
+        rollup.refresh_from_db()
+        assert rollup.published == 4
+
+        assert materialize_entries(p) == 0
+
+    def test_materialize_entries_command(self):
+        root = ControlFactory(is_placeholder=True)
+        ControlFactory(parent=root)
+        p = PlanFactory(root_control=root)
+
+        call_command("materialize_entries", str(p.pk))
+
+        assert Entry.objects.filter(plan=p).count() == 1
+
+
+class TestAssignPeople:
+    def test_assign_people(self):
+        root = ControlFactory(is_placeholder=True)
+        family = ControlFactory(parent=root, is_placeholder=True)
+        c1 = ControlFactory(parent=family)
+        c2 = ControlFactory(parent=c1)
+        other = ControlFactory(parent=root)
+        p = PlanFactory(root_control=root)
+        u1, u2, u3 = UserFactory.create_batch(3)
+        e1 = EntryFactory(plan=p, control=c1)
+        e1.observers.add(u3)
+
+        summary = assign_people(
+            p, family, {"approvers": [u1, u2], "observers": [u1]}, ADD
+        )
+
+        assert summary == {
+            "entries": 2,
+            "roles": {
+                "approvers": {"added": 4, "removed": 0},
+                "observers": {"added": 2, "removed": 0},
+            },
+        }
+        e2 = Entry.objects.get(plan=p, control=c2)
+        assert set(e2.approvers.all()) == {u1, u2}
+        assert set(e1.observers.all()) == {u1, u3}
+        # Only the assigned subtree is materialized.
+        assert not Entry.objects.filter(plan=p, control=other).exists()
+
+        summary = assign_people(p, c1, {"observers": [u1]}, REPLACE)
+        assert summary["roles"] == {"observers": {"added": 0, "removed": 1}}
+        assert list(e1.observers.all()) == [u1]
+
+        summary = assign_people(p, family, {"approvers": [u2]}, REMOVE)
+        assert summary["roles"] == {"approvers": {"added": 0, "removed": 2}}
+        assert list(e2.approvers.all()) == [u1]
+
+    def test_assign_people_rollup(self):
+        root = ControlFactory(is_placeholder=True)
+        family = ControlFactory(parent=root, is_placeholder=True)
+        c = ControlFactory(parent=family)
+        p = PlanFactory(root_control=root)
+        e = EntryFactory(plan=p, control=c)
+        DetailFactory(entry=e, plan=p, status=Detail.PENDING_APPROVAL)
+        assert PlanRollup.objects.get(plan=p, family=family).approved == 1
+
+        assign_people(p, family, {"approvers": [UserFactory()]}, ADD)
+
+        rollup = PlanRollup.objects.get(plan=p, family=family)
+        assert (rollup.pending_approval, rollup.approved) == (1, 0)
+
+
+class TestBatchApprove:
+    def test_batch_approve(self):
+        p = PlanFactory()
+        u = UserFactory()
+        pending = []
+        for i in range(3):
+            e = EntryFactory(plan=p, control=ControlFactory())
+            e.approvers.add(u)
+            pending.append(
+                DetailFactory(entry=e, plan=p, status=Detail.PENDING_APPROVAL)
+            )
+        forbidden = DetailFactory(plan=p, status=Detail.PENDING_APPROVAL)
+        published = Detail.objects.get(entry=pending[0].entry, status=Detail.PUBLISHED)
+        Approval.objects.create(user=u, detail=pending[2], plan=p)
+
+        results = batch_approve(
+            u,
+            [pending[0].pk, pending[1].pk, pending[2].pk, forbidden.pk]
+            + [published.pk, 99999],
+        )
+
+        assert [r["result"] for r in results] == [
+            APPROVED,
+            APPROVED,
+            UNCHANGED,
+            FORBIDDEN,
+            NOT_PENDING,
+            NOT_FOUND,
+        ]
+        assert Approval.objects.filter(user=u).count() == 3
+        assert (
+            Detail.objects.filter(pk__in=[d.pk for d in pending], is_ready=True).count()
+            == 3
+        )
+        assert PlanRollup.objects.filter(plan=p).aggregate(n=Sum("approved"))["n"] == 3
+
+        results = batch_approve(u, [pending[0].pk], approve=False)
+        assert results == [{"detail": pending[0].pk, "result": UNAPPROVED}]
+        assert not Approval.objects.filter(user=u, detail=pending[0]).exists()
+        pending[0].refresh_from_db()
+        assert pending[0].is_ready is False
+
+
+class TestDedupArtifacts:
+    @pytest.mark.django_db(transaction=True)
+    def test_dedup_artifacts(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        p, u = PlanFactory(), UserFactory()
+        legacy = tmp_path / "artifacts"
+        legacy.mkdir()
+        for name, data in (("a", b"policy"), ("b", b"policy"), ("c", b"scan")):
+            (legacy / f"20200101000000-{name}.txt").write_bytes(data)
+        # Rows from before the blob store, the first one was never hashed.
+        FileArtifact.objects.bulk_create(
+            [
+                FileArtifact(
+                    name=name,
+                    plan=p,
+                    creator=u,
+                    upload=f"artifacts/20200101000000-{name}.txt",
+                    file_hash=file_hash,
+                    size=size,
+                )
+                for name, file_hash, size in (
+                    ("a", None, None),
+                    ("b", hashlib.sha256(b"policy").hexdigest(), 6),
+                    ("c", hashlib.sha256(b"scan").hexdigest(), 4),
+                    ("d", None, None),
+                )
+            ]
+        )
+
+        assert dedup_artifacts() == {"artifacts": 3, "removed": 3, "missing": 1}
+        a, b, c = FileArtifact.objects.exclude(name="d").order_by("name")
+        assert a.blob_id == b.blob_id != c.blob_id
+        assert a.upload.name == b.upload.name
+        assert a.file_hash == b.file_hash and a.size == 6
+        assert ArtifactBlob.objects.get(pk=a.blob_id).ref_count == 2
+        assert sorted(f.read_bytes() for f in legacy.glob("**/*") if f.is_file()) == [
+            b"policy",
+            b"scan",
+        ]
+
+        assert dedup_artifacts() == {"artifacts": 0, "removed": 0, "missing": 1}
@@ -0,0 +1,140 @@
+import hashlib
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ssp.jobs.models import Job
+from ssp.jobs.queue import work
+from ssp.plans.models import FileArtifact
+from ssp.plans.tests.factories import PlanFactory
+from ssp.plans.uploads import FileDigest, sniff_mime_type, type_meta_data
+from ssp.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+PDF = b"%PDF-1.4\n" + b"x" * 5000
+
+
+@pytest.fixture
+def admin_client(client):
+    u = UserFactory(is_superuser=True)
+    u.set_password("test")
+    u.save()
+    client.login(username=u.username, password="test")
+    return client
+
+
+def digest_of(data):
+    digest = FileDigest()
+    for i in range(0, len(data), 7):
+        digest.update(data[i : i + 7])
+    return digest
+
+
+def test_sniff_mime_type():
+    assert sniff_mime_type(PDF[:16]) == "application/pdf"
+    assert sniff_mime_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+    assert sniff_mime_type(b"plain text") is None
+
+
+def test_file_digest():
+    digest = digest_of(PDF)
+    assert digest.size == len(PDF)
+    assert digest.head == PDF[:16]
+    assert digest.hexdigest() == hashlib.sha256(PDF).hexdigest()
+
+
+def test_type_meta_data():
+    # Magic bytes win over the name, the name refines generic containers.
+    assert type_meta_data("scan.txt", PDF[:16])["mime_type"] == "application/pdf"
+    meta_data = type_meta_data("policy.docx", b"PK\x03\x04" + b"0" * 12)
+    assert meta_data["mime_type"].endswith("wordprocessingml.document")
+    assert type_meta_data("notes.md", b"# notes")["mime_type"] == "text/markdown"
+    assert type_meta_data("log.txt.gz", b"\x1f\x8b")["file_encoding"] == "gzip"
+    assert type_meta_data("scan.bin") == {
+        "mime_type": "application/octet-stream",
+        "file_extension": "bin",
+    }
+
+
+@pytest.mark.parametrize("max_memory_size", [2621440, 1024])
+def test_upload_meta_data(admin_client, settings, tmp_path, max_memory_size):
+    settings.MEDIA_ROOT = tmp_path
+    p = PlanFactory()
+
+    with override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=max_memory_size):
+        response = admin_client.post(
+            reverse("plans:plan-create-fileartifact", args=[p.pk]),
+            {"name": "scan", "upload": SimpleUploadedFile("scan.bin", PDF)},
+        )
+    assert response.status_code == 302
+    assert FileArtifact.objects.get(plan=p).status == FileArtifact.PROCESSING
+    work()
+
+    a = FileArtifact.objects.get(plan=p)
+    assert a.status == FileArtifact.READY
+    assert a.file_name == "scan.bin"
+    assert a.size == len(PDF)
+    assert a.file_hash == hashlib.sha256(PDF).hexdigest()
+    assert a.mime_type == "application/pdf"
+    assert a.file_extension == "pdf"
+    with a.upload.open("rb") as f:
+        assert f.read() == PDF
+
+
+def test_upload_processing_failed(admin_client, settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    p = PlanFactory()
+
+    def broken(*args, **kwargs):
+        raise ValueError("broken")
+
+    monkeypatch.setattr("ssp.plans.tasks.type_meta_data", broken)
+    admin_client.post(
+        reverse("plans:plan-create-fileartifact", args=[p.pk]),
+        {"name": "scan", "upload": SimpleUploadedFile("scan.bin", PDF)},
+    )
+    Job.objects.update(max_attempts=1)
+    work()
+
+    a = FileArtifact.objects.get(plan=p)
+    assert Job.objects.get().status == Job.FAILED
+    assert a.status == FileArtifact.READY
+    assert a.size == len(PDF)
+    assert a.file_extension == "unknown"
+
+
+def test_upload_single_write(admin_client, settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    p = PlanFactory()
+    monkeypatch.setattr(
+        FileArtifact.upload.field.storage,
+        "open",
+        lambda *args, **kwargs: pytest.fail("stored upload was read back"),
+    )
+
+    with CaptureQueriesContext(connection) as context:
+        admin_client.post(
+            reverse("plans:plan-create-fileartifact", args=[p.pk]),
+            {"name": "scan", "upload": SimpleUploadedFile("scan.bin", PDF)},
+        )
+    writes = [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith(
+            (
+                'INSERT INTO "plans_fileartifact"',
+                'UPDATE "plans_fileartifact" SET "name"',
+            )
+        )
+    ]
+    assert len(writes) == 1
+    assert FileArtifact.objects.get(plan=p).file_hash
+
+    # The job sniffs the type from the head captured during the upload.
+    work()
+    assert FileArtifact.objects.get(plan=p).mime_type == "application/pdf"
@@ -1,18 +1,28 @@
+import csv
+import hashlib
+import io
+import json
+import zipfile
+
 import pytest
 from django.contrib.auth.models import Permission
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.exceptions import PermissionDenied
 from django.http.response import Http404
 from django.test import RequestFactory
-from django.urls import reverse
+from django.urls import resolve, reverse
+from django.utils.text import slugify
 
 from ssp.controls.tests.factories import ControlFactory
-from ssp.plans.models import Approval, Detail, Entry, Plan
+from ssp.jobs.queue import work
+from ssp.plans.models import Approval, Detail, Entry, FileArtifact, Plan, PlanRollup
 from ssp.plans.tests.factories import DetailFactory, EntryFactory, PlanFactory
 from ssp.plans.views import (
     PlanCreateView,
     PlanDetailView,
     plan_control_entry,
 )
+from ssp.plans.entry_state import load_entry_state
 from ssp.users.tests.factories import UserFactory
 
 pytestmark = pytest.mark.django_db
@@ -63,6 +73,74 @@ class TestPlanViews:
 
         p = Plan.objects.get(title="test")
         assert p.creator.pk == request.user.pk
+        assert not Entry.objects.filter(plan=p).exists()
+
+    def test_PlanCreateView_materialize_entries(self, request_factory, user):
+        root = ControlFactory(is_placeholder=True)
+        c = ControlFactory(parent=root)
+        request = request_factory.post(
+            reverse("plans:create"),
+            {
+                "title": "test",
+                "description": "test",
+                "root_control": root.pk,
+                "materialize_entries": "on",
+            },
+        )
+        request.user = user
+        PlanCreateView.as_view()(request)
+
+        p = Plan.objects.get(title="test")
+        assert Entry.objects.get(plan=p).control == c
+
+    def test_PlanListView(self, client, user, django_assert_num_queries):
+        plans = PlanFactory.create_batch(3)
+        e = EntryFactory(plan=plans[0], control=ControlFactory())
+        DetailFactory(entry=e, plan=plans[0], status=Detail.PENDING_APPROVAL)
+
+        client.login(username=user.username, password="test")
+        # session, user, plans, savepoints and template permission checks
+        with django_assert_num_queries(7):
+            response = client.get(reverse("plans:list"))
+        assert response.status_code == 200
+        plan = response.context["plan_list"][0]
+        assert (plan.entry_count, plan.pending_approval_count) == (1, 1)
+        assert plan.last_activity is not None
+
+        response = client.get(reverse("plans:list"), {"order": "created"})
+        assert response.context["plan_list"][0] == plans[-1]
+
+        response = client.get(reverse("plans:list"), {"after": "bad"})
+        assert response.status_code == 404
+
+    def test_InboxView(self, client, user):
+        d1 = DetailFactory(status=Detail.PENDING_APPROVAL)
+        d1.entry.approvers.add(user)
+        d2 = DetailFactory(status=Detail.DRAFT)
+        d2.entry.collaborators.add(user)
+        d2.entry.observers.add(user)
+        published = DetailFactory(status=Detail.PUBLISHED)
+        published.entry.approvers.add(user)
+        DetailFactory(status=Detail.DRAFT)
+
+        client.login(username=user.username, password="test")
+        response = client.get(reverse("plans:inbox"))
+        assert response.status_code == 200
+        assert list(response.context["detail_list"]) == [d2, d1]
+        counts = response.context["counts"]
+        assert counts["total"] == 2
+        assert counts["awaiting_approval"] == 1
+        assert counts["roles"]["collaborator"] == {"D": 1, "PA": 0}
+
+        response = client.get(
+            reverse("plans:inbox"), {"role": "approver", "format": "json"}
+        )
+        data = response.json()
+        assert [r["detail"] for r in data["results"]] == [d1.pk]
+        assert data["results"][0]["is_approved"] is False
+
+        response = client.get(reverse("plans:inbox"), {"status": "D"})
+        assert list(response.context["detail_list"]) == [d2]
 
     def test_PlanDetailView_no_control_slug(self, request_factory, user):
         p = PlanFactory(creator=user)
@@ -78,6 +156,48 @@ class TestPlanViews:
         assert "observing" in response.context_data
         assert "approved" in response.context_data
 
+    def test_PlanDetailView_dashboard(
+        self, request_factory, user, django_assert_num_queries
+    ):
+        root = ControlFactory()
+        ControlFactory(parent=root)
+        p = PlanFactory(creator=user, root_control=root)
+        approve = EntryFactory(plan=p, control=ControlFactory(parent=root))
+        approve.approvers.add(user)
+        pending = DetailFactory(
+            entry=approve, plan=p, status=Detail.PENDING_APPROVAL
+        )
+        collaborate = EntryFactory(plan=p, control=ControlFactory(parent=root))
+        collaborate.collaborators.add(user)
+        collaborate.observers.add(user)
+        draft = DetailFactory(entry=collaborate, plan=p, status=Detail.DRAFT)
+        EntryFactory(plan=p, control=ControlFactory(parent=root)).observers.add(
+            UserFactory()
+        )
+
+        request = request_factory.get(p.get_absolute_url())
+        request.user = user
+        with django_assert_num_queries(4):
+            response = PlanDetailView.as_view()(request, pk=p.pk)
+
+        assert response.context_data["pending_approval"] == [pending]
+        assert response.context_data["pending_approval_count"] == 1
+        assert response.context_data["collaborating"] == [draft]
+        assert response.context_data["observing"] == [draft]
+        assert response.context_data["approved"] == []
+        assert len(response.context_data["control_list"]) == 4
+
+        with django_assert_num_queries(1):
+            PlanDetailView.as_view()(request, pk=p.pk)
+
+        Approval.objects.create(detail=pending, user=user, plan=p)
+        response = PlanDetailView.as_view()(request, pk=p.pk)
+        assert response.context_data["approved"] == [pending.pk]
+
+        approve.approvers.remove(user)
+        response = PlanDetailView.as_view()(request, pk=p.pk)
+        assert response.context_data["pending_approval"] == []
+
     def test_PlanDetailView_control_slug(self, request_factory, user):
         p = PlanFactory(creator=user)
         c = ControlFactory()
@@ -91,6 +211,169 @@ class TestPlanViews:
         assert "control" in response.context_data
         assert "control_list" in response.context_data
 
+    @pytest.mark.parametrize("slug", ["search", "people", "rollup"])
+    def test_plan_control_detail_reserved_slugs(self, client, user, slug):
+        root = ControlFactory()
+        c = ControlFactory(parent=root, slug=slug)
+        p = PlanFactory(creator=user, root_control=root)
+
+        client.login(username=user.username, password="test")
+        url = reverse("plans:plan-control-detail", args=[p.pk, c.slug])
+        assert resolve(url).url_name == "plan-control-detail"
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.context["control"] == c
+
+    def test_plan_control_subtree(self, client, user, settings):
+        root = ControlFactory()
+        family = ControlFactory(parent=root)
+        children = [ControlFactory(parent=family) for _ in range(3)]
+        ControlFactory(parent=children[0])
+        p = PlanFactory(creator=user, root_control=root)
+
+        client.login(username=user.username, password="test")
+        url = reverse("plans:plan-control-subtree", args=[p.pk, family.slug])
+        response = client.get(url, {"format": "json"})
+        assert response.status_code == 200
+        data = response.json()
+        assert [c["slug"] for c in data["results"]] == [c.slug for c in children]
+        assert data["results"][0]["descendant_count"] == 1
+        assert data["has_next"] is False
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert list(response.context["control_list"]) == children
+
+        other = ControlFactory()
+        response = client.get(
+            reverse("plans:plan-control-subtree", args=[p.pk, other.slug])
+        )
+        assert response.status_code == 404
+
+    def test_plan_control_subtree_paginated(self, client, user, monkeypatch):
+        monkeypatch.setattr("ssp.plans.views.SUBTREE_PAGE_SIZE", 2)
+        root = ControlFactory()
+        children = [ControlFactory(parent=root) for _ in range(3)]
+        p = PlanFactory(creator=user, root_control=root)
+
+        client.login(username=user.username, password="test")
+        url = reverse("plans:plan-control-subtree", args=[p.pk, root.slug])
+        data = client.get(url, {"format": "json"}).json()
+        assert data["has_next"] is True
+        assert data["num_pages"] == 2
+
+        data = client.get(url, {"format": "json", "page": 2}).json()
+        assert [c["slug"] for c in data["results"]] == [children[2].slug]
+
+    def test_PlanSearchView(self, client, user):
+        root = ControlFactory()
+        family = ControlFactory(parent=root, name="Identification", body="Use MFA.")
+        control = ControlFactory(parent=family, name="Authenticator Management")
+        ControlFactory(name="Unrelated MFA control")
+        p = PlanFactory(creator=user, root_control=root)
+        e = EntryFactory(plan=p, control=control)
+        published = Detail.objects.get(entry=e)
+        published.text = "Old MFA text"
+        published.save()
+        DetailFactory(entry=e, plan=p, status=Detail.PUBLISHED, text="MFA is enforced")
+        FileArtifact.objects.create(
+            name="MFA enrollment report",
+            plan=p,
+            upload=SimpleUploadedFile("mfa.txt", b"mfa"),
+            creator=user,
+        )
+
+        client.login(username=user.username, password="test")
+        response = client.get(reverse("plans:search", args=[p.pk]), {"q": "mfa"})
+        assert response.status_code == 200
+        results = response.context["object_list"]
+        assert sorted(r["kind"] for r in results) == ["artifact", "control", "detail"]
+        assert [r["object_pk"] for r in results if r["kind"] == "control"] == [
+            family.pk
+        ]
+
+        response = client.get(reverse("plans:search", args=[p.pk]))
+        assert response.status_code == 200
+        assert list(response.context["object_list"]) == []
+
+    def test_plan_rollup_views(self, client, user):
+        root = ControlFactory(is_placeholder=True)
+        family = ControlFactory(parent=root, is_placeholder=True)
+        control = ControlFactory(parent=family)
+        p = PlanFactory(root_control=root)
+        EntryFactory(plan=p, control=control)
+
+        client.login(username=user.username, password="test")
+        response = client.get(reverse("plans:rollup"))
+        assert response.status_code == 200
+        plan = response.context["plan_list"].get(pk=p.pk)
+        assert (plan.control_count, plan.published) == (1, 1)
+
+        response = client.get(reverse("plans:plan-rollup", args=[p.pk]))
+        assert response.status_code == 200
+        assert [r.family for r in response.context["rollup_list"]] == [family]
+
+    def test_withdrawn_controls_hidden(self, client, user):
+        root = ControlFactory(is_placeholder=True)
+        family = ControlFactory(parent=root, is_placeholder=True)
+        control = ControlFactory(parent=family, name="MFA enforcement")
+        ControlFactory(parent=family, name="Retired MFA control", is_withdrawn=True)
+        p = PlanFactory(root_control=root)
+        EntryFactory(plan=p, control=control)
+        PlanRollup.objects.rebuild(p)
+
+        client.login(username=user.username, password="test")
+        response = client.get(reverse("plans:plan-rollup", args=[p.pk]))
+        assert [r.control_count for r in response.context["rollup_list"]] == [1]
+
+        data = client.get(
+            reverse("plans:plan-control-subtree", args=[p.pk, family.slug]),
+            {"format": "json"},
+        ).json()
+        assert [c["slug"] for c in data["results"]] == [control.slug]
+
+        response = client.get(reverse("plans:search", args=[p.pk]), {"q": "mfa"})
+        assert [
+            r["object_pk"]
+            for r in response.context["object_list"]
+            if r["kind"] == "control"
+        ] == [control.pk]
+
+    def test_bulk_assign_people(self, client, user):
+        root = ControlFactory(is_placeholder=True)
+        c = ControlFactory(parent=root)
+        p = PlanFactory(root_control=root)
+        u = UserFactory()
+
+        client.login(username=user.username, password="test")
+        response = client.get(reverse("plans:bulk-assign-people", args=[p.pk]))
+        assert response.status_code == 200
+
+        response = client.post(
+            reverse("plans:bulk-assign-people", args=[p.pk]),
+            {"control": root.slug, "operation": "add", "approvers": [u.pk]},
+        )
+        assert response.status_code == 302
+        assert list(Entry.objects.get(plan=p, control=c).approvers.all()) == [u]
+
+        response = client.post(
+            reverse("plans:bulk-assign-people", args=[p.pk]),
+            json.dumps({"control": c.slug, "operation": "remove", "approvers": [u.pk]}),
+            content_type="application/json",
+        )
+        assert response.json() == {
+            "entries": 1,
+            "roles": {"approvers": {"added": 0, "removed": 1}},
+        }
+
+        response = client.post(
+            reverse("plans:bulk-assign-people", args=[p.pk]),
+            json.dumps({"control": ControlFactory().slug, "operation": "add"}),
+            content_type="application/json",
+        )
+        assert response.status_code == 400
+        assert "control" in response.json()["errors"]
+
     def test_plan_control_entry(self, request_factory, user):
         p = PlanFactory(creator=user)
 
@@ -176,6 +459,105 @@ class TestPlanViews:
         assert response.context["can_collaborate"] is False
         assert response.context["approval"] is None
 
+    def entry_with_people(self, user, approvers=2, observers=1, artifacts=1):
+        p = PlanFactory(creator=user)
+        c = ControlFactory()
+        e = EntryFactory(plan=p, control=c)
+        d = DetailFactory(entry=e, plan=p, status=Detail.PENDING_APPROVAL)
+        people = UserFactory.create_batch(approvers)
+        e.approvers.add(user, *people)
+        e.collaborators.add(user)
+        e.observers.add(*UserFactory.create_batch(observers))
+        Approval.objects.create(detail=d, user=people[0], plan=p)
+        for i in range(artifacts):
+            d.file_artifacts.add(
+                FileArtifact.objects.create(
+                    plan=p,
+                    creator=user,
+                    name=f"artifact {i}",
+                    upload=SimpleUploadedFile(f"a{i}.txt", b"data"),
+                )
+            )
+        return p, c, d
+
+    def test_load_entry_state_queries(self, user, django_assert_num_queries):
+        p, c, d = self.entry_with_people(user)
+
+        with django_assert_num_queries(5):
+            state = load_entry_state(p.pk, c, user)
+
+        assert state["detail"] == d
+        assert state["can_approve"] and state["can_collaborate"]
+        assert state["approval"] is None
+        assert len(state["approver_list"]) == 3
+        assert len(state["observer_list"]) == 1
+        assert [a.user for a in state["approval_list"]] == [
+            state["approval_list"][0].user
+        ]
+        assert len(state["artifact_list"]) == 1
+        assert state["detail"].is_ready is False
+
+    def test_plan_control_entry_queries(self, client, user, django_assert_num_queries):
+        client.login(username=user.username, password="test")
+        for size in (1, 4):
+            p, c, d = self.entry_with_people(
+                user, approvers=size, observers=size, artifacts=size
+            )
+            url = reverse("plans:plan-control-entry", args=[p.pk, c.slug])
+            client.get(url)
+            # session, user, the five entry queries, savepoints and template
+            # permission checks
+            with django_assert_num_queries(11):
+                response = client.get(url)
+            assert response.status_code == 200
+
+    def test_entry_history(self, client, user, monkeypatch):
+        p = PlanFactory(creator=user)
+        e = EntryFactory(plan=p, control=ControlFactory())
+        for i in range(3):
+            d = DetailFactory(entry=e, plan=p, status=Detail.PUBLISHED)
+            Approval.objects.create(detail=d, user=UserFactory(), plan=p)
+        monkeypatch.setattr("ssp.plans.views.HISTORY_PAGE_SIZE", 2)
+
+        client.login(username=user.username, password="test")
+        url = reverse("plans:entry-history", args=[e.pk])
+        response = client.get(url)
+        assert response.status_code == 200
+        page = response.context["detail_list"]
+        assert page.paginator.count == 4
+        assert page[0] == d
+        assert len(page[0].approval_list) == 1
+
+        response = client.get(url, {"page": 2})
+        assert len(response.context["detail_list"]) == 2
+
+    def test_detail_diff(self, client, user, monkeypatch):
+        p = PlanFactory(creator=user)
+        e = EntryFactory(plan=p, control=ControlFactory())
+        first = Detail.objects.get(entry=e)
+        d = DetailFactory(entry=e, plan=p, text="entry <b>changed</b>")
+
+        client.login(username=user.username, password="test")
+        response = client.get(reverse("plans:detail-diff", args=[d.pk]))
+        assert response.status_code == 200
+        assert response.context["previous"] == first
+        content = response.content.decode()
+        assert '<span class="text-danger">-entry created</span>' in content
+        assert "+entry &lt;b&gt;changed&lt;/b&gt;" in content
+
+        def fail(*args):
+            pytest.fail("diff should be cached")
+
+        monkeypatch.setattr("ssp.plans.history.render_diff", fail)
+        response = client.get(reverse("plans:detail-diff", args=[d.pk]))
+        assert response.status_code == 200
+
+        d.text = "edited again"
+        d.save()
+        monkeypatch.undo()
+        response = client.get(reverse("plans:detail-diff", args=[d.pk]))
+        assert "+edited again" in response.content.decode()
+
     def test_create_detail(self, client, user):
         client.login(username=user.username, password="test")
         response = client.get(reverse("plans:create-detail", args=[99999]))
@@ -224,6 +606,49 @@ class TestPlanViews:
         response = client.get(reverse("plans:toggle-approve-detail", args=[d.pk]))
         assert response.status_code != 403
 
+    def test_toggle_approval_uses_pk(self, client, user):
+        p = PlanFactory(creator=user)
+        other = DetailFactory(plan=p, status=Detail.PENDING_APPROVAL)
+        d = DetailFactory(plan=p, status=Detail.PENDING_APPROVAL)
+
+        client.login(username=user.username, password="test")
+        client.get(reverse("plans:toggle-approve-detail", args=[d.pk]))
+
+        assert Approval.objects.filter(detail=d, user=user).exists()
+        assert not Approval.objects.filter(detail=other).exists()
+
+    def test_batch_detail_approval(self, client):
+        u = UserFactory()
+        u.set_password("test")
+        u.save()
+        d1 = DetailFactory(status=Detail.PENDING_APPROVAL)
+        d2 = DetailFactory(status=Detail.PENDING_APPROVAL)
+        d1.entry.approvers.add(u)
+
+        client.login(username=u.username, password="test")
+        response = client.post(
+            reverse("plans:batch-approve-details"),
+            json.dumps({"details": [d1.pk, d2.pk], "action": "approve"}),
+            content_type="application/json",
+        )
+        assert response.json() == {
+            "results": [
+                {"detail": d1.pk, "result": "approved"},
+                {"detail": d2.pk, "result": "forbidden"},
+            ]
+        }
+
+        response = client.post(
+            reverse("plans:batch-approve-details"),
+            {"details": [d1.pk], "action": "unapprove", "next": "https://evil.test/"},
+        )
+        assert response.status_code == 302
+        assert response.url == reverse("plans:list")
+        assert not Approval.objects.filter(user=u).exists()
+
+        response = client.get(reverse("plans:batch-approve-details"))
+        assert response.status_code == 405
+
     def test_toggle_approval_approve_unapprove(self, client, user):
         p = PlanFactory(creator=user)
         c = ControlFactory()
@@ -255,3 +680,218 @@ class TestDetailView:
         client.login(username=user.username, password="test")
         response = client.get(reverse("plans:update-detail", args=[d.pk]))
         assert response.status_code == 200
+
+    def test_DetailUpdateView_conflict(self, client, user):
+        e = EntryFactory()
+        e.collaborators.add(user)
+        DetailFactory(entry=e, status=Detail.PENDING_APPROVAL)
+        d = DetailFactory(entry=e, status=Detail.DRAFT)
+        client.login(username=user.username, password="test")
+        url = reverse("plans:update-detail", args=[d.pk])
+        data = {"status": Detail.PENDING_APPROVAL, "text": "text"}
+
+        response = client.post(url, data)
+        assert response.status_code == 200
+        assert response.context["form"].errors["status"] == [
+            "Cannot have multiple pending approval."
+        ]
+        assert Detail.objects.get(pk=d.pk).status == Detail.DRAFT
+
+    def test_DetailAdmin_conflict(self, client):
+        e = EntryFactory()
+        DetailFactory(entry=e, status=Detail.PENDING_APPROVAL)
+        d = DetailFactory(entry=e, status=Detail.DRAFT)
+        client.force_login(UserFactory(is_staff=True, is_superuser=True))
+        url = reverse("admin:plans_detail_change", args=[d.pk])
+
+        response = client.post(
+            url,
+            {
+                "entry": e.pk,
+                "plan": d.plan_id,
+                "status": Detail.PENDING_APPROVAL,
+                "text": "text",
+                "last_status": Detail.DRAFT,
+            },
+        )
+        assert response.status_code == 302
+        assert response.url == url
+        assert Detail.objects.get(pk=d.pk).status == Detail.DRAFT
+
+
+class TestFileArtifactDownload:
+    @pytest.fixture
+    def artifact(self, user):
+        a = FileArtifact.objects.create(
+            name="Scan",
+            plan=PlanFactory(creator=user),
+            upload=SimpleUploadedFile("scan results.txt", b"0123456789"),
+            creator=user,
+        )
+        work()
+        a.refresh_from_db()
+        return a
+
+    def url(self, artifact):
+        return reverse(
+            "plans:fileartifact-download", args=[artifact.plan_id, artifact.pk]
+        )
+
+    def test_requires_login(self, client, artifact):
+        response = client.get(self.url(artifact))
+        assert response.status_code == 302
+
+        client.force_login(artifact.creator)
+        response = client.get(
+            reverse("plans:fileartifact-download", args=[99999, artifact.pk])
+        )
+        assert response.status_code == 404
+
+    def test_download(self, client, artifact):
+        client.force_login(artifact.creator)
+        response = client.get(self.url(artifact))
+
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content) == b"0123456789"
+        assert response["ETag"] == f'"{artifact.file_hash}"'
+        assert response["Content-Type"] == "text/plain"
+        assert response["Content-Length"] == "10"
+        assert response["Accept-Ranges"] == "bytes"
+        assert response["Content-Disposition"] == (
+            'attachment; filename="scan results.txt"'
+        )
+
+        response = client.get(
+            self.url(artifact), HTTP_IF_NONE_MATCH=f'"{artifact.file_hash}"'
+        )
+        assert response.status_code == 304
+
+    def test_range(self, client, artifact):
+        client.force_login(artifact.creator)
+        etag = f'"{artifact.file_hash}"'
+
+        response = client.get(self.url(artifact), HTTP_RANGE="bytes=2-5")
+        assert response.status_code == 206
+        assert b"".join(response.streaming_content) == b"2345"
+        assert response["Content-Range"] == "bytes 2-5/10"
+        assert response["Content-Length"] == "4"
+
+        response = client.get(
+            self.url(artifact), HTTP_RANGE="bytes=-3", HTTP_IF_RANGE=etag
+        )
+        assert b"".join(response.streaming_content) == b"789"
+
+        response = client.get(
+            self.url(artifact), HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"stale"'
+        )
+        assert response.status_code == 200
+
+        response = client.get(self.url(artifact), HTTP_RANGE="bytes=10-")
+        assert response.status_code == 416
+        assert response["Content-Range"] == "bytes */10"
+
+    def test_proxy_modes(self, client, artifact, settings):
+        client.force_login(artifact.creator)
+
+        settings.FILE_DOWNLOAD_MODE = "x-accel-redirect"
+        response = client.get(self.url(artifact))
+        assert response.status_code == 200
+        assert response.content == b""
+        assert response["X-Accel-Redirect"] == (
+            "/protected-media/" + artifact.upload.name
+        )
+        assert response["ETag"] == f'"{artifact.file_hash}"'
+
+        settings.FILE_DOWNLOAD_MODE = "x-sendfile"
+        response = client.get(self.url(artifact))
+        assert response["X-Sendfile"] == artifact.upload.path
+
+        settings.FILE_DOWNLOAD_MODE = "x-accel-redirect"
+        FileArtifact.objects.filter(pk=artifact.pk).update(upload="files/a b#é.txt")
+        response = client.get(self.url(artifact))
+        assert response["X-Accel-Redirect"] == (
+            "/protected-media/files/a%20b%23%C3%A9.txt"
+        )
+
+
+class TestFileArtifactExport:
+    @pytest.fixture
+    def plan(self, user):
+        root = ControlFactory()
+        family_a = ControlFactory(parent=root)
+        family_b = ControlFactory(parent=root)
+        plan = PlanFactory(root_control=root, creator=user)
+        for control, content in [
+            (ControlFactory(parent=family_a), b"first"),
+            (family_b, b"second"),
+        ]:
+            entry = EntryFactory(plan=plan, control=control)
+            artifact = FileArtifact.objects.create(
+                name=f"{control.slug} evidence",
+                plan=plan,
+                upload=SimpleUploadedFile("evidence.txt", content),
+                creator=user,
+            )
+            Detail.objects.get(entry=entry).file_artifacts.add(artifact)
+        FileArtifact.objects.create(
+            name="Unattached",
+            plan=plan,
+            upload=SimpleUploadedFile("other.txt", b"third"),
+            creator=user,
+        )
+        return plan
+
+    def archive(self, response):
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/zip"
+        return zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+    def manifest(self, archive):
+        return list(csv.DictReader(io.StringIO(archive.read("manifest.csv").decode())))
+
+    def test_export(self, client, user, plan):
+        client.force_login(user)
+        response = client.get(reverse("plans:export-fileartifacts", args=[plan.pk]))
+
+        archive = self.archive(response)
+        assert response["Content-Disposition"] == (
+            f'attachment; filename="{slugify(plan.title)}-artifacts.zip"'
+        )
+        artifacts = FileArtifact.objects.filter(plan=plan).order_by("pk")
+        rows = self.manifest(archive)
+        assert [row["path"] for row in rows] == [
+            f"{a.pk}-{a.file_name}" for a in artifacts
+        ]
+        for artifact, row in zip(artifacts, rows):
+            data = archive.read(row["path"])
+            assert row["sha256"] == hashlib.sha256(data).hexdigest()
+            assert row["sha256"] == artifact.file_hash
+            assert row["size"] == str(len(data))
+            assert row["status"] == "ok"
+
+    def test_export_family(self, client, user, plan):
+        client.force_login(user)
+        family = plan.root_control.get_children().first()
+        url = reverse("plans:export-fileartifacts", args=[plan.pk])
+
+        archive = self.archive(client.get(url, {"family": family.slug}))
+        rows = self.manifest(archive)
+        assert [row["name"] for row in rows] == [
+            f"{family.get_children().get().slug} evidence"
+        ]
+        assert archive.read(rows[0]["path"]) == b"first"
+
+        other = ControlFactory()
+        assert client.get(url, {"family": other.slug}).status_code == 404
+
+    def test_export_missing_file(self, client, user, plan):
+        client.force_login(user)
+        artifact = FileArtifact.objects.filter(plan=plan).order_by("pk").first()
+        artifact.upload.storage.delete(artifact.upload.name)
+
+        archive = self.archive(
+            client.get(reverse("plans:export-fileartifacts", args=[plan.pk]))
+        )
+        row = self.manifest(archive)[0]
+        assert row["status"] == "missing"
+        assert row["path"] not in archive.namelist()
@@ -0,0 +1,125 @@
+import hashlib
+import mimetypes
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+HEAD_SIZE = 16
+
+# (offset, signature, mime type) for the evidence formats we see most.
+MAGIC_NUMBERS = (
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"BM", "image/bmp"),
+    (8, b"WEBP", "image/webp"),
+    (0, b"{\\rtf", "application/rtf"),
+    (0, b"\x1f\x8b", "application/gzip"),
+    (0, b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (0, b"PK\x03\x04", "application/zip"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+    (0, b"<?xml", "application/xml"),
+)
+
+# Containers that many formats share, the file name is more specific.
+GENERIC_TYPES = ("application/zip", "application/x-ole-storage", "application/xml")
+
+
+def sniff_mime_type(head):
+    for offset, signature, mime_type in MAGIC_NUMBERS:
+        if head[offset : offset + len(signature)] == signature:
+            return mime_type
+    return None
+
+
+class FileDigest:
+    """Size, SHA-256 and the leading bytes of a file, fed chunk by chunk."""
+
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+        self.head = b""
+        self.size = 0
+
+    def update(self, chunk):
+        self.sha256.update(chunk)
+        if len(self.head) < HEAD_SIZE:
+            self.head += chunk[: HEAD_SIZE - len(self.head)]
+        self.size += len(chunk)
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+
+def type_meta_data(name, head=None):
+    """MIME type, extension and encoding for a file called ``name``.
+
+    Without the leading bytes ``head`` this is a guess from the name only.
+    """
+    guessed_type, file_encoding = mimetypes.guess_type(name)
+    mime_type = sniff_mime_type(head) if head else None
+    if mime_type is None or (mime_type in GENERIC_TYPES and guessed_type):
+        mime_type = guessed_type
+    meta_data = {}
+    if mime_type is not None:
+        meta_data["mime_type"] = mime_type
+        if (file_extension := mimetypes.guess_extension(mime_type)) is not None:
+            meta_data["file_extension"] = file_extension[1:]
+    if file_encoding is not None:
+        meta_data["file_encoding"] = file_encoding
+    return meta_data
+
+
+def uploaded_file_digest(uploaded_file):
+    """The digest computed while ``uploaded_file`` streamed in.
+
+    Files that did not come through a hashing handler, like those created
+    in code or tests, are read once here instead.
+    """
+    digest = getattr(uploaded_file, "digest", None)
+    if digest is None:
+        digest = FileDigest()
+        for chunk in uploaded_file.chunks():
+            digest.update(chunk)
+    return digest
+
+
+class HashingUploadHandlerMixin:
+    """Digest every chunk the wrapped handler keeps.
+
+    The digest is attached to the uploaded file as ``digest`` so the
+    artifact's metadata is known before it is saved.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.digest = FileDigest()
+        return super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        data = super().receive_data_chunk(raw_data, start)
+        if data is None:
+            self.digest.update(raw_data)
+        return data
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        if uploaded_file is not None:
+            uploaded_file.digest = self.digest
+        return uploaded_file
+
+
+class HashingMemoryFileUploadHandler(
+    HashingUploadHandlerMixin, MemoryFileUploadHandler
+):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(
+    HashingUploadHandlerMixin, TemporaryFileUploadHandler
+):
+    pass
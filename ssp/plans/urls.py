@@ -1,17 +1,33 @@
 from django.urls import path
 
 from .views import (
+    InboxView,
     PlanCreateView,
     PlanDeleteView,
     PlanDetailView,
     PlanListView,
+    PlanRollupDetailView,
+    PlanRollupListView,
+    PlanSearchView,
     PlanUpdateView,
     plan_control_entry,
+    plan_control_subtree,
+    batch_detail_approval,
+    bulk_assign_people,
+    complete_upload,
+    create_upload_session,
     create_detail,
+    detail_diff,
+    download_fileartifact,
+    entry_history,
+    export_fileartifacts,
+    fileartifact_preview,
     DetailUpdateView,
     DetailDeleteView,
     EntryUpdateView,
     toggle_detail_approval,
+    upload_chunk,
+    upload_session,
     FileArtifactCreateView,
     FileArtifactDetailView,
     FileArtifactDeleteView,
@@ -26,6 +42,9 @@ urlpatterns = [
     path(
         "entry/<int:pk>/people/", view=EntryUpdateView.as_view(), name="update-entry",
     ),
+    path("entry/<int:pk>/history/", view=entry_history, name="entry-history"),
+    path("detail/approve/", view=batch_detail_approval, name="batch-approve-details"),
+    path("detail/<int:pk>/diff/", view=detail_diff, name="detail-diff"),
     path(
         "detail/<int:pk>/edit/", view=DetailUpdateView.as_view(), name="update-detail",
     ),
@@ -40,11 +59,45 @@ urlpatterns = [
         name="toggle-approve-detail",
     ),
     path("<int:pk>/", view=PlanDetailView.as_view(), name="detail"),
+    path("inbox/", view=InboxView.as_view(), name="inbox"),
+    path("rollup/", view=PlanRollupListView.as_view(), name="rollup"),
+    # Plan pages sit under "-" so a control slugged "search", "people" or
+    # "rollup" keeps its own page.
+    path(
+        "<int:pk>/-/rollup/", view=PlanRollupDetailView.as_view(), name="plan-rollup",
+    ),
+    path("<int:pk>/-/people/", view=bulk_assign_people, name="bulk-assign-people"),
+    path("<int:pk>/-/search/", view=PlanSearchView.as_view(), name="search"),
     path(
         "<int:pk>/artifact/upload/",
         view=FileArtifactCreateView.as_view(),
         name="plan-create-fileartifact",
     ),
+    path(
+        "<int:pk>/artifact/export/",
+        view=export_fileartifacts,
+        name="export-fileartifacts",
+    ),
+    path(
+        "<int:pk>/artifact/uploads/",
+        view=create_upload_session,
+        name="create-upload-session",
+    ),
+    path(
+        "<int:plan_pk>/artifact/uploads/<uuid:pk>/",
+        view=upload_session,
+        name="upload-session",
+    ),
+    path(
+        "<int:plan_pk>/artifact/uploads/<uuid:pk>/<int:index>/",
+        view=upload_chunk,
+        name="upload-chunk",
+    ),
+    path(
+        "<int:plan_pk>/artifact/uploads/<uuid:pk>/complete/",
+        view=complete_upload,
+        name="complete-upload",
+    ),
     path(
         "<int:plan_pk>/artifact/<int:pk>/delete/",
         view=FileArtifactDeleteView.as_view(),
@@ -55,11 +108,26 @@ urlpatterns = [
         view=FileArtifactDetailView.as_view(),
         name="fileartifact-detail",
     ),
+    path(
+        "<int:plan_pk>/artifact/<int:pk>/download/",
+        view=download_fileartifact,
+        name="fileartifact-download",
+    ),
+    path(
+        "<int:plan_pk>/artifact/<int:pk>/<slug:rendition>/<slug:file_hash>.jpg",
+        view=fileartifact_preview,
+        name="fileartifact-preview",
+    ),
     path(
         "<int:plan_pk>/<slug:control_slug>/detail/",
         view=plan_control_entry,
         name="plan-control-entry",
     ),
+    path(
+        "<int:pk>/<slug:control_slug>/subtree/",
+        view=plan_control_subtree,
+        name="plan-control-subtree",
+    ),
     path(
         "<int:pk>/<slug:control_slug>/",
         view=PlanDetailView.as_view(),
@@ -1,3 +1,7 @@
+import json
+import os
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import (
@@ -7,17 +11,73 @@ from django.contrib.auth.mixins import (
 )
 from django.contrib.messages.views import SuccessMessageMixin
 from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db.models import F, IntegerField, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.fields.files import FieldFile
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import add_never_cache_headers
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils.text import slugify
+from django.views.decorators.http import (
+    require_http_methods,
+    require_POST,
+    require_safe,
+)
 from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
 from django.views.generic.list import ListView
 
+from ssp.controls.cache import get_control_or_404
 from ssp.controls.models import Control
+from ssp.utils.downloads import content_disposition, serve_file
+from ssp.utils.pagination import KeysetPaginationMixin
 from ssp.utils.views import ActiveTabView
 
-from .models import Approval, Detail, Entry, Plan, FileArtifact
-from .forms import NewPlanForm
+from .models import (
+    Approval,
+    Detail,
+    Entry,
+    Plan,
+    PlanRollup,
+    FileArtifact,
+    OpenDetailConflict,
+    UploadSession,
+)
+from .chunked import ChunkOutOfOrder, append_chunk, finish_upload
+from .dashboard import get_plan_dashboard
+from .entry_state import load_entry_state, prioritized_details
+from .export import plan_artifacts, zip_artifacts
+from .forms import BulkAssignForm, NewPlanForm, UploadSessionForm
+from .history import detail_diff as get_detail_diff
+from .inbox import inbox_counts, inbox_details
+from .previews import RENDITIONS
+from .search import search_plan
+from .services import (
+    APPROVED,
+    UNAPPROVED,
+    assign_people,
+    batch_approve,
+    materialize_entries,
+)
+
+
+SUBTREE_PAGE_SIZE = 25
+# Preview URLs contain the content hash, so they never go stale.
+PREVIEW_MAX_AGE = 60 * 60 * 24 * 365
+HISTORY_PAGE_SIZE = 20
+
+
+def control_subtree_page(control, page_number=1):
+    queryset = Control.objects.filter(
+        tree_id=control.tree_id,
+        lft__gt=control.lft,
+        rght__lt=control.rght,
+        level=control.level + 1,
+        is_withdrawn=False,
+    ).order_by("lft")
+    return Paginator(queryset, SUBTREE_PAGE_SIZE).get_page(page_number)
 
 
 class BasePlanView(LoginRequiredMixin, ActiveTabView):
@@ -30,8 +90,39 @@ class BasePlanRestrictedView(BaseException, UserPassesTestMixin):
             return True
 
 
-class PlanListView(BasePlanView, ListView):
-    model = Plan
+class PlanListView(BasePlanView, KeysetPaginationMixin, ListView):
+    paginate_by = 50
+    keyset_orderings = {"title": "title", "created": "-created_on"}
+    keyset_default_ordering = "title"
+
+    def get_queryset(self):
+        rollups = (
+            PlanRollup.objects.filter(plan=OuterRef("pk")).order_by().values("plan")
+        )
+        return Plan.objects.annotate(
+            entry_count=Subquery(
+                rollups.annotate(
+                    n=Sum(
+                        F("draft")
+                        + F("pending_approval")
+                        + F("approved")
+                        + F("published")
+                    )
+                ).values("n"),
+                output_field=IntegerField(),
+            ),
+            pending_approval_count=Subquery(
+                rollups.annotate(n=Sum(F("pending_approval") + F("approved"))).values(
+                    "n"
+                ),
+                output_field=IntegerField(),
+            ),
+            last_activity=Subquery(
+                Detail.objects.filter(plan=OuterRef("pk"))
+                .order_by("-modified_on")
+                .values("modified_on")[:1]
+            ),
+        )
 
 
 class PlanCreateView(BasePlanRestrictedView, CreateView):
@@ -42,47 +133,122 @@ class PlanCreateView(BasePlanRestrictedView, CreateView):
         self.object = form.save(commit=False)
         self.object.creator = self.request.user
         self.object.save()
+        if form.cleaned_data["materialize_entries"]:
+            materialize_entries(self.object)
         messages.success(self.request, "Plan created.", fail_silently=True)
         return redirect(self.get_success_url())
 
 
 class PlanDetailView(BasePlanView, DetailView):
     model = Plan
-    queryset = Plan.objects.select_related()
+    queryset = Plan.objects.select_related("root_control")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if (control_slug := self.kwargs.get("control_slug", None)) is not None:
-            context["control"] = get_object_or_404(Control, slug=control_slug)
-            context["control_list"] = context["control"].get_descendants()
+            context["control"] = get_control_or_404(control_slug)
+            context["control_list"] = control_subtree_page(context["control"])
         else:
-            context["control_list"] = Control.objects.filter(
-                parent=self.object.root_control
-            ).all()
-            context["pending_approval"] = Detail.objects.select_related().filter(
-                plan=self.object,
-                status=Detail.PENDING_APPROVAL,
-                entry__approvers=self.request.user,
-            )
-            context["pending_approval_count"] = context["pending_approval"].count()
-            context["collaborating"] = Detail.objects.select_related().filter(
-                plan=self.object,
-                status=Detail.DRAFT,
-                entry__collaborators=self.request.user,
-            )
-            context["observing"] = Detail.objects.select_related().filter(
-                plan=self.object,
-                status=Detail.DRAFT,
-                entry__observers=self.request.user,
-            )
-            context["approved"] = list(
-                Approval.objects.filter(plan=self.object, user=self.request.user)
-                .select_related()
-                .values_list("detail__pk", flat=True)
-            )
-            context["artifact_list"] = FileArtifact.objects.select_related().filter(
-                plan=self.object
-            )
+            context.update(get_plan_dashboard(self.object, self.request.user))
+        return context
+
+
+class PlanSearchView(BasePlanView, ListView):
+    template_name = "plans/plan_search.html"
+    paginate_by = 20
+
+    def get_queryset(self):
+        self.plan = get_object_or_404(
+            Plan.objects.select_related("root_control"), pk=self.kwargs["pk"]
+        )
+        self.query = self.request.GET.get("q", "").strip()
+        if not self.query:
+            return []
+        return search_plan(self.plan, self.query)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["plan"] = self.plan
+        context["query"] = self.query
+        return context
+
+
+class InboxView(BasePlanView, KeysetPaginationMixin, ListView):
+    template_name = "plans/inbox.html"
+    active_tab = "inbox"
+    context_object_name = "detail_list"
+    paginate_by = 50
+    keyset_orderings = {"recent": "-modified_on"}
+    keyset_default_ordering = "recent"
+
+    def get_queryset(self):
+        return inbox_details(
+            self.request.user,
+            role=self.request.GET.get("role"),
+            status=self.request.GET.get("status"),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["counts"] = inbox_counts(self.request.user)
+        context["role"] = self.request.GET.get("role", "")
+        context["status"] = self.request.GET.get("status", "")
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get("format") != "json":
+            return super().render_to_response(context, **response_kwargs)
+        page = context["page_obj"]
+        return JsonResponse(
+            {
+                "counts": context["counts"],
+                "next": page.next_cursor if page else None,
+                "previous": page.previous_cursor if page else None,
+                "results": [
+                    {
+                        "detail": detail.pk,
+                        "status": detail.status,
+                        "modified_on": detail.modified_on,
+                        "plan": detail.plan_id,
+                        "plan_title": detail.plan.title,
+                        "control": detail.entry.control.slug,
+                        "control_name": detail.entry.control.name,
+                        "is_approver": detail.is_approver,
+                        "is_collaborator": detail.is_collaborator,
+                        "is_observer": detail.is_observer,
+                        "is_approved": detail.is_approved,
+                        "is_ready": detail.is_ready,
+                        "url": reverse(
+                            "plans:plan-control-entry",
+                            args=[detail.plan_id, detail.entry.control.slug],
+                        ),
+                    }
+                    for detail in context["detail_list"]
+                ],
+            }
+        )
+
+
+class PlanRollupListView(BasePlanView, ListView):
+    template_name = "plans/plan_rollup_list.html"
+    queryset = Plan.objects.annotate(
+        control_count=Sum("planrollup__control_count"),
+        draft=Sum("planrollup__draft"),
+        pending_approval=Sum("planrollup__pending_approval"),
+        approved=Sum("planrollup__approved"),
+        published=Sum("planrollup__published"),
+    ).order_by("title")
+
+
+class PlanRollupDetailView(BasePlanView, DetailView):
+    model = Plan
+    template_name = "plans/plan_rollup_detail.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["rollup_list"] = PlanRollup.objects.filter(
+            plan=self.object
+        ).select_related("family")
         return context
 
 
@@ -99,65 +265,56 @@ class PlanDeleteView(BasePlanRestrictedView, DeleteView):
 
 
 @login_required
-def plan_control_entry(request, plan_pk, control_slug):
-    plan = get_object_or_404(Plan, pk=plan_pk)
-    control = get_object_or_404(Control, slug=control_slug, is_placeholder=False)
-
-    try:
-        entry = Entry.objects.filter(plan=plan, control=control).prefetch_related(
-            "approvers", "collaborators", "observers"
-        )[0]
-    except IndexError:
-        entry = Entry.objects.create(plan=plan, control=control)
-
-    try:
-        detail = Detail.objects.get(entry=entry, status=Detail.DRAFT)
-    except Detail.DoesNotExist:
-        try:
-            detail = Detail.objects.get(entry=entry, status=Detail.PENDING_APPROVAL)
-        except Detail.DoesNotExist:
-            detail = entry.latest_published_detail()
-
-    if detail.status != detail.PUBLISHED:
-        can_approve = entry.user_can_approve(request.user)
-        can_collaborate = entry.user_can_collaborate(request.user)
-
-        try:
-            approval = Approval.objects.get(detail=detail, user=request.user)
-        except Approval.DoesNotExist:
-            approval = None
-    else:
-        can_approve = False
-        can_collaborate = False
-        approval = None
-
-    approval_list = (
-        Approval.objects.select_related("user")
-        .filter(detail=detail)
-        .order_by("user__name")
-    )
-
-    approval_pk_list = list(approval_list.values_list("user__pk", flat=True))
+def plan_control_subtree(request, pk, control_slug):
+    plan = get_object_or_404(Plan.objects.select_related("root_control"), pk=pk)
+    control = get_control_or_404(control_slug)
+    if control.tree_id != plan.root_control.tree_id:
+        raise Http404("Control is not part of this plan.")
+    control_list = control_subtree_page(control, request.GET.get("page"))
+
+    if request.GET.get("format") == "json":
+        return JsonResponse(
+            {
+                "control": control.slug,
+                "page": control_list.number,
+                "num_pages": control_list.paginator.num_pages,
+                "has_next": control_list.has_next(),
+                "results": [
+                    {
+                        "slug": child.slug,
+                        "name": child.name,
+                        "is_placeholder": child.is_placeholder,
+                        "descendant_count": child.get_descendant_count(),
+                        "body_html": child.rendered_body(),
+                        "entry_url": None
+                        if child.is_placeholder
+                        else reverse(
+                            "plans:plan-control-entry", args=[plan.pk, child.slug]
+                        ),
+                        "subtree_url": reverse(
+                            "plans:plan-control-subtree", args=[plan.pk, child.slug]
+                        ),
+                    }
+                    for child in control_list
+                ],
+            }
+        )
 
     return render(
         request,
-        "plans/plan_control_entry.html",
-        {
-            "plan": plan,
-            "control": control,
-            "entry": entry,
-            "detail": detail,
-            "can_approve": can_approve,
-            "can_collaborate": can_collaborate,
-            "approval": approval,
-            "approval_list": approval_list,
-            "approval_pk_list": approval_pk_list,
-            "active_tab": "plans",
-            "has_artifacts": detail.file_artifacts.count() > 0,
-        },
+        "plans/control_subtree.html",
+        {"plan": plan, "control": control, "control_list": control_list},
     )
 
 
+@login_required
+def plan_control_entry(request, plan_pk, control_slug):
+    control = get_control_or_404(control_slug, is_placeholder=False)
+    context = load_entry_state(plan_pk, control, request.user)
+    context["active_tab"] = "plans"
+    return render(request, "plans/plan_control_entry.html", context)
+
+
 class EntryUpdateView(BasePlanRestrictedView, SuccessMessageMixin, UpdateView):
     model = Entry
     fields = ("approvers", "collaborators", "observers")
@@ -171,27 +328,86 @@ class EntryUpdateView(BasePlanRestrictedView, SuccessMessageMixin, UpdateView):
         )
 
 
+@login_required
+@permission_required("plans.change_plan", raise_exception=True)
+def bulk_assign_people(request, pk):
+    plan = get_object_or_404(Plan.objects.select_related("root_control"), pk=pk)
+    is_json = request.content_type == "application/json"
+
+    if request.method == "POST":
+        if is_json:
+            try:
+                data = json.loads(request.body)
+            except ValueError:
+                return JsonResponse(
+                    {"errors": {"__all__": ["Invalid JSON."]}}, status=400
+                )
+            form = BulkAssignForm(data, plan=plan)
+        else:
+            form = BulkAssignForm(request.POST, plan=plan)
+
+        if form.is_valid():
+            summary = assign_people(
+                plan,
+                form.cleaned_data["control"],
+                form.people(),
+                form.cleaned_data["operation"],
+            )
+            if is_json:
+                return JsonResponse(summary)
+            messages.success(
+                request,
+                "Updated {} entries: {}.".format(
+                    summary["entries"],
+                    ", ".join(
+                        f"{role} +{counts['added']}/-{counts['removed']}"
+                        for role, counts in summary["roles"].items()
+                    )
+                    or "no changes",
+                ),
+            )
+            return redirect(
+                "plans:plan-control-detail", plan.pk, form.cleaned_data["control"].slug
+            )
+        if is_json:
+            return JsonResponse({"errors": form.errors}, status=400)
+    else:
+        form = BulkAssignForm(
+            plan=plan, initial={"control": request.GET.get("control")}
+        )
+
+    return render(
+        request,
+        "plans/bulk_assign_form.html",
+        {"plan": plan, "form": form, "active_tab": "plans"},
+    )
+
+
 @login_required
 @permission_required("plans.change_plan")
 def create_detail(request, entry_pk):
     entry = get_object_or_404(Entry.objects.select_related(), pk=entry_pk)
 
-    if Detail.objects.filter(
-        entry=entry, status__in=[Detail.DRAFT, Detail.PENDING_APPROVAL]
-    ).exists():
+    # The current detail is the open one if there is any, and a second
+    # draft racing past this check is rejected by the database.
+    prev_detail = prioritized_details(entry).only("status", "text").first()
+    if prev_detail.status != Detail.PUBLISHED:
         raise PermissionDenied
-    else:
-        prev_detail = entry.latest_published_detail()
+    try:
         detail = Detail.objects.create(
             entry=entry, plan=entry.plan, text=prev_detail.text
         )
-        return redirect("plans:update-detail", pk=detail.pk)
+    except OpenDetailConflict:
+        raise PermissionDenied
+    return redirect("plans:update-detail", pk=detail.pk)
 
 
 @login_required
 def toggle_detail_approval(request, pk):
     detail = get_object_or_404(
-        Detail.objects.select_related(), status=Detail.PENDING_APPROVAL,
+        Detail.objects.select_related(),
+        pk=pk,
+        status=Detail.PENDING_APPROVAL,
     )
 
     entry = detail.entry
@@ -213,9 +429,86 @@ def toggle_detail_approval(request, pk):
 
     return redirect(
         reverse_lazy(
-            "plans:plan-control-entry", args=[entry.plan.pk, entry.control.slug],
+            "plans:plan-control-entry",
+            args=[entry.plan.pk, entry.control.slug],
+        )
+    )
+
+
+@login_required
+def entry_history(request, pk):
+    entry = get_object_or_404(Entry.objects.select_related("plan", "control"), pk=pk)
+    details = (
+        Detail.objects.filter(entry=entry)
+        .order_by("-created_on", "-pk")
+        .only("pk", "entry_id", "status", "created_on", "modified_on")
+        .prefetch_related(
+            Prefetch(
+                "approval_set",
+                queryset=Approval.objects.select_related("user").order_by("created_on"),
+                to_attr="approval_list",
+            )
         )
     )
+    paginator = Paginator(details, HISTORY_PAGE_SIZE)
+    return render(
+        request,
+        "plans/entry_history.html",
+        {
+            "plan": entry.plan,
+            "control": entry.control,
+            "entry": entry,
+            "detail_list": paginator.get_page(request.GET.get("page")),
+            "active_tab": "plans",
+        },
+    )
+
+
+@login_required
+def detail_diff(request, pk):
+    detail = get_object_or_404(
+        Detail.objects.only("pk", "entry_id", "text", "modified_on", "created_on"),
+        pk=pk,
+    )
+    previous, diff = get_detail_diff(detail)
+    return render(
+        request,
+        "plans/detail_diff.html",
+        {"detail": detail, "previous": previous, "diff": diff},
+    )
+
+
+@login_required
+@require_POST
+def batch_detail_approval(request):
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body)
+            detail_pks = [int(pk) for pk in data.get("details", [])]
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({"error": "Invalid request."}, status=400)
+        action = data.get("action", "approve")
+    else:
+        try:
+            detail_pks = [int(pk) for pk in request.POST.getlist("details")]
+        except ValueError:
+            return JsonResponse({"error": "Invalid request."}, status=400)
+        action = request.POST.get("action", "approve")
+    if action not in ("approve", "unapprove"):
+        return JsonResponse({"error": "Invalid action."}, status=400)
+
+    results = batch_approve(request.user, detail_pks, approve=action == "approve")
+
+    if request.content_type == "application/json":
+        return JsonResponse({"results": results})
+    changed = sum(r["result"] in (APPROVED, UNAPPROVED) for r in results)
+    messages.success(request, f"{action.title()}d {changed} of {len(results)} entries.")
+    next_url = request.POST.get("next")
+    if not url_has_allowed_host_and_scheme(
+        next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+    ):
+        next_url = reverse("plans:list")
+    return redirect(next_url)
 
 
 class DetailUpdateView(BasePlanView, SuccessMessageMixin, UpdateView):
@@ -242,6 +535,13 @@ class DetailUpdateView(BasePlanView, SuccessMessageMixin, UpdateView):
             raise PermissionDenied
         return obj
 
+    def form_valid(self, form):
+        try:
+            return super().form_valid(form)
+        except OpenDetailConflict as e:
+            form.add_error("status", str(e))
+            return self.form_invalid(form)
+
     def get_success_url(self):
         if self.object.status == Detail.PUBLISHED:
             return reverse_lazy(
@@ -291,13 +591,181 @@ class FileArtifactDetailView(BasePlanView, DetailView):
 
     def get_object(self, queryset=None):
         obj = get_object_or_404(
-            FileArtifact.objects.select_related(),
+            FileArtifact.objects.select_related("plan", "creator", "blob"),
             pk=self.kwargs["pk"],
             plan=self.kwargs["plan_pk"],
         )
         return obj
 
 
+@login_required
+@require_safe
+def download_fileartifact(request, plan_pk, pk):
+    artifact = get_object_or_404(FileArtifact, pk=pk, plan=plan_pk)
+    content_type = "application/octet-stream"
+    if artifact.status == FileArtifact.READY and "/" in artifact.mime_type:
+        content_type = artifact.mime_type
+    return serve_file(
+        request,
+        artifact.upload,
+        etag=artifact.file_hash,
+        content_type=content_type,
+        filename=artifact.file_name or f"{artifact.name}.{artifact.file_extension}",
+        last_modified=artifact.created_on,
+    )
+
+
+@login_required
+@require_safe
+def fileartifact_preview(request, plan_pk, pk, rendition, file_hash):
+    artifact = get_object_or_404(
+        FileArtifact.objects.select_related("blob"),
+        pk=pk,
+        plan=plan_pk,
+        file_hash=file_hash,
+        blob__has_previews=True,
+    )
+    if rendition not in RENDITIONS:
+        raise Http404("Unknown rendition.")
+    name = artifact.blob.rendition_name(rendition)
+    return serve_file(
+        request,
+        FieldFile(artifact, FileArtifact.upload.field, name),
+        etag=f"{file_hash}-{rendition}",
+        content_type="image/jpeg",
+        filename=f"{os.path.splitext(artifact.file_name)[0]}-{rendition}.jpg",
+        as_attachment=False,
+        max_age=PREVIEW_MAX_AGE,
+    )
+
+
+@login_required
+@require_safe
+def export_fileartifacts(request, pk):
+    plan = get_object_or_404(Plan.objects.select_related("root_control"), pk=pk)
+    family = None
+    file_name = f"{slugify(plan.title)}-artifacts.zip"
+    if family_slug := request.GET.get("family"):
+        family = get_object_or_404(
+            Control,
+            slug=family_slug,
+            tree_id=plan.root_control.tree_id,
+            level__lte=1,
+        )
+        file_name = f"{slugify(plan.title)}-{family.slug}-artifacts.zip"
+    response = StreamingHttpResponse(
+        zip_artifacts(plan_artifacts(plan, family).iterator()),
+        content_type="application/zip",
+    )
+    response["Content-Disposition"] = content_disposition(file_name)
+    # Let nginx pass the archive through as it is generated.
+    response["X-Accel-Buffering"] = "no"
+    add_never_cache_headers(response)
+    return response
+
+
+def upload_session_state(session):
+    return {
+        "id": str(session.pk),
+        "url": reverse("plans:upload-session", args=[session.plan_id, session.pk]),
+        "size": session.size,
+        "chunk_size": session.chunk_size,
+        "chunk_count": session.chunk_count,
+        "received": session.received,
+        "next_chunk": session.next_chunk,
+    }
+
+
+def upload_error(message, session=None, status=400):
+    data = {"errors": {"__all__": [message]}}
+    if session is not None:
+        data.update(upload_session_state(session))
+    return JsonResponse(data, status=status)
+
+
+@login_required
+@permission_required("artifacts.add_fileartifact", raise_exception=True)
+@require_POST
+def create_upload_session(request, pk):
+    plan = get_object_or_404(Plan, pk=pk)
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return upload_error("Invalid JSON.")
+    form = UploadSessionForm(data)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    session = form.save(commit=False)
+    session.plan = plan
+    session.creator = request.user
+    session.chunk_size = settings.CHUNKED_UPLOAD_CHUNK_SIZE
+    session.save()
+    return JsonResponse(upload_session_state(session), status=201)
+
+
+@login_required
+@require_http_methods(["GET", "HEAD", "DELETE"])
+def upload_session(request, plan_pk, pk):
+    session = get_object_or_404(
+        UploadSession, pk=pk, plan=plan_pk, creator=request.user
+    )
+    if request.method == "DELETE":
+        session.delete()
+        return HttpResponse(status=204)
+    return JsonResponse(upload_session_state(session))
+
+
+@login_required
+@require_http_methods(["PUT"])
+def upload_chunk(request, plan_pk, pk, index):
+    # The lock serializes chunks of one session, requests run in a transaction.
+    session = get_object_or_404(
+        UploadSession.objects.select_for_update(),
+        pk=pk,
+        plan=plan_pk,
+        creator=request.user,
+    )
+    chunk_hash = request.headers.get("X-Chunk-SHA256")
+    if not chunk_hash:
+        return upload_error("Missing the X-Chunk-SHA256 header.", session)
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+        append_chunk(session, index, request, length, chunk_hash)
+    except ChunkOutOfOrder as e:
+        return upload_error(str(e), session, status=409)
+    except ValueError as e:
+        return upload_error(str(e), session)
+    return JsonResponse(upload_session_state(session))
+
+
+@login_required
+@require_POST
+def complete_upload(request, plan_pk, pk):
+    session = get_object_or_404(
+        UploadSession.objects.select_for_update().select_related("plan", "creator"),
+        pk=pk,
+        plan=plan_pk,
+        creator=request.user,
+    )
+    try:
+        data = json.loads(request.body or "{}")
+    except ValueError:
+        return upload_error("Invalid JSON.", session)
+    try:
+        artifact = finish_upload(session, data.get("sha256"))
+    except ChunkOutOfOrder as e:
+        return upload_error(str(e), session, status=409)
+    except ValueError as e:
+        return upload_error(str(e), session)
+    return JsonResponse(
+        {
+            "id": artifact.pk,
+            "url": reverse("plans:fileartifact-detail", args=[plan_pk, artifact.pk]),
+        },
+        status=201,
+    )
+
+
 class FileArtifactDeleteView(BasePlanView, PermissionRequiredMixin, DeleteView):
     model = FileArtifact
     fields = ("name", "upload")
@@ -1 +1,29 @@
 /* Project specific Javascript goes here. */
+
+// Lazily load HTML fragments such as control subtrees and detail diffs.
+// The fetched fragment replaces the button that requested it.
+document.addEventListener("click", function (event) {
+  var button = event.target.closest("[data-fragment-url]");
+  if (!button) {
+    return;
+  }
+  event.preventDefault();
+  button.disabled = true;
+  fetch(button.dataset.fragmentUrl, {
+    credentials: "same-origin",
+    headers: { "X-Requested-With": "XMLHttpRequest" },
+  })
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      button.insertAdjacentHTML("beforebegin", html);
+      button.remove();
+    })
+    .catch(function () {
+      button.disabled = false;
+    });
+});
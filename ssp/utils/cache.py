@@ -0,0 +1,27 @@
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_generation(key):
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, 1, None)
+        generation = cache.get(key, 1)
+    return generation
+
+
+def _incr_generation(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 2, None)
+
+
+def bump_generation(key):
+    """Invalidate everything cached under ``key``'s generation.
+
+    Bumped immediately and again on commit so values cached from the old
+    rows while the transaction was still open are not picked up again.
+    """
+    _incr_generation(key)
+    transaction.on_commit(lambda: _incr_generation(key))
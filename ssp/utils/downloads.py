@@ -0,0 +1,147 @@
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+X_ACCEL_REDIRECT = "x-accel-redirect"
+X_SENDFILE = "x-sendfile"
+
+RE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+BLOCK_SIZE = 64 * 1024
+
+
+def content_disposition(filename, as_attachment=True):
+    # The same header FileResponse builds.
+    disposition = "attachment" if as_attachment else "inline"
+    try:
+        filename.encode("ascii")
+        escaped = filename.replace("\\", "\\\\").replace('"', r"\"")
+        file_expr = f'filename="{escaped}"'
+    except UnicodeEncodeError:
+        file_expr = f"filename*=utf-8''{quote(filename)}"
+    return f"{disposition}; {file_expr}"
+
+
+def parse_range(header, size):
+    """The ``(start, end)`` of a single byte range, inclusive.
+
+    Returns None for a missing, malformed or multi-range header, which is
+    answered with the whole file, and raises ValueError when the range
+    cannot be satisfied.
+    """
+    match = RE_RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # A suffix range, the last N bytes.
+        # No byte of an empty file can be sent.
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def file_range(f, start, end):
+    """Yield bytes ``start`` to ``end`` of ``f`` in blocks, then close it."""
+    try:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = f.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        f.close()
+
+
+def serve_file(
+    request,
+    fieldfile,
+    etag,
+    content_type,
+    filename,
+    last_modified=None,
+    as_attachment=True,
+    max_age=None,
+):
+    """Send a stored file with ETag, Range and front proxy offload support.
+
+    ``etag`` identifies the content, a 304 is sent when it matches. In
+    the proxy modes Django only checks access and the proxy sends the
+    bytes, otherwise the file is streamed in blocks and never buffered.
+    Files whose URL changes with their content can pass ``max_age`` to
+    be cached without revalidation.
+    """
+    etag = quote_etag(etag) if etag else None
+    last_modified = last_modified and last_modified.timestamp()
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(
+            request, fieldfile, etag, content_type, filename, as_attachment
+        )
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    if max_age:
+        patch_cache_control(response, private=True, max_age=max_age, immutable=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _file_response(request, fieldfile, etag, content_type, filename, as_attachment):
+    mode = settings.FILE_DOWNLOAD_MODE
+    if mode in (X_ACCEL_REDIRECT, X_SENDFILE):
+        response = HttpResponse(content_type=content_type)
+        if mode == X_ACCEL_REDIRECT:
+            response["X-Accel-Redirect"] = (
+                settings.FILE_DOWNLOAD_INTERNAL_URL + quote(fieldfile.name)
+            )
+        else:
+            response["X-Sendfile"] = fieldfile.path
+        response["Content-Disposition"] = content_disposition(filename, as_attachment)
+        return response
+
+    size = fieldfile.size
+    # A stale If-Range validator means the client must get the whole file.
+    if_range = request.headers.get("If-Range")
+    range_header = request.headers.get("Range")
+    if if_range is not None and if_range != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    f = fieldfile.open("rb")
+    if byte_range is None:
+        response = FileResponse(
+            f, as_attachment=as_attachment, filename=filename, content_type=content_type
+        )
+        response["Content-Length"] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            file_range(f, start, end), status=206, content_type=content_type
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+        response["Content-Disposition"] = content_disposition(filename, as_attachment)
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,41 @@
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.safestring import mark_safe
+from markdownify.templatetags.markdownify import markdownify
+
+
+@lru_cache(maxsize=None)
+def markdown_settings_fingerprint():
+    names = sorted(name for name in dir(settings) if name.startswith("MARKDOWNIFY_"))
+    return repr([(name, getattr(settings, name)) for name in names])
+
+
+@receiver(setting_changed)
+def clear_markdown_settings_fingerprint(setting, **kwargs):
+    if setting.startswith("MARKDOWNIFY_"):
+        markdown_settings_fingerprint.cache_clear()
+
+
+def markdown_key(text):
+    m = hashlib.sha256(markdown_settings_fingerprint().encode())
+    m.update((text or "").encode())
+    return m.hexdigest()
+
+
+def refresh_markdown(instance, field):
+    """Re-render ``<field>_html`` if ``field`` or the markdownify settings changed."""
+    key = markdown_key(getattr(instance, field))
+    if getattr(instance, field + "_html_key") != key:
+        setattr(instance, field + "_html", str(markdownify(getattr(instance, field))))
+        setattr(instance, field + "_html_key", key)
+        return True
+    return False
+
+
+def rendered_markdown(instance, field):
+    refresh_markdown(instance, field)
+    return mark_safe(getattr(instance, field + "_html"))
@@ -0,0 +1,154 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _cursor_value(value):
+    # Keep full precision, DjangoJSONEncoder truncates to milliseconds.
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values):
+    return (
+        base64.urlsafe_b64encode(json.dumps(values, default=_cursor_value).encode())
+        .decode()
+        .rstrip("=")
+    )
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return values
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate on ``ordering`` plus ``pk`` instead of OFFSET.
+
+    Each page is fetched with a ``WHERE (key, pk) > (cursor)`` condition so
+    deep pages cost the same as the first one. ``ordering`` is a single
+    field name, prefixed with ``-`` for descending order.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.descending = ordering.startswith("-")
+        self.field = ordering.lstrip("-")
+        self.per_page = per_page
+
+    def _order_by(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = "-" if descending else ""
+        return (prefix + self.field, prefix + "pk")
+
+    def _after(self, values, reverse=False):
+        value, pk = values
+        lookup = "lt" if self.descending != reverse else "gt"
+        return Q(**{f"{self.field}__{lookup}": value}) | Q(
+            **{self.field: value, f"pk__{lookup}": pk}
+        )
+
+    def _cursor(self, obj):
+        return encode_cursor([getattr(obj, self.field), obj.pk])
+
+    def page(self, after=None, before=None):
+        queryset = self.queryset
+        reverse = bool(before)
+        cursor = before if reverse else after
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != 2:
+                raise InvalidCursor(cursor)
+            try:
+                queryset = queryset.filter(self._after(values, reverse))
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor(cursor)
+
+        object_list = list(
+            queryset.order_by(*self._order_by(reverse))[: self.per_page + 1]
+        )
+        more = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+        if reverse:
+            object_list.reverse()
+        if not object_list:
+            return KeysetPage(object_list, None, None)
+
+        has_next = more if not reverse else True
+        has_previous = more if reverse else bool(cursor)
+        return KeysetPage(
+            object_list,
+            self._cursor(object_list[-1]) if has_next else None,
+            self._cursor(object_list[0]) if has_previous else None,
+        )
+
+
+class KeysetPaginationMixin:
+    """Keyset pagination for ``ListView``.
+
+    The page is selected with ``?after=`` or ``?before=`` cursors and the
+    ordering with ``?order=``, which must be a key of ``keyset_orderings``.
+    """
+
+    keyset_orderings = {}
+    keyset_default_ordering = None
+
+    def get_keyset_ordering(self):
+        order = self.request.GET.get("order")
+        if order not in self.keyset_orderings:
+            order = self.keyset_default_ordering
+        return order
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(
+            queryset, self.keyset_orderings[self.get_keyset_ordering()], page_size
+        )
+        try:
+            page = paginator.page(
+                after=self.request.GET.get("after"),
+                before=self.request.GET.get("before"),
+            )
+        except InvalidCursor:
+            raise Http404("Invalid page.")
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["order"] = self.get_keyset_ordering()
+        return context
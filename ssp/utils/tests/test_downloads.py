@@ -0,0 +1,44 @@
+import pytest
+
+from ssp.utils.downloads import content_disposition, parse_range
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        (None, None),
+        ("bytes=0-0", (0, 0)),
+        ("bytes=2-", (2, 9)),
+        ("bytes=5-100", (5, 9)),
+        ("bytes=-4", (6, 9)),
+        ("bytes=-100", (0, 9)),
+        ("bytes=0-1,4-5", None),
+        ("items=0-1", None),
+        ("bytes=-", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 10) == expected
+
+
+@pytest.mark.parametrize(
+    "header,size",
+    [
+        ("bytes=10-", 10),
+        ("bytes=5-2", 10),
+        ("bytes=-0", 10),
+        ("bytes=0-", 0),
+        ("bytes=-4", 0),
+    ],
+)
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+def test_content_disposition():
+    assert content_disposition('a "b".txt') == r'attachment; filename="a \"b\".txt"'
+    assert content_disposition("é.txt") == "attachment; filename*=utf-8''%C3%A9.txt"
+    assert (
+        content_disposition("a.jpg", as_attachment=False) == 'inline; filename="a.jpg"'
+    )
@@ -0,0 +1,46 @@
+import pytest
+
+from ssp.users.models import User
+from ssp.users.tests.factories import UserFactory
+from ssp.utils.pagination import InvalidCursor, KeysetPaginator, encode_cursor
+
+pytestmark = pytest.mark.django_db
+
+
+def test_keyset_paginator():
+    users = sorted(UserFactory.create_batch(5), key=lambda u: u.username)
+    paginator = KeysetPaginator(User.objects.all(), "username", 2)
+
+    page = paginator.page()
+    assert page.object_list == users[:2]
+    assert not page.has_previous()
+
+    page = paginator.page(after=page.next_cursor)
+    assert page.object_list == users[2:4]
+
+    last = paginator.page(after=page.next_cursor)
+    assert last.object_list == users[4:]
+    assert not last.has_next()
+
+    page = paginator.page(before=last.previous_cursor)
+    assert page.object_list == users[2:4]
+    assert page.has_next() and page.has_previous()
+
+
+def test_keyset_paginator_descending():
+    users = UserFactory.create_batch(3)
+    paginator = KeysetPaginator(User.objects.all(), "-date_joined", 2)
+
+    page = paginator.page()
+    page = paginator.page(after=page.next_cursor)
+
+    assert page.object_list == sorted(users, key=lambda u: (u.date_joined, u.pk))[:1]
+
+
+def test_keyset_paginator_invalid_cursor():
+    paginator = KeysetPaginator(User.objects.all(), "-date_joined", 2)
+
+    with pytest.raises(InvalidCursor):
+        paginator.page(after="not a cursor")
+    with pytest.raises(InvalidCursor):
+        paginator.page(after=encode_cursor(["yesterday", 1]))